@@ -0,0 +1,247 @@
+import argparse
+import glob
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+import pandas as pd
+
+# Adicionar o diretório atual ao caminho de busca do Python
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+# Importar os módulos do projeto
+from loading import load_to_excel
+from loading_csv import load_to_csv
+from loading_parquet import load_to_parquet
+from loading_sqlite import load_to_sqlite
+from metrics import metrics_file_path
+from pipeline import Pipeline
+from stages import STAGES
+
+# Nome do relatório de status gravado na pasta de saída
+REPORT_NAME = 'relatorio_lote.csv'
+
+# Extensão acrescentada aos CSVs compactados
+COMPRESSION_SUFFIXES = {'gzip': '.gz', 'zstd': '.zst'}
+
+def find_pdfs(inputs):
+    """Lista os PDFs de uma ou mais pastas ou padrões glob, sem repetições
+
+    Args:
+        inputs: Lista de pastas (todos os .pdf da pasta), arquivos ou padrões
+            glob ('livros/2022-*.pdf')
+    """
+    pdfs = []
+    for item in inputs:
+        if os.path.isdir(item):
+            matches = [os.path.join(item, name) for name in os.listdir(item) if name.lower().endswith('.pdf')]
+        else:
+            matches = glob.glob(item)
+        for path in sorted(matches):
+            path = os.path.abspath(path)
+            if path not in pdfs:
+                pdfs.append(path)
+    return pdfs
+
+def output_paths(pdfs, output_dir, format_type='excel', compression=None):
+    """Define o arquivo de saída de cada PDF, evitando nomes repetidos"""
+    extension = {'csv': '.csv', 'parquet': '.parquet'}.get(format_type.lower(), '.xlsx')
+    if extension == '.csv' and compression:
+        extension += COMPRESSION_SUFFIXES[compression]
+    paths = []
+    used = set()
+    for pdf_path in pdfs:
+        stem = os.path.splitext(os.path.basename(pdf_path))[0]
+        name = stem
+        counter = 2
+        while name.lower() in used:
+            name = f"{stem}_{counter}"
+            counter += 1
+        used.add(name.lower())
+        paths.append(os.path.join(output_dir, name + extension))
+    return paths
+
+def process_pdf(pdf_path, output_path, format_type='excel', include_header=True, method='auto',
+                use_cache=True, keep_data=False, metrics_path=None):
+    """Processa um PDF do lote, sem deixar que uma falha interrompa os demais
+
+    O PDF passa pelo mesmo Pipeline da linha de comando: extração, limpeza e
+    gravação sobrepostas (ou uma após a outra, quando os dados precisam ser
+    mantidos), com o tempo de cada etapa e o arquivo de métricas da execução
+    (metrics_path ou, por padrão, ~/.pdf_etl_app/metrics).
+
+    Returns:
+        Tupla (resultado, dados): resultado é um dicionário com arquivo, saída,
+        status ('ok', 'sem tabelas' ou 'erro'), linhas, tempo, tempo de cada
+        etapa e erro; dados é o DataFrame limpo se keep_data for True, senão
+        None.
+    """
+    start = time.perf_counter()
+    result = {'arquivo': pdf_path, 'saida': output_path, 'status': 'ok', 'linhas': 0, 'tempo': 0.0, 'erro': ''}
+    data = None
+    pipeline = Pipeline(pdf_path, method=method, use_cache=use_cache, metrics_path=metrics_path)
+    try:
+        rows = pipeline.run(output_path, format_type=format_type, include_header=include_header,
+                            keep_data=keep_data)
+        if not pipeline.stats['extracao'].tables:
+            result['status'] = 'sem tabelas'
+        else:
+            result['linhas'] = rows
+            if keep_data:
+                data = pipeline.data
+    except Exception as e:
+        result['status'] = 'erro'
+        result['erro'] = str(e)
+    result['tempo'] = round(time.perf_counter() - start, 2)
+    # Tempo de cada etapa, para o relatório do lote
+    for name in STAGES:
+        result[f"tempo_{name}"] = round(pipeline.stats[name].wall_time, 2)
+    return result, data
+
+def run_batch(inputs, output_dir, format_type='excel', workers=1, consolidated_path=None,
+              include_header=True, method='auto', use_cache=True, compression=None, db_path=None,
+              metrics_dir=None):
+    """Processa um lote de PDFs, um arquivo de saída por PDF
+
+    Os arquivos são distribuídos entre workers processos; cada PDF é extraído
+    de forma sequencial dentro do seu processo. O status e o tempo de cada
+    arquivo são exibidos à medida que terminam e gravados em relatorio_lote.csv
+    na pasta de saída.
+
+    Args:
+        inputs: Lista de pastas, arquivos ou padrões glob com os PDFs
+        output_dir: Pasta onde são gravadas as saídas de cada PDF
+        format_type: 'excel', 'csv' ou 'parquet'
+        workers: Número de processos (um arquivo por vez em cada processo)
+        consolidated_path: Se informado, grava também um arquivo único com os
+            dados de todos os PDFs, com a coluna 'arquivo' indicando a origem
+        include_header: Se True, inclui o cabeçalho da Prefeitura nos CSVs
+        method: Método de extração
+        use_cache: Se True, reutiliza extrações anteriores dos mesmos PDFs
+        compression: 'gzip' ou 'zstd' para gravar os CSVs compactados (.csv.gz,
+            .csv.zst); a compressão é definida pela extensão do arquivo
+        db_path: Se informado, acumula também as notas de todos os PDFs nesse
+            banco SQLite (ver loading_sqlite.py). O banco é gravado só pelo
+            processo principal, à medida que os PDFs terminam, para que os
+            processos não disputem o arquivo
+        metrics_dir: Pasta dos arquivos JSON de métricas, um por PDF, com o
+            nome do arquivo de saída (padrão: ~/.pdf_etl_app/metrics)
+
+    Returns:
+        Lista com o resultado de cada PDF, na ordem dos arquivos
+    """
+    pdfs = find_pdfs(inputs)
+    if not pdfs:
+        print("Nenhum PDF encontrado")
+        return []
+
+    os.makedirs(output_dir, exist_ok=True)
+    outputs = output_paths(pdfs, output_dir, format_type, compression)
+    # Métricas nomeadas pela saída, que não se repete entre os PDFs do lote
+    started_at = datetime.now()
+    metrics_paths = [metrics_file_path(output_path, metrics_dir, started_at) for output_path in outputs]
+    # Os processos devolvem os dados quando é preciso consolidá-los ou gravá-los no banco
+    keep_data = consolidated_path is not None or db_path is not None
+    print(f"Processando {len(pdfs)} PDFs com {workers} processos")
+
+    results = [None] * len(pdfs)
+    data = [None] * len(pdfs)
+    start = time.perf_counter()
+
+    def report(i, result, df):
+        if db_path and df is not None:
+            try:
+                load_to_sqlite(df, db_path, source=pdfs[i])
+            except Exception as e:
+                result['status'] = 'erro'
+                result['erro'] = str(e)
+        results[i] = result
+        if consolidated_path is not None:
+            data[i] = df
+        done = sum(r is not None for r in results)
+        detail = f"{result['linhas']} linhas" if result['status'] == 'ok' else result['erro'] or result['status']
+        print(f"[{done}/{len(pdfs)}] {os.path.basename(result['arquivo'])}: {result['status']} "
+              f"({detail}, {result['tempo']:.1f} s)")
+
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(process_pdf, pdf_path, output_path, format_type, include_header,
+                                       method, use_cache, keep_data, metrics_path): i
+                       for i, (pdf_path, output_path, metrics_path)
+                       in enumerate(zip(pdfs, outputs, metrics_paths))}
+            for future in as_completed(futures):
+                i = futures[future]
+                try:
+                    result, df = future.result()
+                except Exception as e:
+                    # Falha do próprio processo (ex.: falta de memória)
+                    result = {'arquivo': pdfs[i], 'saida': outputs[i], 'status': 'erro', 'linhas': 0,
+                              'tempo': 0.0, 'erro': str(e) or type(e).__name__}
+                    df = None
+                report(i, result, df)
+    else:
+        for i, (pdf_path, output_path, metrics_path) in enumerate(zip(pdfs, outputs, metrics_paths)):
+            report(i, *process_pdf(pdf_path, output_path, format_type, include_header, method,
+                                   use_cache, keep_data, metrics_path))
+
+    if consolidated_path is not None:
+        frames = [df.assign(arquivo=os.path.basename(pdf_path))
+                  for pdf_path, df in zip(pdfs, data) if df is not None]
+        if frames:
+            consolidated = pd.concat(frames, ignore_index=True)
+            # Coluna de origem como primeira coluna
+            consolidated = consolidated[['arquivo'] + [col for col in consolidated.columns if col != 'arquivo']]
+            print(f"Gravando saída consolidada: {len(consolidated)} linhas")
+            if format_type.lower() == 'csv':
+                load_to_csv(consolidated, consolidated_path, include_header=include_header)
+            elif format_type.lower() == 'parquet':
+                load_to_parquet(consolidated, consolidated_path)
+            else:
+                load_to_excel(consolidated, consolidated_path)
+
+    report_path = os.path.join(output_dir, REPORT_NAME)
+    pd.DataFrame(results).to_csv(report_path, index=False, encoding='utf-8-sig', sep=';')
+
+    ok = sum(result['status'] == 'ok' for result in results)
+    print(f"\nLote concluído em {time.perf_counter() - start:.1f} s: {ok} de {len(pdfs)} PDFs processados com sucesso")
+    print(f"Relatório: {report_path}")
+    return results
+
+def parse_args(argv=None):
+    """Lê os argumentos da linha de comando"""
+    parser = argparse.ArgumentParser(description='Processa um lote de PDFs (Livros de Serviços Prestados)')
+    parser.add_argument('entradas', nargs='+', help='Pastas, arquivos ou padrões glob com os PDFs')
+    parser.add_argument('--saida', required=True, help='Pasta onde são gravadas as saídas de cada PDF')
+    parser.add_argument('--formato', choices=['excel', 'csv', 'parquet'], default='excel', help='Formato de saída (padrão: excel)')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Número de PDFs processados em paralelo (padrão: 1)')
+    parser.add_argument('--consolidado', help='Arquivo único com os dados de todos os PDFs')
+    parser.add_argument('--sem-cabecalho', dest='include_header', action='store_false',
+                        help='Não inclui o cabeçalho da Prefeitura nos CSVs')
+    parser.add_argument('--compressao', choices=['gzip', 'zstd'],
+                        help='Grava os CSVs compactados (.csv.gz ou .csv.zst)')
+    parser.add_argument('--banco', help='Acumula também as notas neste banco SQLite')
+    parser.add_argument('--metodo', dest='method', default='auto',
+                        choices=['auto', 'camelot', 'pdfplumber', 'template'],
+                        help='Método de extração (padrão: auto)')
+    parser.add_argument('--no-cache', dest='use_cache', action='store_false',
+                        help='Não usa nem grava o cache de extração')
+    parser.add_argument('--metricas', dest='metrics_dir', metavar='PASTA',
+                        help='Pasta dos arquivos de métricas, um por PDF (padrão: ~/.pdf_etl_app/metrics)')
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    results = run_batch(args.entradas, args.saida, format_type=args.formato, workers=args.workers,
+                        consolidated_path=args.consolidado, include_header=args.include_header,
+                        method=args.method, use_cache=args.use_cache, compression=args.compressao,
+                        db_path=args.banco, metrics_dir=args.metrics_dir)
+    # Código de saída diferente de zero se algum PDF falhou
+    return 0 if results and all(result['status'] == 'ok' for result in results) else 1
+
+if __name__ == '__main__':
+    multiprocessing.freeze_support()
+    sys.exit(main())
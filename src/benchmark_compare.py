@@ -0,0 +1,174 @@
+import argparse
+import json
+import os
+import sys
+
+# Adicionar o diretório atual ao caminho de busca do Python
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+# Importar os módulos do projeto
+from benchmark_scaling import (DEFAULT_METHODS, DEFAULT_SIZES, SLOW_METHODS_MAX_PAGES, STAGE_ORDER, benchmark_scaling,
+                               code_version)
+from metrics import write_metrics
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                'benchmarks', 'baseline.json')
+
+# Uma etapa é uma regressão se ficar mais de 30% mais lenta que a base...
+DEFAULT_TOLERANCE = 0.30
+# ...e a diferença passar do ruído de medição de etapas muito curtas (segundos)
+DEFAULT_MIN_SECONDS = 0.1
+
+# Entradas fixas da base gerada com --atualizar-base: as mesmas que o benchmark_scaling mede por padrão
+BASELINE_SIZES = DEFAULT_SIZES
+BASELINE_METHODS = DEFAULT_METHODS
+BASELINE_MAX_SLOW_PAGES = SLOW_METHODS_MAX_PAGES
+BASELINE_REPEAT = 3
+
+# Resultados que devem ser idênticos aos da base, além dos tempos
+CHECKED_RESULTS = ['tabelas', 'linhas']
+
+def load_report(path):
+    """Lê um relatório de escala (ou a base) gravado em JSON"""
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+def machine_factor(baseline, current):
+    """Quanto a máquina atual é mais lenta que a da base (1.0 se algum relatório não tem calibração)"""
+    if baseline.get('calibracao_s') and current.get('calibracao_s'):
+        return current['calibracao_s'] / baseline['calibracao_s']
+    return 1.0
+
+def compare_reports(baseline, current, tolerance=DEFAULT_TOLERANCE, min_seconds=DEFAULT_MIN_SECONDS):
+    """Compara os tempos e os resultados de um relatório de escala com a base
+
+    Os tempos da base são ajustados pela razão entre os tempos de
+    calibração dos dois relatórios (machine_factor), para que uma base
+    gravada em outra máquina continue comparável. Uma etapa é regressão
+    quando o tempo atual passa do tempo ajustado da base multiplicado por
+    (1 + tolerance) e a diferença passa de min_seconds. Linhas, tabelas e
+    totais do resumo de cada tamanho devem ser iguais aos da base: uma
+    otimização não pode mudar o resultado.
+
+    Returns:
+        (linhas da tabela de tempos, lista de falhas); cada linha da tabela
+        é um dicionário com paginas, etapa, base_s, ajustada_s, atual_s,
+        variacao e situacao
+    """
+    factor = machine_factor(baseline, current)
+    rows = []
+    failures = []
+    current_by_pages = {result['paginas']: result for result in current['tamanhos']}
+    for expected in baseline['tamanhos']:
+        pages = expected['paginas']
+        result = current_by_pages.get(pages)
+        if result is None:
+            failures.append(f"{pages} páginas: tamanho não medido")
+            continue
+
+        for key in CHECKED_RESULTS:
+            if result[key] != expected[key]:
+                failures.append(f"{pages} páginas: {key} {result[key]} (base: {expected[key]})")
+        for key, value in expected['resumo'].items():
+            if result['resumo'].get(key) != value:
+                failures.append(f"{pages} páginas: resumo {key} {result['resumo'].get(key)} (base: {value})")
+
+        stages = [stage for stage in STAGE_ORDER if stage in expected['etapas'] or stage in result['etapas']]
+        stages += sorted((set(expected['etapas']) | set(result['etapas'])) - set(STAGE_ORDER))
+        for stage in stages:
+            base_s = expected['etapas'].get(stage)
+            ajustada_s = base_s * factor if base_s is not None else None
+            atual_s = result['etapas'].get(stage)
+            variacao = None
+            if base_s is None:
+                situacao = 'sem base'
+            elif atual_s is None:
+                situacao = 'não medida'
+                failures.append(f"{pages} páginas: {stage} não medida")
+            else:
+                variacao = atual_s / ajustada_s - 1 if ajustada_s else None
+                if atual_s > ajustada_s * (1 + tolerance) and atual_s - ajustada_s > min_seconds:
+                    situacao = 'LENTA'
+                    failures.append(f"{pages} páginas: {stage} {atual_s:.3f} s (base ajustada: {ajustada_s:.3f} s, "
+                                    f"{variacao:+.0%})")
+                elif atual_s < ajustada_s / (1 + tolerance) and ajustada_s - atual_s > min_seconds:
+                    situacao = 'mais rápida'
+                else:
+                    situacao = 'ok'
+            rows.append({'paginas': pages, 'etapa': stage, 'base_s': base_s, 'ajustada_s': ajustada_s, 'atual_s': atual_s,
+                         'variacao': variacao, 'situacao': situacao})
+    return rows, failures
+
+def _seconds(value):
+    return f"{value:.3f}" if value is not None else '-'
+
+def print_comparison(rows, failures, tolerance=DEFAULT_TOLERANCE, factor=1.0):
+    """Imprime a tabela de tempos por etapa e as falhas encontradas"""
+    print(f"Fator da máquina (calibração atual / base): {factor:.2f}")
+    print(f"\n{'Páginas':>8} {'Etapa':<22} {'Base (s)':>10} {'Ajustada (s)':>13} {'Atual (s)':>10} "
+          f"{'Variação':>9}  Situação")
+    for row in rows:
+        variacao = f"{row['variacao']:+.0%}" if row['variacao'] is not None else '-'
+        print(f"{row['paginas']:>8} {row['etapa']:<22} {_seconds(row['base_s']):>10} {_seconds(row['ajustada_s']):>13} "
+              f"{_seconds(row['atual_s']):>10} {variacao:>9}  {row['situacao']}")
+
+    if failures:
+        print(f"\nFALHA: {len(failures)} problema(s) em relação à base (tolerância de {tolerance:.0%}):")
+        for failure in failures:
+            print(f"  - {failure}")
+    else:
+        print(f"\nOK: tempos dentro da tolerância de {tolerance:.0%} e resultados iguais aos da base")
+
+def run_baseline_benchmark(baseline, benchmark_dir=None):
+    """Mede as etapas nas mesmas entradas sintéticas da base"""
+    return benchmark_scaling([result['paginas'] for result in baseline['tamanhos']],
+                             methods=baseline['metodos'], max_slow_pages=baseline['max_paginas_lentos'],
+                             seed=baseline['semente'], repeat=baseline['repeticoes'], benchmark_dir=benchmark_dir)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Compara o tempo das etapas do ETL com a base gravada')
+    parser.add_argument('--base', default=DEFAULT_BASELINE, help='Arquivo JSON da base '
+                                                                 '(padrão: benchmarks/baseline.json)')
+    parser.add_argument('--tolerancia', type=float, default=DEFAULT_TOLERANCE,
+                        help='Lentidão aceita por etapa, em fração do tempo da base (padrão: 0.30)')
+    parser.add_argument('--min-segundos', type=float, default=DEFAULT_MIN_SECONDS,
+                        help='Diferença mínima, em segundos, para acusar regressão (padrão: 0.1)')
+    parser.add_argument('--atual', default=None,
+                        help='Relatório de escala já medido (benchmark_scaling.py --saida), em vez de medir agora')
+    parser.add_argument('--saida', default=None, help='Grava o relatório medido neste arquivo JSON')
+    parser.add_argument('--pasta', default=None,
+                        help='Pasta dos livros sintéticos (padrão: ~/.pdf_etl_app/benchmark)')
+    parser.add_argument('--atualizar-base', action='store_true',
+                        help='Mede as entradas fixas e grava o resultado como nova base, sem comparar')
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.atualizar_base:
+        version = code_version()
+        if version and version.endswith('-dirty'):
+            # A base deve corresponder a um commit: alterações não gravadas não são identificáveis
+            print(f"ERRO: há alterações não gravadas no código ({version}); faça o commit antes de gravar a base")
+            return 1
+        report = benchmark_scaling(BASELINE_SIZES, BASELINE_METHODS, BASELINE_MAX_SLOW_PAGES,
+                                   repeat=BASELINE_REPEAT, benchmark_dir=args.pasta)
+        write_metrics(report, args.base)
+        print(f"Base gravada em: {args.base}")
+        return 0
+
+    baseline = load_report(args.base)
+    if args.atual:
+        report = load_report(args.atual)
+    else:
+        report = run_baseline_benchmark(baseline, args.pasta)
+        if args.saida:
+            write_metrics(report, args.saida)
+    print(f"\nBase: código {baseline.get('codigo') or '?'} ({baseline.get('gerado_em')}); "
+          f"atual: código {report.get('codigo') or '?'}")
+    rows, failures = compare_reports(baseline, report, args.tolerancia, args.min_segundos)
+    print_comparison(rows, failures, args.tolerancia, machine_factor(baseline, report))
+    # Código de saída diferente de zero se alguma etapa ficou lenta ou algum resultado mudou
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,64 @@
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+
+# Adicionar o diretório atual ao caminho de busca do Python
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+# Importar os módulos do projeto
+from extraction import extract_tables_from_pdf
+
+DEFAULT_PDF = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'Arquivo', '2022.pdf')
+
+def normalize(tables):
+    """Combina as tabelas, normaliza espaços e remove linhas repetidas para comparação"""
+    if not tables:
+        return pd.DataFrame()
+    df = pd.concat(tables, ignore_index=True).astype(str)
+    df = df.apply(lambda col: col.str.split().str.join(' '))
+    return df.drop_duplicates().sort_values(list(df.columns)).reset_index(drop=True)
+
+def benchmark_extraction(pdf_path, methods=('camelot', 'template'), reference='camelot'):
+    """Mede o tempo de cada método de extração e compara os resultados com a referência"""
+    print(f"Benchmark de extração: {pdf_path}")
+    results = {}
+    for method in methods:
+        start = time.perf_counter()
+        tables = extract_tables_from_pdf(pdf_path, method=method, use_cache=False)
+        elapsed = time.perf_counter() - start
+        results[method] = (elapsed, tables)
+
+    print(f"\n{'Método':<12} {'Tempo (s)':>10} {'Tabelas':>8} {'Linhas':>8} {'Notas':>8} {'Aceleração':>11}")
+    reference_time = results[reference][0] if reference in results else None
+    for method, (elapsed, tables) in results.items():
+        rows = sum(len(df) for df in tables)
+        notes = pd.concat(tables).iloc[:, 0].nunique() if tables else 0
+        speedup = f"{reference_time / elapsed:.1f}x" if reference_time else '-'
+        print(f"{method:<12} {elapsed:>10.2f} {len(tables):>8} {rows:>8} {notes:>8} {speedup:>11}")
+
+    if reference in results:
+        expected = normalize(results[reference][1])
+        for method, (_, tables) in results.items():
+            if method == reference:
+                continue
+            obtained = normalize(tables)
+            if list(obtained.columns) == list(expected.columns) and obtained.equals(expected):
+                print(f"\n{method}: mesmas linhas que {reference} (após normalizar espaços e remover repetições)")
+            else:
+                merged = obtained.merge(expected, how='outer', indicator=True)
+                diff = merged[merged['_merge'] != 'both']
+                print(f"\n{method}: {len(diff)} linhas diferentes de {reference}")
+                print(diff.head(10).to_string())
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Compara o tempo dos métodos de extração')
+    parser.add_argument('pdf_path', nargs='?', default=DEFAULT_PDF, help='Arquivo PDF de entrada')
+    parser.add_argument('--metodos', nargs='+', default=['camelot', 'template'],
+                        choices=['auto', 'camelot', 'pdfplumber', 'template'],
+                        help='Métodos a comparar (padrão: camelot template)')
+    args = parser.parse_args()
+    benchmark_extraction(args.pdf_path, args.metodos)
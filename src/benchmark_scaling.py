@@ -0,0 +1,213 @@
+import argparse
+import contextlib
+import io
+import os
+import platform
+import re
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from functools import partial
+
+import pandas as pd
+from openpyxl import Workbook
+
+# Adicionar o diretório atual ao caminho de busca do Python
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+# Importar os módulos do projeto
+from benchmark_transformation import timed
+from extraction import count_pages, extract_tables_from_pdf
+from loading import create_summary_sheet, load_to_excel, summarize_by_competencia
+from loading_csv import load_to_csv
+from metrics import write_metrics
+from synthetic_livro import generate_livro
+from transformation import clean_dataframe
+
+DEFAULT_SIZES = [10, 100, 1000, 5000]
+DEFAULT_METHODS = ['template', 'pdfplumber', 'camelot']
+DEFAULT_BENCHMARK_DIR = os.environ.get(
+    'PDF_ETL_BENCHMARK_DIR', os.path.join(os.path.expanduser('~'), '.pdf_etl_app', 'benchmark'))
+
+# Camelot e PDFPlumber levam cerca de 1 s por página: por padrão, só nos livros menores
+SLOW_METHODS_MAX_PAGES = 100
+
+# As etapas seguintes à extração usam as tabelas do modelo do livro
+DOWNSTREAM_METHOD = 'template'
+
+# Versão do formato do relatório de escala
+REPORT_VERSION = 1
+
+STAGE_ORDER = ['extracao_template', 'extracao_pdfplumber', 'extracao_camelot', 'extracao_auto',
+               'clean_dataframe', 'load_to_excel', 'load_to_csv', 'create_summary_sheet']
+
+def synthetic_pdf(pages, benchmark_dir=None, seed=0):
+    """Caminho do livro sintético com pages páginas, gerado na primeira vez que é pedido"""
+    pdf_path = os.path.join(benchmark_dir or DEFAULT_BENCHMARK_DIR, f"livro-{pages}p-s{seed}.pdf")
+    if not os.path.exists(pdf_path):
+        print(f"Gerando livro sintético de {pages} páginas: {pdf_path}")
+        generate_livro(pdf_path, pages, seed)
+    return pdf_path
+
+def quiet(func, *args, **kwargs):
+    """Executa func sem as mensagens de progresso do ETL"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        return func(*args, **kwargs)
+
+def timed_quiet(func, *args, repeat=1, **kwargs):
+    """Como timed, mas sem as mensagens de progresso do ETL"""
+    return timed(partial(quiet, func, *args, **kwargs), repeat=repeat)
+
+def summary_totals(df):
+    """Totais da aba Resumo (somados sobre as competências), para conferir a saída"""
+    summary = summarize_by_competencia(df)
+    columns = ['nfs_emitidas', 'nfs_canceladas', 'nfs_validas', 'bc_tributavel', 'iss_proprio', 'iss_retido']
+    totals = {column: int(summary[column].sum()) for column in columns}
+    totals['competencias'] = len(summary)
+    return totals
+
+def benchmark_size(pdf_path, methods=DEFAULT_METHODS, max_slow_pages=SLOW_METHODS_MAX_PAGES, repeat=1,
+                   output_dir=None):
+    """Mede cada etapa do ETL sobre um PDF
+
+    Returns:
+        Dicionário com páginas, tabelas, linhas, totais do resumo e o tempo
+        (em segundos, o menor de repeat execuções) de cada etapa
+    """
+    pages = count_pages(pdf_path)
+    stages = {}
+    tables = None
+    for method in dict.fromkeys([DOWNSTREAM_METHOD] + list(methods)):
+        if method != DOWNSTREAM_METHOD and pages > max_slow_pages:
+            continue
+        elapsed, result = timed_quiet(extract_tables_from_pdf, pdf_path, method=method, use_cache=False,
+                                      repeat=repeat)
+        if method in methods:
+            stages[f"extracao_{method}"] = elapsed
+        if method == DOWNSTREAM_METHOD:
+            tables = result
+
+    stages['clean_dataframe'], cleaned = timed_quiet(lambda: [clean_dataframe(df) for df in tables], repeat=repeat)
+    df = pd.concat(cleaned, ignore_index=True)
+
+    with tempfile.TemporaryDirectory(dir=output_dir) as tmp_dir:
+        stages['load_to_excel'], _ = timed_quiet(load_to_excel, df, os.path.join(tmp_dir, 'saida.xlsx'),
+                                                 repeat=repeat)
+        stages['load_to_csv'], _ = timed_quiet(load_to_csv, df, os.path.join(tmp_dir, 'saida.csv'), repeat=repeat)
+    stages['create_summary_sheet'], _ = timed_quiet(create_summary_sheet, Workbook(), df, repeat=repeat)
+
+    return {
+        'paginas': pages,
+        'tamanho_pdf_bytes': os.path.getsize(pdf_path),
+        'tabelas': len(tables),
+        'linhas': len(df),
+        'resumo': summary_totals(df),
+        'etapas': {stage: round(seconds, 4) for stage, seconds in stages.items()},
+    }
+
+def calibration_workload():
+    """Carga fixa em Python puro (expressões regulares e ordenação) que mede a velocidade da máquina"""
+    values = [f"{i * 7919 % 100000:05d}/{i % 12 + 1:02d}/2022 ESTAB. DO {i}" for i in range(100_000)]
+    pattern = re.compile(r'(\d{2})/(\d{4})')
+    return sorted(pattern.search(value).group(1) for value in values)
+
+def calibrate(repeat=3):
+    """Tempo da carga de calibração (s); a razão entre duas máquinas ajusta a comparação com a base"""
+    return timed(calibration_workload, repeat=repeat)[0]
+
+def code_version():
+    """Commit do código medido (git describe), ou None fora de um repositório"""
+    try:
+        result = subprocess.run(['git', 'describe', '--always', '--dirty'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)), timeout=10)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return result.stdout.strip() or None
+
+def benchmark_scaling(sizes=DEFAULT_SIZES, methods=DEFAULT_METHODS, max_slow_pages=SLOW_METHODS_MAX_PAGES,
+                      seed=0, repeat=1, benchmark_dir=None):
+    """Mede as etapas do ETL em livros sintéticos de tamanhos crescentes
+
+    Returns:
+        Relatório de escala (dicionário serializável em JSON)
+    """
+    calibration = calibrate()
+    results = []
+    for pages in sizes:
+        pdf_path = synthetic_pdf(pages, benchmark_dir, seed)
+        print(f"Medindo {pages} páginas...")
+        results.append(benchmark_size(pdf_path, methods, max_slow_pages, repeat, output_dir=benchmark_dir))
+    # Calibrar antes e depois das medições: vale o menor tempo
+    calibration = min(calibration, calibrate())
+    return {
+        'versao': REPORT_VERSION,
+        'codigo': code_version(),
+        'gerado_em': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'plataforma': platform.platform(),
+        'cpus': os.cpu_count(),
+        'calibracao_s': round(calibration, 4),
+        'semente': seed,
+        'metodos': list(methods),
+        'max_paginas_lentos': max_slow_pages,
+        'repeticoes': repeat,
+        'tamanhos': results,
+    }
+
+def report_stages(report):
+    """Etapas medidas em algum tamanho, na ordem do ETL"""
+    measured = {stage for result in report['tamanhos'] for stage in result['etapas']}
+    return [stage for stage in STAGE_ORDER if stage in measured] + sorted(measured - set(STAGE_ORDER))
+
+def print_scaling_report(report):
+    """Imprime o tempo de cada etapa por tamanho e o tempo por página (constante se a escala for linear)"""
+    results = report['tamanhos']
+    stages = report_stages(report)
+    header = ''.join(f"{str(result['paginas']) + ' pág.':>12}" for result in results)
+
+    print(f"\nTempo por etapa (s) - código {report.get('codigo') or '?'}")
+    print(f"{'Etapa':<22}{header}")
+    for stage in stages:
+        cells = ''.join(f"{result['etapas'][stage]:>12.3f}" if stage in result['etapas'] else f"{'-':>12}"
+                        for result in results)
+        print(f"{stage:<22}{cells}")
+
+    print("\nTempo por página (ms)")
+    print(f"{'Etapa':<22}{header}")
+    for stage in stages:
+        cells = ''.join(f"{1000 * result['etapas'][stage] / result['paginas']:>12.2f}"
+                        if stage in result['etapas'] else f"{'-':>12}" for result in results)
+        print(f"{stage:<22}{cells}")
+
+    print(f"\n{'Linhas':<22}" + ''.join(f"{result['linhas']:>12}" for result in results))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Mede a escala das etapas do ETL em livros sintéticos')
+    parser.add_argument('--paginas', type=int, nargs='+', default=DEFAULT_SIZES,
+                        help='Tamanhos dos livros, em páginas (padrão: 10 100 1000 5000)')
+    parser.add_argument('--metodos', nargs='+', default=DEFAULT_METHODS,
+                        choices=['auto', 'camelot', 'pdfplumber', 'template'],
+                        help='Métodos de extração medidos (padrão: template pdfplumber camelot)')
+    parser.add_argument('--max-paginas-lentos', type=int, default=SLOW_METHODS_MAX_PAGES,
+                        help='Maior livro medido com os métodos além do modelo '
+                             f'(padrão: {SLOW_METHODS_MAX_PAGES})')
+    parser.add_argument('--repeticoes', type=int, default=1,
+                        help='Execuções de cada etapa; vale o menor tempo (padrão: 1)')
+    parser.add_argument('--semente', type=int, default=0, help='Semente dos livros sintéticos (padrão: 0)')
+    parser.add_argument('--pasta', default=None,
+                        help='Pasta dos livros sintéticos (padrão: ~/.pdf_etl_app/benchmark)')
+    parser.add_argument('--saida', default=None,
+                        help='Arquivo JSON do relatório (padrão: <pasta>/escala-AAAAMMDD-HHMMSS.json)')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    report = benchmark_scaling(args.paginas, args.metodos, args.max_paginas_lentos, args.semente,
+                               args.repeticoes, args.pasta)
+    print_scaling_report(report)
+    output_path = args.saida or os.path.join(args.pasta or DEFAULT_BENCHMARK_DIR,
+                                             f"escala-{datetime.now():%Y%m%d-%H%M%S}.json")
+    write_metrics(report, output_path)
+    print(f"\nRelatório gravado em: {output_path} ({time.perf_counter() - start:.1f} s)")
@@ -0,0 +1,92 @@
+import argparse
+import os
+import re
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+# Adicionar o diretório atual ao caminho de busca do Python
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+# Importar os módulos do projeto
+from transformation import clean_dataframe, extract_dates, format_emission_dates
+
+def sample_dates(n_rows, seed=0):
+    """Gera datas de emissão como chegam da extração, com alguns valores inválidos"""
+    rng = np.random.default_rng(seed)
+    days = rng.integers(1, 29, n_rows)
+    months = rng.integers(1, 13, n_rows)
+    dates = pd.Series([f"{d:02d}/{m:02d}/2022" for d, m in zip(days, months)])
+    # Algumas células com texto junto da data ou sem data, como em páginas mal lidas
+    dates[::50] = 'ESTAB. DO ' + dates[::50]
+    dates[::97] = ''
+    return dates
+
+def row_by_row_dates(values):
+    """Versão linha a linha da extração de datas, usada como referência"""
+    values = values.astype(str).str.strip()
+    return values.apply(lambda x: re.search(r'(\d{2}/\d{2}/\d{4})', x).group(1) if re.search(r'(\d{2}/\d{2}/\d{4})', x) else '')
+
+def row_by_row_emission_dates(dates):
+    """Versão linha a linha da formatação das datas e da competência, usada como referência"""
+    formatted_dates = []
+    competencia_values = []
+    for date_str in dates:
+        clean_date = str(date_str).replace('.0', '').strip()
+        date_match = re.search(r'(\d{2})/(\d{2})/(\d{4})', clean_date)
+        prefix = ''
+        if not date_match:
+            date_match = re.search(r'(\d{2})(\d{2})(\d{4})', clean_date)
+        if not date_match:
+            date_match = re.search(r'(\d{1})(\d{2})(\d{4})', clean_date)
+            prefix = '0'
+        if date_match:
+            dia, mes, ano = date_match.groups()
+            formatted_dates.append(f"{prefix}{dia}/{mes}/{ano}")
+            competencia_values.append(f"{mes}/{ano}")
+        else:
+            formatted_dates.append(date_str)
+            competencia_values.append('')
+    return formatted_dates, competencia_values
+
+def timed(func, *args, repeat=3):
+    """Retorna (menor tempo em segundos, resultado) de repeat execuções"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+def benchmark_transformation(n_rows=200_000):
+    """Compara a limpeza de datas e a competência vetorizadas com a versão linha a linha"""
+    dates = sample_dates(n_rows)
+    # Datas lidas como número (ex.: 3012022.0), o caso mais caro da formatação
+    numeric = pd.Series(pd.to_numeric(dates.str.replace(r'[^\d]', '', regex=True).replace('', '0')), dtype=float)
+
+    print(f"Benchmark da transformação: {n_rows} linhas\n")
+    print(f"{'Etapa':<28} {'Linha a linha (s)':>18} {'Vetorizado (s)':>15} {'Aceleração':>11}")
+
+    old_time, expected = timed(row_by_row_dates, dates)
+    new_time, obtained = timed(extract_dates, dates)
+    assert obtained.tolist() == expected.tolist(), "datas extraídas diferentes"
+    print(f"{'Extração de datas':<28} {old_time:>18.3f} {new_time:>15.3f} {old_time / new_time:>10.1f}x")
+
+    old_time, expected = timed(row_by_row_emission_dates, numeric)
+    new_time, (formatted, competencias) = timed(format_emission_dates, numeric)
+    assert formatted.tolist() == expected[0] and competencias.tolist() == expected[1], "competências diferentes"
+    print(f"{'Datas de emissão e competência':<28} {old_time:>18.3f} {new_time:>15.3f} {old_time / new_time:>10.1f}x")
+
+    df = pd.DataFrame({'N° Nota': [f"2022000000{i:05d}" for i in range(n_rows)], 'Dt,. Emissão': dates,
+                       'Base de Cálculo': '1.500,00', 'Situação': 'ESCRITURADA'})
+    total, _ = timed(clean_dataframe, df, repeat=1)
+    print(f"\nclean_dataframe completo: {total:.3f} s")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Mede o tempo da limpeza de datas e competências')
+    parser.add_argument('--linhas', type=int, default=200_000, help='Número de linhas (padrão: 200000)')
+    args = parser.parse_args()
+    benchmark_transformation(args.linhas)
@@ -1,14 +1,13 @@
 import os
 import sys
-import pandas as pd
 
 # Adicionar o diretório src ao caminho de busca do Python
 src_path = os.path.dirname(os.path.abspath(__file__))
 sys.path.append(src_path)
 
 # Importar os módulos do projeto
-from extraction import extract_tables_from_pdf
-from transformation import clean_dataframe
+from pipeline import Pipeline
+from transformation import money_centavos
 
 def diagnosticar_competencias(pdf_path, competencias_alvo=['07/2022', '08/2022', '10/2022']):
     """Analisa detalhadamente as competências específicas para identificar problemas"""
@@ -20,27 +19,12 @@ def diagnosticar_competencias(pdf_path, competencias_alvo=['07/2022', '08/2022',
         return False
     
     try:
-        # Extração
-        print("\n1. EXTRAÇÃO")
-        print("Extraindo tabelas do PDF...")
-        tables = extract_tables_from_pdf(pdf_path)
-        print(f"Extraídas {len(tables)} tabelas")
-        
-        if not tables:
-            print("ERRO: Nenhuma tabela encontrada no PDF")
+        # Extração (apenas as páginas das competências alvo), transformação e combinação
+        pipeline = Pipeline(pdf_path)
+        combined_df = pipeline.process(competencias=competencias_alvo)
+        if combined_df is None:
             return False
         
-        # Transformação
-        print("\n2. TRANSFORMAÇÃO")
-        print("Limpando e transformando dados...")
-        cleaned_tables = [clean_dataframe(df) for df in tables]
-        print(f"Transformadas {len(cleaned_tables)} tabelas")
-        
-        # Combinar todas as tabelas em uma única
-        print("\nCombinando todas as tabelas...")
-        combined_df = pd.concat(cleaned_tables, ignore_index=True)
-        print(f"Tabela combinada: {len(combined_df)} linhas, {len(combined_df.columns)} colunas")
-        
         # Analisar cada competência alvo
         for competencia in competencias_alvo:
             print(f"\n{'='*80}")
@@ -79,11 +63,8 @@ def diagnosticar_competencias(pdf_path, competencias_alvo=['07/2022', '08/2022',
             # Base de cálculo
             if 'base de cálculo' in comp_data.columns:
                 print(f"\nBase de Cálculo:")
-                # Converter para numérico
-                comp_data['base_calc_num'] = pd.to_numeric(
-                    comp_data['base de cálculo'].astype(str).str.replace(',', '.').str.replace('R$', '').str.strip(), 
-                    errors='coerce'
-                )
+                # Converter para reais (a coluna vem em centavos)
+                comp_data['base_calc_num'] = money_centavos(comp_data['base de cálculo']) / 100
                 
                 # Estatísticas gerais
                 print(f"  Soma total: {comp_data['base_calc_num'].sum():.2f}")
@@ -108,11 +89,8 @@ def diagnosticar_competencias(pdf_path, competencias_alvo=['07/2022', '08/2022',
             # ISS Próprio
             if 'iss próprio' in comp_data.columns:
                 print(f"\nISS Próprio:")
-                # Converter para numérico
-                comp_data['iss_proprio_num'] = pd.to_numeric(
-                    comp_data['iss próprio'].astype(str).str.replace(',', '.').str.replace('R$', '').str.strip(), 
-                    errors='coerce'
-                )
+                # Converter para reais (a coluna vem em centavos)
+                comp_data['iss_proprio_num'] = money_centavos(comp_data['iss próprio']) / 100
                 
                 # Estatísticas gerais
                 print(f"  Soma total: {comp_data['iss_proprio_num'].sum():.2f}")
@@ -129,11 +107,8 @@ def diagnosticar_competencias(pdf_path, competencias_alvo=['07/2022', '08/2022',
             # ISS Retido
             if 'iss retido' in comp_data.columns:
                 print(f"\nISS Retido:")
-                # Converter para numérico
-                comp_data['iss_retido_num'] = pd.to_numeric(
-                    comp_data['iss retido'].astype(str).str.replace(',', '.').str.replace('R$', '').str.strip(), 
-                    errors='coerce'
-                )
+                # Converter para reais (a coluna vem em centavos)
+                comp_data['iss_retido_num'] = money_centavos(comp_data['iss retido']) / 100
                 
                 # Estatísticas gerais
                 print(f"  Soma total: {comp_data['iss_retido_num'].sum():.2f}")
@@ -175,6 +150,7 @@ def diagnosticar_competencias(pdf_path, competencias_alvo=['07/2022', '08/2022',
             colunas_exemplo = [col for col in ['competência', 'situação', 'base de cálculo', 'iss próprio', 'iss retido'] if col in comp_data.columns]
             print(comp_data[colunas_exemplo].head())
         
+        pipeline.print_report()
         return True
             
     except Exception as e:
@@ -1,70 +1,424 @@
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from itertools import repeat
+
 import camelot
 import pdfplumber
 import pandas as pd
 
-def extract_tables_from_pdf(pdf_path, method='auto'):
+# Adicionar o diretório atual ao caminho de busca do Python
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from extraction_cache import open_cache
+from extraction_checkpoint import CHECKPOINT_PAGES, open_checkpoint
+from page_index import iter_page_texts, load_page_index, pages_for_competencias
+import template_extraction
+
+# Padrões dos campos de uma linha de serviço
+NOTE_NUMBER_RE = re.compile(r'(2022000000\d+)')
+DATE_RE = re.compile(r'(\d{2}/\d{2}/\d{4})')
+CPF_CNPJ_RE = re.compile(r'(\d{2}\.\d{3}\.\d{3}/\d{4}-\d{2}|\d{3}\.\d{3}\.\d{3}-\d{2})')
+MONEY_RE = re.compile(r'(\d+\.\d+,\d{2})')
+
+# Atributo (DataFrame.attrs) com o motor que produziu cada tabela: camelot,
+# pdfplumber, template, ou cache/checkpoint quando a tabela foi reaproveitada
+METHOD_ATTR = 'metodo'
+
+def extract_tables_from_pdf(pdf_path, method='auto', workers=1, use_cache=True, refresh_cache=False,
+                            prefilter=True, checkpoint_dir=None, resume=False, pages=None,
+                            competencias=None, with_pages=False, on_prefilter=None):
     """Extrai tabelas de um arquivo PDF e retorna lista de DataFrames
 
     Args:
         pdf_path: Caminho para o arquivo PDF
-        method: Método de extração ('auto', 'camelot' ou 'pdfplumber')
+        method: Método de extração ('auto', 'camelot', 'pdfplumber' ou
+            'template'). No modo 'auto' o PDFPlumber é usado apenas nas páginas
+            em que o Camelot não encontrou notas; 'template' lê as colunas
+            fixas do livro diretamente, sem detecção de tabelas
+        workers: Número de processos para extração paralela por intervalos de
+            páginas (1 = extração sequencial)
+        use_cache: Se True, reutiliza extrações anteriores do mesmo PDF
+        refresh_cache: Se True, refaz a extração e substitui a entrada do cache
+        prefilter: Se True, lê antes a camada de texto do PDF e só envia para
+            a detecção de tabelas as páginas com números de nota
+        checkpoint_dir: Pasta de trabalho onde cada intervalo de páginas
+            extraído é gravado assim que termina (None = sem pontos de controle)
+        resume: Se True, reaproveita os intervalos já gravados em checkpoint_dir
+            por uma extração interrompida do mesmo PDF
+        pages: Lista de páginas a extrair (a partir de 1), ou None para todas
+        competencias: Lista de competências ('MM/AAAA'); se informada, só são
+            extraídas as páginas com notas dessas competências, segundo o
+            índice de páginas do PDF. As páginas extraídas podem conter notas
+            de outras competências, que devem ser filtradas após a limpeza.
+        with_pages: Se True, retorna pares (página, DataFrame) em vez dos
+            DataFrames
+        on_prefilter: Função opcional chamada como on_prefilter(páginas
+            verificadas, páginas ignoradas) depois do pré-filtro (não é
+            chamada quando a extração vem do cache)
     """
     print(f"Tentando extrair tabelas de: {pdf_path}")
     print(f"Método de extração: {method}")
 
     try:
-        # Usar Camelot se o método for 'auto' ou 'camelot'
-        if method in ['auto', 'camelot']:
-            print("Tentando com camelot...")
-            tables = camelot.read_pdf(pdf_path, pages='all', flavor='stream')
-            if len(tables) > 0:
-                print(f"Camelot encontrou {len(tables)} tabelas")
-
-                # Filtrar tabelas relevantes (com dados de serviços)
-                filtered_tables = []
-                for table in tables:
-                    df = table.df
-                    # Verificar se a tabela tem pelo menos 5 linhas e contém dados de serviços
-                    if len(df) >= 5 and df.iloc[:, 0].astype(str).str.contains('2022000000').any():
-                        # Processar a tabela para extrair os dados corretamente
-                        processed_df = process_service_table(df)
-                        if not processed_df.empty:
-                            filtered_tables.append(processed_df)
-
-                if filtered_tables:
-                    print(f"Encontradas {len(filtered_tables)} tabelas relevantes")
-                    return filtered_tables
-                elif method == 'camelot':
-                    print("Nenhuma tabela relevante encontrada com Camelot")
-                    return []
-
-        # Usar PDFPlumber se o método for 'auto' ou 'pdfplumber'
-        if method in ['auto', 'pdfplumber']:
-            print("Tentando com pdfplumber...")
-            with pdfplumber.open(pdf_path) as pdf:
-                dfs = []
-                for page_num, page in enumerate(pdf.pages, 1):
-                    tables = page.extract_tables()
-                    print(f"Página {page_num}: encontradas {len(tables)} tabelas")
-                    for table in tables:
-                        if table and len(table) > 1:  # verifica se a tabela não está vazia
-                            # Verificar se a tabela contém dados de serviços
-                            table_text = ' '.join([' '.join(str(cell) for cell in row if cell is not None) for row in table])
-                            if '2022000000' in table_text:
-                                # Processar a tabela para extrair os dados corretamente
-                                df = process_pdfplumber_table(table)
-                                if not df.empty:
-                                    dfs.append(df)
-
-                if dfs:
-                    print(f"PDFPlumber encontrou {len(dfs)} tabelas relevantes")
-                    return dfs
+        if competencias is not None:
+            index_pages = pages_for_competencias(load_page_index(pdf_path), competencias)
+            pages = index_pages if pages is None else [page_num for page_num in index_pages if page_num in pages]
+            print(f"Competências {', '.join(competencias)}: {len(pages)} páginas")
+        if pages is not None:
+            pages = sorted(set(pages))
+
+        # O pré-filtro e, na extração parcial, a seleção de páginas fazem parte da chave do cache
+        params = {'prefilter': prefilter} if pages is None else {'prefilter': prefilter, 'pages': pages}
+        cache = open_cache(use_cache)
+        if cache is not None:
+            key = cache.key(pdf_path, method, **params)
+            cached = None if refresh_cache else cache.load(key)
+            if cached is not None:
+                print(f"Usando extração em cache: {len(cached)} tabelas")
+                cached = list(_tag_tables(cached, 'cache'))
+                return cached if with_pages else [df for _, df in cached]
+
+        checkpoint = None
+        if checkpoint_dir:
+            checkpoint = open_checkpoint(pdf_path, method, checkpoint_dir, resume, **params)
+
+        page_tables = _extract_page_tables(pdf_path, method, workers, prefilter, checkpoint, pages, on_prefilter)
+
+        if cache is not None:
+            cache.store(key, page_tables)
+        if checkpoint is not None:
+            checkpoint.discard()
+        return page_tables if with_pages else [df for _, df in page_tables]
+    except Exception as e:
+        print(f"Erro durante a extração: {str(e)}")
+        raise Exception(f"Falha ao extrair tabelas do PDF: {str(e)}")
 
+def _extract_page_tables(pdf_path, method, workers, prefilter=True, checkpoint=None, pages=None, on_prefilter=None):
+    """Extrai as tabelas relevantes do documento (ou das páginas informadas) como lista de (página, DataFrame)"""
+    if prefilter:
+        pages = find_note_pages(pdf_path, pages, on_prefilter)
+    if pages is not None and not pages:
         print("Nenhuma tabela relevante encontrada")
         return []
+
+    extractor = EXTRACTORS[method]
+    # Dividir o documento em intervalos de páginas quando a extração for paralela
+    page_ranges = ['all']
+    if checkpoint is not None:
+        # Intervalos de tamanho fixo, para que a retomada encontre os mesmos intervalos
+        n_pages = len(pages) if pages is not None else count_pages(pdf_path)
+        page_ranges = split_page_ranges(n_pages, pages_per_range=CHECKPOINT_PAGES, pages=pages)
+        extractor = partial(_extract_with_checkpoint, method, checkpoint)
+        if workers > 1:
+            print(f"Extração paralela com {workers} processos em {len(page_ranges)} intervalos de páginas")
+    elif workers > 1:
+        page_ranges = split_page_ranges(count_pages(pdf_path), workers, pages=pages)
+        print(f"Extração paralela com {workers} processos em {len(page_ranges)} intervalos de páginas")
+    elif pages is not None:
+        page_ranges = [_format_page_range(pages)]
+
+    print(f"Extraindo com {method}...")
+    results = _run_page_ranges(extractor, pdf_path, page_ranges, workers)
+    total_tables = sum(n_tables for _, n_tables, _ in results)
+    print(f"Encontradas {total_tables} tabelas")
+
+    # Juntar as tabelas relevantes na ordem das páginas
+    page_tables = [(page_num, df) for page_num, _, dfs in results for df in dfs]
+
+    if page_tables:
+        print(f"Encontradas {len(page_tables)} tabelas relevantes")
+    else:
+        print("Nenhuma tabela relevante encontrada")
+    return page_tables
+
+def iter_tables_from_pdf(pdf_path, method='auto', chunk_size=10, use_cache=True, refresh_cache=False,
+                         prefilter=True, checkpoint_dir=None, resume=False):
+    """Extrai as tabelas do PDF página a página, produzindo um DataFrame por vez
+
+    Processa o documento em blocos de chunk_size páginas, de modo que o uso de
+    memória não depende do tamanho do PDF. Produz as mesmas tabelas, na mesma
+    ordem, que extract_tables_from_pdf.
+
+    Args:
+        pdf_path: Caminho para o arquivo PDF
+        method: Método de extração ('auto', 'camelot', 'pdfplumber' ou 'template')
+        chunk_size: Número de páginas extraídas por bloco (com pontos de
+            controle, os blocos têm CHECKPOINT_PAGES páginas, como na extração
+            sequencial)
+        use_cache: Se True, reutiliza extrações anteriores do mesmo PDF
+        refresh_cache: Se True, refaz a extração e substitui a entrada do cache
+        prefilter: Se True, ignora as páginas sem números de nota na camada de texto
+        checkpoint_dir: Pasta de trabalho onde cada bloco extraído é gravado
+            assim que termina (None = sem pontos de controle)
+        resume: Se True, reaproveita os blocos já gravados em checkpoint_dir,
+            também por uma extração sequencial interrompida do mesmo PDF
+    """
+    for _, df in iter_page_tables(pdf_path, method=method, chunk_size=chunk_size,
+                                  use_cache=use_cache, refresh_cache=refresh_cache,
+                                  prefilter=prefilter, checkpoint_dir=checkpoint_dir, resume=resume):
+        yield df
+
+def iter_page_tables(pdf_path, method='auto', chunk_size=10, use_cache=True, refresh_cache=False,
+                     prefilter=True, checkpoint_dir=None, resume=False, on_prefilter=None):
+    """Igual a iter_tables_from_pdf, mas produz pares (página, DataFrame)
+
+    on_prefilter tem o mesmo papel que em extract_tables_from_pdf.
+    """
+    print(f"Extraindo tabelas de {pdf_path} em blocos de {chunk_size} páginas")
+    print(f"Método de extração: {method}")
+
+    writer = None
+    try:
+        cache = open_cache(use_cache)
+        if cache is not None:
+            key = cache.key(pdf_path, method, prefilter=prefilter)
+            if not refresh_cache and os.path.exists(cache.path(key)):
+                print("Usando extração em cache")
+                yield from _tag_tables(cache.iter_load(key), 'cache')
+                return
+            writer = cache.writer(key)
+
+        checkpoint = None
+        if checkpoint_dir:
+            # Mesma chave e mesmos intervalos da extração sequencial, para que uma
+            # extração interrompida possa ser retomada em qualquer um dos modos
+            checkpoint = open_checkpoint(pdf_path, method, checkpoint_dir, resume, prefilter=prefilter)
+
+        for page_num, df in _iter_page_tables(pdf_path, method, chunk_size, prefilter, checkpoint, on_prefilter):
+            if writer is not None:
+                writer.add(page_num, df)
+            yield page_num, df
+
+        # Só grava a entrada se o documento foi extraído por completo
+        if writer is not None:
+            writer.commit()
+        if checkpoint is not None:
+            checkpoint.discard()
     except Exception as e:
         print(f"Erro durante a extração: {str(e)}")
         raise Exception(f"Falha ao extrair tabelas do PDF: {str(e)}")
+    finally:
+        if writer is not None:
+            writer.close()
+
+def _iter_page_tables(pdf_path, method, chunk_size, prefilter=True, checkpoint=None, on_prefilter=None):
+    pages = find_note_pages(pdf_path, on_prefilter=on_prefilter) if prefilter else None
+    n_pages = len(pages) if pages is not None else count_pages(pdf_path)
+    extractor = EXTRACTORS[method]
+    if checkpoint is not None:
+        extractor = partial(_extract_with_checkpoint, method, checkpoint)
+        chunk_size = CHECKPOINT_PAGES
+    found = False
+    for page_range in split_page_ranges(n_pages, pages_per_range=chunk_size, pages=pages):
+        for page_num, _, dfs in extractor(pdf_path, page_range):
+            for df in dfs:
+                found = True
+                yield page_num, df
+
+    if not found:
+        print("Nenhuma tabela relevante encontrada")
+
+def _tag_tables(page_tables, method):
+    """Marca as tabelas reaproveitadas (cache, ponto de controle) com a sua origem"""
+    for page_num, df in page_tables:
+        df.attrs[METHOD_ATTR] = method
+        yield page_num, df
+
+def count_pages(pdf_path):
+    """Retorna o número de páginas do PDF"""
+    with pdfplumber.open(pdf_path) as pdf:
+        return len(pdf.pages)
+
+def find_note_pages(pdf_path, page_numbers=None, on_prefilter=None):
+    """Pré-filtro: retorna as páginas cuja camada de texto contém números de nota
+
+    Ler o texto de uma página custa muito menos que detectar suas tabelas, então
+    capas, termos de abertura e encerramento e páginas de totais são descartados
+    antes da extração propriamente dita.
+
+    Args:
+        pdf_path: Caminho para o arquivo PDF
+        page_numbers: Páginas a verificar, ou None para todas
+        on_prefilter: Função opcional chamada como on_prefilter(páginas
+            verificadas, páginas ignoradas)
+    """
+    pages = []
+    total = 0
+    for page_num, text in iter_page_texts(pdf_path, page_numbers):
+        total += 1
+        if NOTE_NUMBER_RE.search(text):
+            pages.append(page_num)
+    print(f"Pré-filtro: {total - len(pages)} de {total} páginas sem números de nota foram ignoradas")
+    if on_prefilter is not None:
+        on_prefilter(total, total - len(pages))
+    return pages
+
+def split_page_ranges(n_pages, workers=1, ranges_per_worker=4, pages_per_range=None, pages=None):
+    """Divide as páginas em intervalos contíguos no formato do Camelot ('1-10', '11-20', ...)
+
+    São criados alguns intervalos por processo para equilibrar a carga entre
+    páginas mais e menos densas. Se pages_per_range for informado, os
+    intervalos têm esse tamanho fixo.
+
+    Se pages for informado (lista de páginas em ordem crescente), só essas
+    páginas são distribuídas, e cada intervalo pode juntar trechos separados
+    ('1-3,5-5'). Nesse caso n_pages é ignorado.
+    """
+    if pages is None:
+        pages = list(range(1, n_pages + 1))
+    n_pages = len(pages)
+    if not pages_per_range:
+        n_ranges = max(1, min(n_pages, workers * ranges_per_worker))
+        size, remainder = divmod(n_pages, n_ranges)
+        bounds = [0]
+        for i in range(n_ranges):
+            bounds.append(bounds[-1] + size + (1 if i < remainder else 0))
+    else:
+        bounds = list(range(0, n_pages, pages_per_range)) + [n_pages]
+    return [_format_page_range(pages[start:end]) for start, end in zip(bounds, bounds[1:])]
+
+def _format_page_range(pages):
+    """Converte uma lista crescente de páginas no formato do Camelot ('1-3,5-5')"""
+    spans = []
+    for page_num in pages:
+        if spans and page_num == spans[-1][1] + 1:
+            spans[-1][1] = page_num
+        else:
+            spans.append([page_num, page_num])
+    return ','.join(f"{start}-{end}" for start, end in spans)
+
+def _run_page_ranges(func, pdf_path, page_ranges, workers):
+    """Executa func(pdf_path, intervalo) para cada intervalo e junta os resultados na ordem das páginas"""
+    if workers > 1 and len(page_ranges) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            # map preserva a ordem dos intervalos, mantendo a ordem das páginas
+            chunks = list(executor.map(func, repeat(pdf_path), page_ranges))
+    else:
+        chunks = [func(pdf_path, page_range) for page_range in page_ranges]
+    return [result for chunk in chunks for result in chunk]
+
+def _parse_page_range(page_range):
+    """Converte um intervalo no formato do Camelot ('1-3,5') em lista de números de página"""
+    pages = []
+    for span in page_range.split(','):
+        start, _, end = span.partition('-')
+        pages.extend(range(int(start), int(end or start) + 1))
+    return pages
+
+def _extract_camelot_pages(pdf_path, page_range):
+    """Extrai as tabelas de um intervalo de páginas com o Camelot
+
+    Retorna lista de (página, tabelas encontradas, [DataFrames relevantes]).
+    """
+    tables = camelot.read_pdf(pdf_path, pages=page_range, flavor='stream')
+    results = []
+    for table in tables:
+        df = table.df
+        relevant = []
+        # Verificar se a tabela tem pelo menos 5 linhas e contém dados de serviços
+        if len(df) >= 5 and df.iloc[:, 0].astype(str).str.contains('2022000000').any():
+            # Processar a tabela para extrair os dados corretamente
+            processed_df = process_service_table(df)
+            if not processed_df.empty:
+                processed_df.attrs[METHOD_ATTR] = 'camelot'
+                relevant.append(processed_df)
+        results.append((int(table.page), 1, relevant))
+    return results
+
+def _extract_pdfplumber_pages(pdf_path, page_range):
+    """Extrai as tabelas de um intervalo (ou lista) de páginas com o PDFPlumber
+
+    Retorna lista de (página, tabelas encontradas, [DataFrames relevantes]).
+    """
+    results = []
+    if isinstance(page_range, list):
+        page_numbers = page_range
+    else:
+        page_numbers = None if page_range == 'all' else _parse_page_range(page_range)
+    with pdfplumber.open(pdf_path, pages=page_numbers) as pdf:
+        for page in pdf.pages:
+            tables = page.extract_tables()
+            dfs = []
+            for table in tables:
+                if table and len(table) > 1:  # verifica se a tabela não está vazia
+                    # Verificar se a tabela contém dados de serviços
+                    table_text = ' '.join([' '.join(str(cell) for cell in row if cell is not None) for row in table])
+                    if '2022000000' in table_text:
+                        # Processar a tabela para extrair os dados corretamente
+                        df = process_pdfplumber_table(table)
+                        if not df.empty:
+                            df.attrs[METHOD_ATTR] = 'pdfplumber'
+                            dfs.append(df)
+            results.append((page.page_number, len(tables), dfs))
+            # Liberar o cache de objetos da página já processada
+            page.close()
+    return results
+
+def _extract_auto_pages(pdf_path, page_range):
+    """Extrai um intervalo de páginas escolhendo o motor página a página
+
+    O Camelot é usado em todas as páginas e o PDFPlumber só nas páginas em que
+    o Camelot não encontrou linhas com números de nota, evitando duas passadas
+    completas pelo documento.
+
+    Retorna lista de (página, tabelas encontradas, [DataFrames relevantes]).
+    """
+    results = _extract_camelot_pages(pdf_path, page_range)
+
+    if page_range == 'all':
+        pages = range(1, count_pages(pdf_path) + 1)
+    else:
+        pages = _parse_page_range(page_range)
+    covered = {page_num for page_num, _, dfs in results if dfs}
+    missing = [page_num for page_num in pages if page_num not in covered]
+
+    if missing:
+        print(f"Camelot não encontrou notas em {len(missing)} de {len(pages)} páginas; usando pdfplumber nessas páginas")
+        results.extend(_extract_pdfplumber_pages(pdf_path, missing))
+        # Ordenação estável: mantém a ordem das tabelas dentro de cada página
+        results.sort(key=lambda result: result[0])
+    return results
+
+def _extract_template_pages(pdf_path, page_range):
+    """Extrai um intervalo de páginas com o modelo de colunas fixas do livro
+
+    Páginas com notas lidas antes de haver um cabeçalho de referência são
+    extraídas com o Camelot.
+
+    Retorna lista de (página, tabelas encontradas, [DataFrames relevantes]).
+    """
+    page_numbers = None if page_range == 'all' else _parse_page_range(page_range)
+    results, pending = template_extraction.extract_pages(pdf_path, page_numbers)
+    for _, _, dfs in results:
+        for df in dfs:
+            df.attrs[METHOD_ATTR] = 'template'
+
+    if pending:
+        print(f"Cabeçalho do livro não encontrado para {len(pending)} páginas; usando camelot nessas páginas")
+        results.extend(_extract_camelot_pages(pdf_path, ','.join(str(page_num) for page_num in pending)))
+        results.sort(key=lambda result: result[0])
+    return results
+
+def _extract_with_checkpoint(method, checkpoint, pdf_path, page_range):
+    """Extrai um intervalo de páginas, reaproveitando ou gravando seu ponto de controle"""
+    page_tables = checkpoint.load(page_range)
+    if page_tables is not None:
+        return [(page_num, 1, [df]) for page_num, df in _tag_tables(page_tables, 'checkpoint')]
+
+    results = EXTRACTORS[method](pdf_path, page_range)
+    checkpoint.save(page_range, [(page_num, df) for page_num, _, dfs in results for df in dfs])
+    return results
+
+# Função de extração de cada método, aplicada a um intervalo de páginas
+EXTRACTORS = {
+    'auto': _extract_auto_pages,
+    'camelot': _extract_camelot_pages,
+    'pdfplumber': _extract_pdfplumber_pages,
+    'template': _extract_template_pages,
+}
 
 def process_service_table(df):
     """Processa uma tabela de serviços extraída pelo Camelot"""
@@ -169,14 +523,9 @@ def process_pdfplumber_table(table):
                           'ISS Próprio', 'ISS Retido', 'Nat. da Operação', 'Incidência', 'Situação']
 
                 # Filtrar apenas as linhas que contém dados de serviços
-                data = pd.DataFrame()
-                for row in table:
-                    row_text = ' '.join([str(cell) for cell in row if cell is not None])
-                    if '2022000000' in row_text:
-                        # Processar a linha para extrair os campos
-                        processed_row = process_service_line(row_text)
-                        if processed_row:
-                            data = pd.concat([data, pd.DataFrame([processed_row])], ignore_index=True)
+                row_texts = [' '.join([str(cell) for cell in row if cell is not None]) for row in table]
+                # Processar todas as linhas de uma vez para extrair os campos
+                data = parse_service_lines([text for text in row_texts if '2022000000' in text])
 
                 if not data.empty:
                     # Ajustar o número de colunas se necessário
@@ -197,23 +546,22 @@ def process_service_line(line_text):
     """Processa uma linha de texto para extrair os campos de serviço"""
     try:
         # Extrair o número da nota (começa com 2022000000)
-        import re
-        nota_match = re.search(r'(2022000000\d+)', line_text)
+        nota_match = NOTE_NUMBER_RE.search(line_text)
         if not nota_match:
             return None
 
         nota = nota_match.group(1)
 
         # Extrair a data (formato DD/MM/YYYY)
-        data_match = re.search(r'(\d{2}/\d{2}/\d{4})', line_text)
+        data_match = DATE_RE.search(line_text)
         data = data_match.group(1) if data_match else ''
 
         # Extrair CPF/CNPJ (formato XX.XXX.XXX/XXXX-XX ou XXX.XXX.XXX-XX)
-        cpf_cnpj_match = re.search(r'(\d{2}\.\d{3}\.\d{3}/\d{4}-\d{2}|\d{3}\.\d{3}\.\d{3}-\d{2}|\d{3}\.\d{3}\.\d{3}-\d{2})', line_text)
+        cpf_cnpj_match = CPF_CNPJ_RE.search(line_text)
         cpf_cnpj = cpf_cnpj_match.group(1) if cpf_cnpj_match else ''
 
         # Extrair valores monetários (formato X.XXX,XX)
-        valores = re.findall(r'(\d+\.\d+,\d{2})', line_text)
+        valores = MONEY_RE.findall(line_text)
 
         # Criar um dicionário com os campos extraídos
         row = {
@@ -231,3 +579,30 @@ def process_service_line(line_text):
     except Exception as e:
         print(f"Erro ao processar linha: {str(e)}")
         return None
+
+def parse_service_lines(lines):
+    """Processa várias linhas de texto de uma vez, com o mesmo resultado de process_service_line
+
+    Cada campo é extraído com uma única expressão regular aplicada à coluna
+    inteira, e o DataFrame é montado uma só vez, em tempo linear no número de
+    linhas. Linhas sem número de nota são descartadas.
+    """
+    texts = pd.Series(lines, dtype=object)
+    notas = texts.str.extract(NOTE_NUMBER_RE, expand=False)
+    has_note = notas.notna()
+    if not has_note.any():
+        return pd.DataFrame()
+
+    texts = texts[has_note]
+    valores = texts.str.findall(MONEY_RE)
+    data = pd.DataFrame({
+        'N° Nota': notas[has_note],
+        'Data Emissão': texts.str.extract(DATE_RE, expand=False).fillna(''),
+        'CPF/CNPJ Tomador': texts.str.extract(CPF_CNPJ_RE, expand=False).fillna(''),
+        'Tomador do Serviço': '',  # Difícil extrair com precisão
+        'Valor Serviço': valores.str[0].fillna(''),
+        'Base de Cálculo': valores.str[1].fillna(''),
+        'ISS Próprio': valores.str[3].fillna(''),
+        'ISS Retido': valores.str[4].fillna(''),
+    })
+    return data.reset_index(drop=True)
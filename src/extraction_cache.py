@@ -0,0 +1,185 @@
+import hashlib
+import json
+import os
+import uuid
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - depende do ambiente
+    pa = None
+    pq = None
+
+# Incrementar sempre que a lógica de extração mudar de forma a alterar os resultados
+CACHE_VERSION = 2
+
+DEFAULT_CACHE_DIR = os.environ.get(
+    'PDF_ETL_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.pdf_etl_app', 'cache'))
+DEFAULT_MAX_BYTES = int(os.environ.get('PDF_ETL_CACHE_MAX_MB', '500')) * 1024 * 1024
+
+def file_hash(path, block_size=1024 * 1024):
+    """Calcula o SHA-256 do conteúdo de um arquivo"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def open_cache(use_cache=True, cache_dir=None, max_bytes=None):
+    """Retorna o cache de extração, ou None se desativado ou indisponível"""
+    if not use_cache:
+        return None
+    if pa is None:
+        print("Aviso: pyarrow não está instalado, cache de extração desativado")
+        return None
+    return ExtractionCache(cache_dir or DEFAULT_CACHE_DIR, max_bytes or DEFAULT_MAX_BYTES)
+
+
+class ExtractionCache:
+    """Cache em disco das tabelas extraídas, endereçado pelo conteúdo do PDF
+
+    Cada entrada é um arquivo Parquet com uma linha por linha de tabela e um
+    row group por página, identificado pelo hash do PDF, pelo método e pelos
+    parâmetros de extração. O tamanho total é limitado a max_bytes, removendo
+    as entradas usadas há mais tempo (LRU).
+    """
+
+    SCHEMA = pa.schema([
+        ('pagina', pa.int32()),
+        ('tabela', pa.int32()),
+        ('indice', pa.int64()),
+        ('colunas', pa.string()),
+        ('valores', pa.list_(pa.string())),
+    ]) if pa is not None else None
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def key(self, pdf_path, method, **params):
+        """Gera a chave da entrada a partir do conteúdo do PDF e dos parâmetros"""
+        payload = json.dumps({
+            'pdf': file_hash(pdf_path),
+            'method': method,
+            'params': params,
+            'versao': CACHE_VERSION,
+        }, sort_keys=True)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.parquet")
+
+    def load(self, key):
+        """Retorna a lista de (página, DataFrame) da entrada, ou None se não existir"""
+        if not os.path.exists(self.path(key)):
+            return None
+        return list(self.iter_load(key))
+
+    def iter_load(self, key):
+        """Lê a entrada página a página, produzindo pares (página, DataFrame)"""
+        path = self.path(key)
+        # Marcar a entrada como usada recentemente
+        os.utime(path)
+        parquet_file = pq.ParquetFile(path)
+        for i in range(parquet_file.num_row_groups):
+            rows = parquet_file.read_row_group(i).to_pydict()
+            start = 0
+            for end in range(1, len(rows['tabela']) + 1):
+                if end == len(rows['tabela']) or rows['tabela'][end] != rows['tabela'][start]:
+                    df = pd.DataFrame(rows['valores'][start:end],
+                                      columns=json.loads(rows['colunas'][start]),
+                                      index=rows['indice'][start:end])
+                    yield rows['pagina'][start], df
+                    start = end
+
+    def writer(self, key):
+        """Abre um CacheWriter para gravar uma nova entrada"""
+        return CacheWriter(self, key)
+
+    def store(self, key, page_tables):
+        """Grava uma lista de (página, DataFrame) como entrada do cache"""
+        with self.writer(key) as writer:
+            for page_num, df in page_tables:
+                writer.add(page_num, df)
+            writer.commit()
+
+    def evict(self, keep=None):
+        """Remove as entradas menos usadas até o cache caber em max_bytes"""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith('.parquet'):
+                path = os.path.join(self.cache_dir, name)
+                stat = os.stat(path)
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            os.remove(path)
+            total -= size
+
+
+class CacheWriter:
+    """Grava uma entrada do cache página a página
+
+    A entrada só passa a existir após commit(); se o escritor for fechado antes
+    disso (erro ou extração interrompida), o arquivo parcial é descartado.
+    """
+
+    def __init__(self, cache, key):
+        self.cache = cache
+        self.key = key
+        self.tmp_path = cache.path(key) + f".{uuid.uuid4().hex}.tmp"
+        self._writer = pq.ParquetWriter(self.tmp_path, ExtractionCache.SCHEMA, compression='zstd')
+        self._tables = 0
+        self._page = None
+        self._batch = None
+
+    def add(self, page_num, df):
+        """Acrescenta uma tabela da página page_num"""
+        if page_num != self._page:
+            self._flush()
+            self._page = page_num
+            self._batch = {name: [] for name in ExtractionCache.SCHEMA.names}
+
+        columns = json.dumps([None if pd.isna(col) else str(col) for col in df.columns])
+        values = df.astype(object).where(df.notna(), None).values.tolist()
+        self._batch['pagina'].extend([page_num] * len(df))
+        self._batch['tabela'].extend([self._tables] * len(df))
+        self._batch['indice'].extend(int(i) for i in df.index)
+        self._batch['colunas'].extend([columns] * len(df))
+        self._batch['valores'].extend([[None if v is None else str(v) for v in row] for row in values])
+        self._tables += 1
+
+    def _flush(self):
+        # Cada página vira um row group, permitindo a leitura página a página
+        if self._batch and self._batch['pagina']:
+            self._writer.write_table(pa.table(self._batch, schema=ExtractionCache.SCHEMA))
+        self._batch = None
+
+    def commit(self):
+        """Conclui a entrada e aplica o limite de tamanho do cache"""
+        self._flush()
+        self._writer.close()
+        self._writer = None
+        path = self.cache.path(self.key)
+        os.replace(self.tmp_path, path)
+        self.cache.evict(keep=path)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+            os.remove(self.tmp_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
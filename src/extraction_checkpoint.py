@@ -0,0 +1,77 @@
+import hashlib
+import json
+import os
+import shutil
+import sys
+
+# Adicionar o diretório atual ao caminho de busca do Python
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from extraction_cache import CACHE_VERSION, ExtractionCache, file_hash, pa
+
+DEFAULT_CHECKPOINT_DIR = os.environ.get(
+    'PDF_ETL_CHECKPOINT_DIR', os.path.join(os.path.expanduser('~'), '.pdf_etl_app', 'checkpoints'))
+
+# Número de páginas de cada ponto de controle
+CHECKPOINT_PAGES = 10
+
+def open_checkpoint(pdf_path, method, checkpoint_dir=None, resume=False, **params):
+    """Abre os pontos de controle da extração do PDF, ou None se indisponível
+
+    Os pontos de controle de uma extração ficam numa subpasta identificada pelo
+    conteúdo do PDF, pelo método e pelos parâmetros. Sem resume, pontos de
+    controle anteriores da mesma extração são descartados.
+    """
+    if pa is None:
+        print("Aviso: pyarrow não está instalado, pontos de controle desativados")
+        return None
+
+    payload = json.dumps({
+        'pdf': file_hash(pdf_path),
+        'method': method,
+        'params': params,
+        'versao': CACHE_VERSION,
+    }, sort_keys=True)
+    run_key = hashlib.sha256(payload.encode('utf-8')).hexdigest()
+    work_dir = os.path.join(checkpoint_dir or DEFAULT_CHECKPOINT_DIR, run_key)
+
+    if not resume and os.path.isdir(work_dir):
+        shutil.rmtree(work_dir)
+    checkpoint = ExtractionCheckpoint(work_dir)
+    if resume:
+        print(f"Retomando extração: {checkpoint.completed()} intervalos de páginas já extraídos")
+    return checkpoint
+
+
+class ExtractionCheckpoint:
+    """Pontos de controle de uma extração, um por intervalo de páginas concluído
+
+    Cada intervalo é gravado como uma entrada no formato do cache de extração
+    assim que termina; uma extração interrompida pode ser retomada reaproveitando
+    os intervalos já gravados. Só contém dados de caminhos e pode ser enviado a
+    outros processos.
+    """
+
+    def __init__(self, work_dir):
+        self.work_dir = work_dir
+        # Sem limite de tamanho: os pontos de controle são removidos ao final da extração
+        self._store = ExtractionCache(work_dir, max_bytes=float('inf'))
+
+    def _key(self, page_range):
+        return f"paginas_{page_range}"
+
+    def load(self, page_range):
+        """Retorna a lista de (página, DataFrame) do intervalo, ou None se não foi concluído"""
+        return self._store.load(self._key(page_range))
+
+    def save(self, page_range, page_tables):
+        """Grava as tabelas de um intervalo concluído"""
+        self._store.store(self._key(page_range), page_tables)
+
+    def completed(self):
+        """Número de intervalos já gravados"""
+        return sum(1 for name in os.listdir(self.work_dir) if name.endswith('.parquet'))
+
+    def discard(self):
+        """Remove os pontos de controle depois que a extração terminou"""
+        shutil.rmtree(self.work_dir, ignore_errors=True)
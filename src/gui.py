@@ -8,16 +8,55 @@ import PySimpleGUI as sg
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 # Importar os módulos do projeto
-from extraction import extract_tables_from_pdf
-from transformation import clean_dataframe
-from loading import load_to_excel
-from loading_csv import load_to_csv
+from extraction_checkpoint import DEFAULT_CHECKPOINT_DIR
+from pipeline import Pipeline
+
+# Extensões aceitas para a saída CSV (compactada ou não)
+CSV_EXTENSIONS = ('.csv', '.csv.gz', '.csv.zst', '.csv.zstd')
+
+def replace_extension(path, extension):
+    """Troca a extensão do arquivo de saída, tratando .csv.gz e .csv.zst como uma só"""
+    for suffix in CSV_EXTENSIONS[1:]:
+        if path.lower().endswith(suffix):
+            return path[:-len(suffix)] + extension
+    return os.path.splitext(path)[0] + extension
+
+class StatusHook:
+    """Gancho do pipeline que mostra na interface o início de cada etapa"""
+
+    MESSAGES = {
+        'extracao': ('Extraindo tabelas do PDF...', 25),
+        'transformacao': ('Limpando e transformando dados...', 50),
+        'combinacao': ('Combinando todas as tabelas...', 60),
+        'carregamento': ('Salvando o arquivo de saída...', 75),
+    }
+
+    def __init__(self, window):
+        self.window = window
+        self._started = set()
+
+    def stage_started(self, name):
+        # No modo streaming as etapas se repetem a cada tabela: avisar só a primeira vez
+        if name in self._started or name not in self.MESSAGES:
+            return
+        self._started.add(name)
+        status, progress = self.MESSAGES[name]
+        self.window.write_event_value('-UPDATE-', {'status': status, 'progress': progress})
+
+    def stage_finished(self, name, stats):
+        pass
+
 
 def process_etl(pdf_path, output_path, window, values):
     """Processa o ETL em uma thread separada e atualiza a interface"""
     try:
         # Obter opções de processamento
-        format_type = 'csv' if values['format_csv'] else 'excel'
+        if values['format_csv']:
+            format_type = 'csv'
+        elif values['format_parquet']:
+            format_type = 'parquet'
+        else:
+            format_type = 'excel'
         include_header = values['include_header']
         apply_formatting = values['apply_formatting']
 
@@ -27,17 +66,8 @@ def process_etl(pdf_path, output_path, window, values):
             extraction_method = 'camelot'
         elif values['pdfplumber_extract']:
             extraction_method = 'pdfplumber'
-
-        # Etapa 1: Extração
-        window.write_event_value('-UPDATE-', {'status': 'Extraindo tabelas do PDF...', 'progress': 25})
-        tables = extract_tables_from_pdf(pdf_path, method=extraction_method)
-
-        if not tables:
-            window.write_event_value('-ERROR-', 'Nenhuma tabela encontrada no PDF.')
-            return
-
-        # Etapa 2: Transformação
-        window.write_event_value('-UPDATE-', {'status': 'Limpando e transformando dados...', 'progress': 50})
+        elif values['template_extract']:
+            extraction_method = 'template'
 
         # Aplicar opções de transformação
         transform_options = {
@@ -47,25 +77,19 @@ def process_etl(pdf_path, output_path, window, values):
             'convert_money': values['convert_money']
         }
 
-        cleaned = [clean_dataframe(df, **transform_options) for df in tables]
+        def report_page(page_num, rows):
+            window.write_event_value('-UPDATE-', {'status': f'Página {page_num}: {rows} linhas processadas...', 'progress': 50})
 
-        if not cleaned:
-            window.write_event_value('-ERROR-', 'Erro ao transformar os dados.')
+        pipeline = Pipeline(pdf_path, method=extraction_method, workers=int(values['workers']),
+                            use_cache=values['use_cache'], refresh_cache=values['refresh_cache'],
+                            checkpoint_dir=DEFAULT_CHECKPOINT_DIR if values['resume'] else None, resume=values['resume'],
+                            transform_options=transform_options, hooks=[StatusHook(window)])
+        rows = pipeline.run(output_path, format_type=format_type, include_header=include_header,
+                            streaming=values['streaming'], progress=report_page)
+        if not rows:
+            window.write_event_value('-ERROR-', 'Nenhuma tabela encontrada no PDF.')
             return
 
-        # Combinar todas as tabelas em uma única
-        window.write_event_value('-UPDATE-', {'status': 'Combinando todas as tabelas...', 'progress': 60})
-        import pandas as pd
-        combined_df = pd.concat(cleaned, ignore_index=True)
-
-        # Etapa 3: Carregamento
-        if format_type == 'csv':
-            window.write_event_value('-UPDATE-', {'status': 'Salvando no CSV...', 'progress': 75})
-            load_to_csv(combined_df, output_path, include_header=include_header)
-        else:  # Excel é o padrão
-            window.write_event_value('-UPDATE-', {'status': 'Salvando no Excel...', 'progress': 75})
-            load_to_excel(combined_df, output_path)
-
         # Concluído
         window.write_event_value('-UPDATE-', {'status': 'Processamento concluído!', 'progress': 100})
         window.write_event_value('-DONE-', output_path)
@@ -88,7 +112,8 @@ def create_gui():
          sg.FileSaveAs('Salvar como', file_types=(('Excel Files', '*.xlsx'),))],
         [sg.Text('Formato de saída:'),
          sg.Radio('Excel', 'FORMAT', key='format_excel', default=True),
-         sg.Radio('CSV', 'FORMAT', key='format_csv')],
+         sg.Radio('CSV', 'FORMAT', key='format_csv'),
+         sg.Radio('Parquet (por competência)', 'FORMAT', key='format_parquet')],
         [sg.Checkbox('Incluir cabeçalho com informações do documento', key='include_header', default=True)],
         [sg.Checkbox('Aplicar formatação avançada (cores, bordas, etc.)', key='apply_formatting', default=True)],
         [sg.Text('_' * 80)],
@@ -104,6 +129,13 @@ def create_gui():
         [sg.Radio('Automático (tenta todos os métodos)', 'EXTRACTION', key='auto_extract', default=True)],
         [sg.Radio('Camelot (melhor para tabelas com linhas)', 'EXTRACTION', key='camelot_extract')],
         [sg.Radio('PDFPlumber (melhor para tabelas sem linhas)', 'EXTRACTION', key='pdfplumber_extract')],
+        [sg.Radio('Modelo do livro (colunas fixas, muito mais rápido)', 'EXTRACTION', key='template_extract')],
+        [sg.Text('Processos paralelos:'),
+         sg.Spin(list(range(1, (os.cpu_count() or 1) + 1)), initial_value=1, key='workers', size=(5, 1))],
+        [sg.Checkbox('Modo streaming (processa página a página, menor uso de memória)', key='streaming', default=False)],
+        [sg.Checkbox('Usar cache de extração (reaproveita PDFs já processados)', key='use_cache', default=True)],
+        [sg.Checkbox('Refazer extração e atualizar o cache', key='refresh_cache', default=False)],
+        [sg.Checkbox('Retomar extração interrompida (reaproveita as páginas já extraídas)', key='resume', default=False)],
         [sg.Text('_' * 80)],
         [sg.Text('Configurações de Transformação', font=('Arial', 12, 'bold'))],
         [sg.Checkbox('Remover linhas vazias', key='remove_empty_rows', default=True)],
@@ -153,11 +185,14 @@ def create_gui():
 
             # Ajustar a extensão do arquivo de saída conforme o formato selecionado
             output_path = values['excel']
-            if values['format_csv'] and not output_path.lower().endswith('.csv'):
-                output_path = output_path.rsplit('.', 1)[0] + '.csv'
+            if values['format_csv'] and not output_path.lower().endswith(CSV_EXTENSIONS):
+                output_path = replace_extension(output_path, '.csv')
+                window['excel'].update(output_path)
+            elif values['format_parquet'] and not output_path.lower().endswith('.parquet'):
+                output_path = replace_extension(output_path, '.parquet')
                 window['excel'].update(output_path)
             elif values['format_excel'] and not output_path.lower().endswith(('.xlsx', '.xls')):
-                output_path = output_path.rsplit('.', 1)[0] + '.xlsx'
+                output_path = replace_extension(output_path, '.xlsx')
                 window['excel'].update(output_path)
 
             # Iniciar processamento
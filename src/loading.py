@@ -1,18 +1,67 @@
 import os
 import re
+import sys
+import numpy as np
 import pandas as pd
+import xlsxwriter
 from openpyxl import load_workbook
 from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
 from openpyxl.utils import get_column_letter
 
-def load_to_excel(df, excel_path):
-    """Exporta DataFrame para arquivo Excel com formatação básica"""
+# Adicionar o diretório atual ao caminho de busca do Python
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from transformation import align_columns, centavos_to_reais, money_centavos
+
+# Layout da aba de resumo
+SUMMARY_HEADERS = ['COMPETÊNCIA:', 'SITUAÇÃO:', 'RESUMO DA COMPETÊNCIA:', '', '', '', '', '', '']
+SUMMARY_SUBHEADERS = ['NFs EMITIDAS:', 'NFs CANCELADAS:', 'NFs VÁLIDAS:', 'BC TRIBUTÁVEL:', 'ISS PRÓPRIO:', 'ISS RETIDO:']
+
+# Formato de cada coluna do resumo: (coluna, alinhamento, formato numérico, em centavos)
+SUMMARY_COLUMNS = [
+    ('competência', 'center', None, False),
+    ('situação', 'center', None, False),
+    ('nfs_emitidas', 'center', None, False),
+    ('nfs_canceladas', 'center', None, False),
+    ('nfs_validas', 'center', None, False),
+    ('bc_tributavel', 'right', 'R$ #,##0.00', True),
+    ('iss_proprio', 'right', 'R$ #,##0.00', True),
+    ('iss_retido', 'right', 'R$ #,##0.00', True),
+]
+
+# Acima deste número de linhas, a largura das colunas é estimada por amostragem
+WIDTH_SAMPLE_ROWS = 200_000
+
+# Número máximo de linhas de dados por aba (limite do Excel, menos o cabeçalho)
+MAX_SHEET_ROWS = 1_048_575
+
+# Largura das colunas A-H do resumo
+SUMMARY_WIDTHS = [15, 15, 15, 15, 15, 20, 15, 15]
+
+def load_to_excel(df, excel_path, streaming=False):
+    """Exporta DataFrame para arquivo Excel com formatação básica
+
+    Args:
+        df: DataFrame limpo (valores monetários em centavos)
+        excel_path: Caminho do arquivo Excel
+        streaming: Se True, escreve e formata numa única passagem com
+            ExcelStreamWriter, sem reabrir a planilha. Usado também sempre que
+            os dados não cabem numa aba (mais de MAX_SHEET_ROWS linhas)
+    """
+    if streaming or len(df) > MAX_SHEET_ROWS:
+        # Acima do limite de linhas do Excel, os dados são divididos em abas
+        with ExcelStreamWriter(excel_path) as writer:
+            writer.write(df)
+        return excel_path
+
     # Criar diretório de saída se não existir
     output_dir = os.path.dirname(excel_path)
     if output_dir and not os.path.exists(output_dir):
         os.makedirs(output_dir)
 
-    # Exportar para Excel
+    # Exportar para Excel, com os valores monetários em centavos convertidos para reais
+    summary_df = df
+    df = centavos_to_reais(df)
     df.to_excel(excel_path, index=False, sheet_name='Dados')
 
     # Aplicar formatação
@@ -20,9 +69,6 @@ def load_to_excel(df, excel_path):
     ws = wb['Dados']
 
     # Definir estilos
-    header_font = Font(bold=True, size=12, color="FFFFFF")
-    header_fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
-    header_alignment = Alignment(horizontal='center', vertical='center', wrap_text=True)
     thin_border = Border(
         left=Side(style='thin'),
         right=Side(style='thin'),
@@ -32,87 +78,22 @@ def load_to_excel(df, excel_path):
 
     # Formatar cabeçalho
     for col_num, _ in enumerate(df.columns, 1):
-        cell = ws.cell(row=1, column=col_num)
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.alignment = header_alignment
-        cell.border = thin_border
+        format_header_cell(ws.cell(row=1, column=col_num), thin_border)
 
     # Formatar células de dados
     for row in range(2, len(df) + 2):  # +2 porque Excel é 1-indexado e temos cabeçalho
         for col in range(1, len(df.columns) + 1):
-            cell = ws.cell(row=row, column=col)
-            cell.border = thin_border
-
-            # Alinhar números à direita
-            if isinstance(cell.value, (int, float)):
-                cell.alignment = Alignment(horizontal='right')
-
-            # Formatar datas
-            column_name = df.columns[col-1].lower()
-            if any(date_term in column_name for date_term in ['data', 'dt', 'date', 'emissão', 'emissao']):
-                # Verificar se o valor da célula é uma data no formato DD/MM/YYYY
-                if cell.value and re.match(r'\d{2}/\d{2}/\d{4}', str(cell.value)):
-                    # Formatar como texto para garantir que seja exibido corretamente
-                    cell.number_format = '@'
-                    # Garantir que o valor seja uma string
-                    cell.value = str(cell.value)
-
-            # Formatar competência
-            if 'competência' in column_name:
-                # Verificar se o valor da célula é uma competência no formato MM/AAAA
-                if cell.value and re.match(r'\d{2}/\d{4}', str(cell.value)):
-                    # Formatar como texto para garantir que seja exibido corretamente
-                    cell.number_format = '@'
-                    # Garantir que o valor seja uma string
-                    cell.value = str(cell.value)
-                    # Centralizar o texto
-                    cell.alignment = Alignment(horizontal='center')
-
-            # Formatar colunas de texto específicas
-            column_name_lower = str(column_name).lower()
-            if 'incidência' in column_name_lower or 'incidencia' in column_name_lower:
-                # Garantir que o texto seja exibido corretamente
-                cell.alignment = Alignment(horizontal='left', wrap_text=True)
-            elif 'nat' in column_name_lower and 'operação' in column_name_lower:
-                # Garantir que o texto seja exibido corretamente
-                cell.alignment = Alignment(horizontal='left', wrap_text=True)
-
-            # Formatar valores monetários
-            if any(value_term in column_name for value_term in ['valor', 'vlr', 'preço', 'preco', 'total']):
-                cell.number_format = 'R$ #,##0.00'
+            format_data_cell(ws.cell(row=row, column=col), df.columns[col-1], thin_border)
 
-    # Ajustar largura das colunas
-    for col_num, column_name in enumerate(df.columns, 1):
-        col_letter = get_column_letter(col_num)
-        # Definir largura mínima e máxima
-        max_length = 0
-        for row_num in range(1, len(df) + 2):
-            cell_value = str(ws.cell(row=row_num, column=col_num).value or '')
-            max_length = max(max_length, len(cell_value))
-
-        # Ajustar largura com base no conteúdo
-        adjusted_width = min(max(max_length + 2, 10), 50)  # Entre 10 e 50 caracteres
-
-        # Aumentar a largura para colunas específicas
-        column_name_lower = str(column_name).lower()
-        if 'incidência' in column_name_lower or 'incidencia' in column_name_lower:
-            # Garantir que a coluna de incidência tenha largura suficiente
-            adjusted_width = max(adjusted_width, 35)  # Mínimo de 35 caracteres
-        elif 'tomador' in column_name_lower and 'serviço' in column_name_lower:
-            # Garantir que a coluna de tomador do serviço tenha largura suficiente
-            adjusted_width = max(adjusted_width, 30)  # Mínimo de 30 caracteres
-        elif 'nat' in column_name_lower and 'operação' in column_name_lower:
-            # Garantir que a coluna de natureza da operação tenha largura suficiente
-            adjusted_width = max(adjusted_width, 20)  # Mínimo de 20 caracteres
-
-        ws.column_dimensions[col_letter].width = adjusted_width
+    # Ajustar largura das colunas (calculada a partir do DataFrame)
+    for col_num, width in enumerate(compute_column_widths(df, sample_size=WIDTH_SAMPLE_ROWS).values(), 1):
+        ws.column_dimensions[get_column_letter(col_num)].width = width
 
     # Congelar painel no cabeçalho
     ws.freeze_panes = 'A2'
 
-    # Criar aba de resumo
-    create_summary_sheet(wb, df)
+    # Criar aba de resumo (somas exatas em centavos)
+    create_summary_sheet(wb, summary_df)
 
     # Salvar o arquivo formatado
     wb.save(excel_path)
@@ -120,6 +101,250 @@ def load_to_excel(df, excel_path):
     return excel_path
 
 
+def append_to_excel(df, excel_path, max_rows=MAX_SHEET_ROWS):
+    """Acrescenta as notas novas de df a uma planilha gerada por load_to_excel
+
+    Somente as notas cujo número ainda não está nas abas de dados são
+    acrescentadas (com a mesma formatação), e na aba 'Resumo' só são reescritas
+    as linhas das competências dessas notas e a linha de totais. As demais
+    competências do resumo são mantidas como estão. Se a planilha não existir,
+    é criada com load_to_excel. Nos dois casos, notas repetidas dentro de df
+    são gravadas uma vez. As notas são gravadas na última aba de dados; quando
+    ela chega a max_rows linhas, é criada a aba seguinte ('Dados_2', ...).
+
+    As notas existentes são lidas numa passagem em modo somente leitura, que
+    guarda os números das notas e só as linhas das competências de df (as
+    necessárias para o resumo). A planilha só é aberta para gravação se
+    houver notas novas.
+
+    Args:
+        df: DataFrame limpo (valores monetários em centavos), por exemplo do PDF do mês
+        excel_path: Planilha existente
+        max_rows: Número máximo de linhas de dados por aba
+
+    Returns:
+        Número de notas acrescentadas
+    """
+    note_column = next((col for col in df.columns if 'nota' in str(col).lower()), None)
+    if not os.path.exists(excel_path):
+        new_rows = new_notes(df, note_column)
+        load_to_excel(new_rows, excel_path)
+        return len(new_rows)
+
+    competencias = set(df['competência'].dropna()) - {''} if 'competência' in df.columns else set()
+    columns, known, existing = scan_data_sheets(excel_path, competencias)
+
+    # Notas ainda não gravadas (pelo número da nota)
+    missing = [col for col in df.columns if col not in columns]
+    if missing:
+        print(f"Aviso: colunas ausentes na planilha foram ignoradas: {', '.join(map(str, missing))}")
+    new_rows = new_notes(df, note_column if note_column in columns else None, known)
+    print(f"Acrescentando {len(new_rows)} notas novas ({len(df) - len(new_rows)} já existentes ou repetidas)")
+    if new_rows.empty:
+        return 0
+
+    wb = load_workbook(excel_path)
+    sheets = data_sheet_names(wb)
+
+    thin_border = Border(
+        left=Side(style='thin'),
+        right=Side(style='thin'),
+        top=Side(style='thin'),
+        bottom=Side(style='thin')
+    )
+
+    # Acrescentar as linhas novas à aba de dados, com os valores em reais
+    new_rows = centavos_to_reais(new_rows).reindex(columns=columns)
+    widths = compute_column_widths(new_rows)
+    ws = wb[sheets[-1]]
+    # ws.max_row percorre todas as células da aba: o número de linhas é contado aqui
+    row_num = ws.max_row
+    for values in new_rows.astype(object).where(new_rows.notna(), None).itertuples(index=False):
+        if row_num - 1 >= max_rows:
+            # Aba cheia: continuar numa nova aba, com o cabeçalho e as larguras da anterior
+            previous = ws
+            ws = wb.create_sheet(f"Dados_{len(sheets) + 1}")
+            sheets.append(ws.title)
+            for col_num, column_name in enumerate(columns, 1):
+                ws.cell(row=1, column=col_num).value = column_name
+                format_header_cell(ws.cell(row=1, column=col_num), thin_border)
+                letter = get_column_letter(col_num)
+                ws.column_dimensions[letter].width = previous.column_dimensions[letter].width
+            ws.freeze_panes = 'A2'
+            row_num = 1
+        row_num += 1
+        for col_num, (column_name, value) in enumerate(zip(columns, values), 1):
+            cell = ws.cell(row=row_num, column=col_num, value=value)
+            format_data_cell(cell, column_name, thin_border)
+
+    # Alargar as colunas se o conteúdo novo for maior
+    for name in sheets:
+        for col_num, width in enumerate(widths.values(), 1):
+            dimension = wb[name].column_dimensions[get_column_letter(col_num)]
+            dimension.width = max(dimension.width or 0, width)
+
+    # Resumo recalculado só para as competências das notas novas
+    if 'Resumo' in wb.sheetnames and 'competência' in columns:
+        affected = set(new_rows['competência'].dropna()) - {''}
+        rows_affected = existing[existing['competência'].isin(affected)]
+        summary = summarize_by_competencia(pd.concat([rows_affected, new_rows], ignore_index=True))
+        update_summary_sheet(wb['Resumo'], summary, thin_border)
+
+    wb.save(excel_path)
+    return len(new_rows)
+
+
+def new_notes(df, note_column, known=()):
+    """Linhas de df cujo número de nota não está em known, cada nota uma vez (todas, sem coluna de nota)"""
+    if note_column is None:
+        return df
+    notes = df[note_column].astype(str).str.strip()
+    return df[~notes.isin(known).to_numpy() & ~notes.duplicated().to_numpy()]
+
+
+def scan_data_sheets(excel_path, competencias):
+    """Lê as abas de dados em modo somente leitura, sem montar um DataFrame com todas as linhas
+
+    Returns:
+        Tupla (colunas, números das notas gravadas, DataFrame com as linhas
+        das competências informadas)
+    """
+    wb = load_workbook(excel_path, read_only=True)
+    try:
+        sheets = data_sheet_names(wb)
+        columns = list(next(wb[sheets[0]].iter_rows(max_row=1, values_only=True), ()))
+        note_index = next((i for i, col in enumerate(columns) if 'nota' in str(col).lower()), None)
+        competencia_index = columns.index('competência') if 'competência' in columns else None
+        known = set()
+        rows = []
+        for name in sheets:
+            for values in wb[name].iter_rows(min_row=2, values_only=True):
+                # No modo somente leitura, as linhas vêm sem as células vazias do final
+                values = (tuple(values) + (None,) * len(columns))[:len(columns)]
+                if note_index is not None and values[note_index] is not None:
+                    known.add(str(values[note_index]).strip())
+                if competencia_index is not None and values[competencia_index] in competencias:
+                    rows.append(values)
+    finally:
+        wb.close()
+    return columns, known, pd.DataFrame(rows, columns=columns)
+
+
+def data_sheet_names(wb):
+    """Abas de dados da planilha, em ordem: 'Dados', 'Dados_2', ..."""
+    return [name for name in wb.sheetnames if name == 'Dados' or re.fullmatch(r'Dados_\d+', name)]
+
+
+def format_header_cell(cell, thin_border):
+    """Aplica o estilo de cabeçalho à célula da aba de dados"""
+    cell.font = Font(bold=True, size=12, color="FFFFFF")
+    cell.fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
+    cell.alignment = Alignment(horizontal='center', vertical='center', wrap_text=True)
+    cell.border = thin_border
+
+
+def format_data_cell(cell, column_name, thin_border):
+    """Aplica à célula da aba de dados o formato da sua coluna e do seu valor"""
+    cell.border = thin_border
+
+    # Alinhar números à direita
+    if isinstance(cell.value, (int, float)):
+        cell.alignment = Alignment(horizontal='right')
+
+    # Formatar datas
+    column_name = str(column_name).lower()
+    if any(date_term in column_name for date_term in ['data', 'dt', 'date', 'emissão', 'emissao']):
+        # Verificar se o valor da célula é uma data no formato DD/MM/YYYY
+        if cell.value and re.match(r'\d{2}/\d{2}/\d{4}', str(cell.value)):
+            # Formatar como texto para garantir que seja exibido corretamente
+            cell.number_format = '@'
+            # Garantir que o valor seja uma string
+            cell.value = str(cell.value)
+
+    # Formatar competência
+    if 'competência' in column_name:
+        # Verificar se o valor da célula é uma competência no formato MM/AAAA
+        if cell.value and re.match(r'\d{2}/\d{4}', str(cell.value)):
+            # Formatar como texto para garantir que seja exibido corretamente
+            cell.number_format = '@'
+            # Garantir que o valor seja uma string
+            cell.value = str(cell.value)
+            # Centralizar o texto
+            cell.alignment = Alignment(horizontal='center')
+
+    # Formatar colunas de texto específicas
+    column_name_lower = str(column_name).lower()
+    if 'incidência' in column_name_lower or 'incidencia' in column_name_lower:
+        # Garantir que o texto seja exibido corretamente
+        cell.alignment = Alignment(horizontal='left', wrap_text=True)
+    elif 'nat' in column_name_lower and 'operação' in column_name_lower:
+        # Garantir que o texto seja exibido corretamente
+        cell.alignment = Alignment(horizontal='left', wrap_text=True)
+
+    # Formatar valores monetários
+    if any(value_term in column_name for value_term in ['valor', 'vlr', 'preço', 'preco', 'total']):
+        cell.number_format = 'R$ #,##0.00'
+
+
+def max_text_lengths(df, sample_size=None, seed=0):
+    """Maior número de caracteres de cada coluna (incluindo o cabeçalho), de forma vetorizada
+
+    Args:
+        df: DataFrame com os valores como serão gravados
+        sample_size: Se informado e a tabela for maior, estima o máximo a partir
+            de uma amostra aleatória com esse número de linhas
+        seed: Semente da amostra, para larguras reprodutíveis
+
+    Returns:
+        Lista com o comprimento máximo de cada coluna, na ordem de df.columns
+    """
+    if sample_size is not None and len(df) > sample_size:
+        df = df.sample(n=sample_size, random_state=seed)
+    lengths = []
+    for col_num, column_name in enumerate(df.columns):
+        values = df.iloc[:, col_num]
+        max_length = values.astype(str).where(values.notna(), '').str.len().max() if len(values) else 0
+        lengths.append(max(len(str(column_name)), 0 if pd.isna(max_length) else int(max_length)))
+    return lengths
+
+
+def adjust_column_width(column_name, max_length):
+    """Largura da coluna para um conteúdo de max_length caracteres"""
+    # Ajustar largura com base no conteúdo
+    adjusted_width = min(max(max_length + 2, 10), 50)  # Entre 10 e 50 caracteres
+
+    # Aumentar a largura para colunas específicas
+    column_name_lower = str(column_name).lower()
+    if 'incidência' in column_name_lower or 'incidencia' in column_name_lower:
+        # Garantir que a coluna de incidência tenha largura suficiente
+        adjusted_width = max(adjusted_width, 35)  # Mínimo de 35 caracteres
+    elif 'tomador' in column_name_lower and 'serviço' in column_name_lower:
+        # Garantir que a coluna de tomador do serviço tenha largura suficiente
+        adjusted_width = max(adjusted_width, 30)  # Mínimo de 30 caracteres
+    elif 'nat' in column_name_lower and 'operação' in column_name_lower:
+        # Garantir que a coluna de natureza da operação tenha largura suficiente
+        adjusted_width = max(adjusted_width, 20)  # Mínimo de 20 caracteres
+    return adjusted_width
+
+
+def compute_column_widths(df, sample_size=None):
+    """Calcula a largura de cada coluna a partir do DataFrame, sem ler a planilha
+
+    O resultado não depende da biblioteca usada para gravar o arquivo.
+
+    Args:
+        df: DataFrame com os valores como serão gravados (em reais)
+        sample_size: Se informado, estima as larguras de tabelas maiores a partir
+            de uma amostra com esse número de linhas
+
+    Returns:
+        Dicionário {coluna: largura}, na ordem das colunas
+    """
+    lengths = max_text_lengths(df, sample_size=sample_size)
+    return {column_name: adjust_column_width(column_name, max_length)
+            for column_name, max_length in zip(df.columns, lengths)}
+
+
 def create_summary_sheet(wb, df):
     """Cria uma aba de resumo com informações agrupadas por competência"""
     # Verificar se a coluna de competência existe
@@ -149,8 +374,7 @@ def create_summary_sheet(wb, df):
     )
 
     # Criar cabeçalho da tabela de resumo
-    headers = ['COMPETÊNCIA:', 'SITUAÇÃO:', 'RESUMO DA COMPETÊNCIA:', '', '', '', '', '', '']
-    for col_num, header in enumerate(headers, 1):
+    for col_num, header in enumerate(SUMMARY_HEADERS, 1):
         cell = ws_resumo.cell(row=1, column=col_num)
         cell.value = header
         cell.font = header_font
@@ -162,8 +386,7 @@ def create_summary_sheet(wb, df):
     ws_resumo.merge_cells('C1:I1')
 
     # Criar subcabeçalhos para o resumo da competência
-    subcabeçalhos = ['NFs EMITIDAS:', 'NFs CANCELADAS:', 'NFs VÁLIDAS:', 'BC TRIBUTÁVEL:', 'ISS PRÓPRIO:', 'ISS RETIDO:']
-    for col_num, subcabeçalho in enumerate(subcabeçalhos, 3):
+    for col_num, subcabeçalho in enumerate(SUMMARY_SUBHEADERS, 3):
         cell = ws_resumo.cell(row=2, column=col_num)
         cell.value = subcabeçalho
         cell.font = subheader_font
@@ -171,156 +394,40 @@ def create_summary_sheet(wb, df):
         cell.alignment = Alignment(horizontal='center')
         cell.border = thin_border
 
-    # Agrupar dados por competência
-    competencias = df['competência'].unique()
+    # Calcular o resumo de todas as competências de uma vez
+    summary = summarize_by_competencia(df)
 
-    # Para cada competência, calcular os valores resumidos
+    # Adicionar uma linha de resumo por competência
     row_num = 3  # Começar na linha 3 (após os cabeçalhos)
-
-    for competencia in sorted(competencias):
-        if not competencia:  # Ignorar competências vazias
-            continue
-
-        # Filtrar dados da competência atual
-        comp_data = df[df['competência'] == competencia].copy()
-
-        # Remover registros duplicados para evitar contagem dupla
-        comp_data = comp_data.drop_duplicates()
-
-        # Contar NFs emitidas e canceladas
-        nfs_emitidas = len(comp_data)
-        nfs_canceladas = 0
-
-        # Determinar a situação da competência
-        situacao = 'EM ABERTO'  # Valor padrão
-
-        if 'situação' in df.columns:
-            # Identificar notas canceladas
-            notas_canceladas = comp_data[comp_data['situação'].str.contains('CANCELAD', case=False, na=False)]
-            nfs_canceladas = len(notas_canceladas)
-
-            # Se todas as notas estiverem canceladas, a situação é CANCELADA
-            if nfs_canceladas == nfs_emitidas and nfs_emitidas > 0:
-                situacao = 'CANCELADA'
-            else:
-                # Caso contrário, pegar a situação mais comum entre as notas não canceladas
-                notas_ativas = comp_data[~comp_data['situação'].str.contains('CANCELAD', case=False, na=False)]
-                if len(notas_ativas) > 0:
-                    # Contar ocorrências de cada situação
-                    situacoes_count = notas_ativas['situação'].value_counts()
-                    if len(situacoes_count) > 0:
-                        # Pegar a situação mais comum
-                        situacao = situacoes_count.index[0]
-
-        # Filtrar apenas notas válidas (não canceladas) para cálculos financeiros
-        notas_validas = comp_data
-        if 'situação' in comp_data.columns:
-            # Considerar tanto notas ESCRITURADAS quanto QUITADAS como válidas
-            notas_validas = comp_data[~comp_data['situação'].str.contains('CANCELAD', case=False, na=False)]
-
-        # Calcular base de cálculo tributável
-        bc_tributavel = 0
-        if 'base de cálculo' in notas_validas.columns and len(notas_validas) > 0:
-            try:
-                # Converter para numérico, ignorando erros
-                base_calc_values = pd.to_numeric(
-                    notas_validas['base de cálculo'].astype(str).str.replace(',', '.').str.replace('R$', '').str.strip(),
-                    errors='coerce'
-                )
-                # Substituir valores NaN por 0
-                base_calc_values = base_calc_values.fillna(0)
-                # Remover valores extremos (opcional - descomente se necessário)
-                # q_low = base_calc_values.quantile(0.01)
-                # q_high = base_calc_values.quantile(0.99)
-                # base_calc_values = base_calc_values[(base_calc_values >= q_low) & (base_calc_values <= q_high)]
-                bc_tributavel = base_calc_values.sum()
-            except Exception as e:
-                print(f"Erro ao calcular base de cálculo para competência {competencia}: {str(e)}")
-
-        # Calcular ISS próprio
-        iss_proprio = 0
-        if 'iss próprio' in notas_validas.columns and len(notas_validas) > 0:
-            try:
-                # Converter para numérico, ignorando erros
-                iss_proprio_values = pd.to_numeric(
-                    notas_validas['iss próprio'].astype(str).str.replace(',', '.').str.replace('R$', '').str.strip(),
-                    errors='coerce'
-                )
-                # Substituir valores NaN por 0
-                iss_proprio_values = iss_proprio_values.fillna(0)
-                iss_proprio = iss_proprio_values.sum()
-            except Exception as e:
-                print(f"Erro ao calcular ISS próprio para competência {competencia}: {str(e)}")
-
-        # Calcular ISS retido
-        iss_retido = 0
-        if 'iss retido' in notas_validas.columns and len(notas_validas) > 0:
-            try:
-                # Converter para numérico, ignorando erros
-                iss_retido_values = pd.to_numeric(
-                    notas_validas['iss retido'].astype(str).str.replace(',', '.').str.replace('R$', '').str.strip(),
-                    errors='coerce'
-                )
-                # Substituir valores NaN por 0
-                iss_retido_values = iss_retido_values.fillna(0)
-                iss_retido = iss_retido_values.sum()
-            except Exception as e:
-                print(f"Erro ao calcular ISS retido para competência {competencia}: {str(e)}")
-
-        # Calcular NFs válidas (emitidas - canceladas)
-        nfs_validas = nfs_emitidas - nfs_canceladas
-
-        # Adicionar linha de resumo
-        ws_resumo.cell(row=row_num, column=1).value = competencia
-        ws_resumo.cell(row=row_num, column=1).alignment = Alignment(horizontal='center')
-        ws_resumo.cell(row=row_num, column=1).border = thin_border
-
-        ws_resumo.cell(row=row_num, column=2).value = situacao
-        ws_resumo.cell(row=row_num, column=2).alignment = Alignment(horizontal='center')
-        ws_resumo.cell(row=row_num, column=2).border = thin_border
-
-        ws_resumo.cell(row=row_num, column=3).value = nfs_emitidas
-        ws_resumo.cell(row=row_num, column=3).alignment = Alignment(horizontal='center')
-        ws_resumo.cell(row=row_num, column=3).border = thin_border
-
-        ws_resumo.cell(row=row_num, column=4).value = nfs_canceladas
-        ws_resumo.cell(row=row_num, column=4).alignment = Alignment(horizontal='center')
-        ws_resumo.cell(row=row_num, column=4).border = thin_border
-
-        ws_resumo.cell(row=row_num, column=5).value = nfs_validas
-        ws_resumo.cell(row=row_num, column=5).alignment = Alignment(horizontal='center')
-        ws_resumo.cell(row=row_num, column=5).border = thin_border
-
-        ws_resumo.cell(row=row_num, column=6).value = bc_tributavel
-        ws_resumo.cell(row=row_num, column=6).number_format = 'R$ #,##0.00'
-        ws_resumo.cell(row=row_num, column=6).alignment = Alignment(horizontal='right')
-        ws_resumo.cell(row=row_num, column=6).border = thin_border
-
-        ws_resumo.cell(row=row_num, column=7).value = iss_proprio
-        ws_resumo.cell(row=row_num, column=7).number_format = 'R$ #,##0.00'
-        ws_resumo.cell(row=row_num, column=7).alignment = Alignment(horizontal='right')
-        ws_resumo.cell(row=row_num, column=7).border = thin_border
-
-        ws_resumo.cell(row=row_num, column=8).value = iss_retido
-        ws_resumo.cell(row=row_num, column=8).number_format = 'R$ #,##0.00'
-        ws_resumo.cell(row=row_num, column=8).alignment = Alignment(horizontal='right')
-        ws_resumo.cell(row=row_num, column=8).border = thin_border
-
+    for values in summary.itertuples(index=False):
+        write_summary_row(ws_resumo, row_num, values, thin_border)
         row_num += 1
 
     # Ajustar largura das colunas
-    ws_resumo.column_dimensions['A'].width = 15  # COMPETÊNCIA
-    ws_resumo.column_dimensions['B'].width = 15  # SITUAÇÃO
-    ws_resumo.column_dimensions['C'].width = 15  # NFs EMITIDAS
-    ws_resumo.column_dimensions['D'].width = 15  # NFs CANCELADAS
-    ws_resumo.column_dimensions['E'].width = 15  # NFs VÁLIDAS
-    ws_resumo.column_dimensions['F'].width = 20  # BC TRIBUTÁVEL
-    ws_resumo.column_dimensions['G'].width = 15  # ISS PRÓPRIO
-    ws_resumo.column_dimensions['H'].width = 15  # ISS RETIDO
+    for col_num, width in enumerate(SUMMARY_WIDTHS, 1):
+        ws_resumo.column_dimensions[get_column_letter(col_num)].width = width
 
     # Adicionar linha de totais
     row_num += 1  # Pular uma linha
+    write_summary_total(ws_resumo, row_num, summary, thin_border)
+
+    # Congelar painel no cabeçalho
+    ws_resumo.freeze_panes = 'A3'
+
+
+def write_summary_row(ws_resumo, row_num, values, thin_border):
+    """Escreve a linha do resumo de uma competência (valores na ordem de SUMMARY_COLUMNS)"""
+    for col_num, ((name, alignment, number_format, centavos), value) in enumerate(zip(SUMMARY_COLUMNS, values), 1):
+        cell = ws_resumo.cell(row=row_num, column=col_num)
+        cell.value = value / 100 if centavos else value
+        cell.alignment = Alignment(horizontal=alignment)
+        cell.border = thin_border
+        if number_format:
+            cell.number_format = number_format
 
+
+def write_summary_total(ws_resumo, row_num, summary, thin_border):
+    """Escreve a linha de totais do resumo"""
     # Adicionar célula de total
     ws_resumo.cell(row=row_num, column=1).value = "TOTAL:"
     ws_resumo.cell(row=row_num, column=1).font = Font(bold=True)
@@ -330,56 +437,465 @@ def create_summary_sheet(wb, df):
     # Mesclar células para o rótulo "TOTAL:"
     ws_resumo.merge_cells(start_row=row_num, start_column=1, end_row=row_num, end_column=2)
 
-    # Calcular totais para cada coluna
-    # Total de NFs Emitidas
-    total_nfs_emitidas = sum(ws_resumo.cell(row=r, column=3).value or 0 for r in range(3, row_num))
-    ws_resumo.cell(row=row_num, column=3).value = total_nfs_emitidas
-    ws_resumo.cell(row=row_num, column=3).font = Font(bold=True)
-    ws_resumo.cell(row=row_num, column=3).alignment = Alignment(horizontal='center')
-    ws_resumo.cell(row=row_num, column=3).border = thin_border
-
-    # Total de NFs Canceladas
-    total_nfs_canceladas = sum(ws_resumo.cell(row=r, column=4).value or 0 for r in range(3, row_num))
-    ws_resumo.cell(row=row_num, column=4).value = total_nfs_canceladas
-    ws_resumo.cell(row=row_num, column=4).font = Font(bold=True)
-    ws_resumo.cell(row=row_num, column=4).alignment = Alignment(horizontal='center')
-    ws_resumo.cell(row=row_num, column=4).border = thin_border
-
-    # Total de NFs Válidas
-    total_nfs_validas = sum(ws_resumo.cell(row=r, column=5).value or 0 for r in range(3, row_num))
-    ws_resumo.cell(row=row_num, column=5).value = total_nfs_validas
-    ws_resumo.cell(row=row_num, column=5).font = Font(bold=True)
-    ws_resumo.cell(row=row_num, column=5).alignment = Alignment(horizontal='center')
-    ws_resumo.cell(row=row_num, column=5).border = thin_border
-
-    # Total de BC Tributável
-    total_bc_tributavel = sum(ws_resumo.cell(row=r, column=6).value or 0 for r in range(3, row_num))
-    ws_resumo.cell(row=row_num, column=6).value = total_bc_tributavel
-    ws_resumo.cell(row=row_num, column=6).font = Font(bold=True)
-    ws_resumo.cell(row=row_num, column=6).number_format = 'R$ #,##0.00'
-    ws_resumo.cell(row=row_num, column=6).alignment = Alignment(horizontal='right')
-    ws_resumo.cell(row=row_num, column=6).border = thin_border
-
-    # Total de ISS Próprio
-    total_iss_proprio = sum(ws_resumo.cell(row=r, column=7).value or 0 for r in range(3, row_num))
-    ws_resumo.cell(row=row_num, column=7).value = total_iss_proprio
-    ws_resumo.cell(row=row_num, column=7).font = Font(bold=True)
-    ws_resumo.cell(row=row_num, column=7).number_format = 'R$ #,##0.00'
-    ws_resumo.cell(row=row_num, column=7).alignment = Alignment(horizontal='right')
-    ws_resumo.cell(row=row_num, column=7).border = thin_border
-
-    # Total de ISS Retido
-    total_iss_retido = sum(ws_resumo.cell(row=r, column=8).value or 0 for r in range(3, row_num))
-    ws_resumo.cell(row=row_num, column=8).value = total_iss_retido
-    ws_resumo.cell(row=row_num, column=8).font = Font(bold=True)
-    ws_resumo.cell(row=row_num, column=8).number_format = 'R$ #,##0.00'
-    ws_resumo.cell(row=row_num, column=8).alignment = Alignment(horizontal='right')
-    ws_resumo.cell(row=row_num, column=8).border = thin_border
+    # Totais calculados a partir do resumo (valores monetários somados em centavos)
+    for col_num, (name, alignment, number_format, centavos) in enumerate(SUMMARY_COLUMNS[2:], 3):
+        total = int(summary[name].sum())
+        cell = ws_resumo.cell(row=row_num, column=col_num)
+        cell.value = total / 100 if centavos else total
+        cell.font = Font(bold=True)
+        cell.alignment = Alignment(horizontal=alignment)
+        cell.border = thin_border
+        if number_format:
+            cell.number_format = number_format
 
     # Adicionar preenchimento de cor para a linha de totais
     total_fill = PatternFill(start_color="D9E1F2", end_color="D9E1F2", fill_type="solid")
     for col in range(1, 9):
         ws_resumo.cell(row=row_num, column=col).fill = total_fill
 
-    # Congelar painel no cabeçalho
-    ws_resumo.freeze_panes = 'A3'
+
+def read_summary_sheet(ws_resumo):
+    """Lê as linhas de competência da aba de resumo (valores monetários em centavos)
+
+    Returns:
+        DataFrame com as colunas de SUMMARY_COLUMNS, na ordem da planilha
+    """
+    names = [name for name, _, _, _ in SUMMARY_COLUMNS]
+    records = []
+    for values in ws_resumo.iter_rows(min_row=3, max_col=len(SUMMARY_COLUMNS), values_only=True):
+        if values[0] is None or values[0] == 'TOTAL:':
+            break
+        records.append(values)
+    summary = pd.DataFrame(records, columns=names)
+    for name, _, _, centavos in SUMMARY_COLUMNS:
+        if centavos:
+            summary[name] = money_centavos(summary[name].astype(float))
+    return summary
+
+
+def update_summary_sheet(ws_resumo, changes, thin_border):
+    """Atualiza a aba de resumo com as linhas recalculadas de algumas competências
+
+    As linhas dessas competências são substituídas (ou inseridas na ordem das
+    competências); as linhas anteriores que não mudaram de posição não são
+    reescritas. A linha de totais é refeita a partir de todas as linhas.
+    """
+    current = read_summary_sheet(ws_resumo)
+    kept = current[~current['competência'].isin(changes['competência'])]
+    summary = pd.concat([kept, changes], ignore_index=True).sort_values('competência', kind='stable')
+    summary = summary.reset_index(drop=True)
+    changed = set(changes['competência'])
+
+    # Remover a linha de totais anterior (e a mesclagem do rótulo)
+    old_total_row = 3 + len(current) + 1
+    for merged in list(ws_resumo.merged_cells.ranges):
+        if merged.min_row == old_total_row:
+            ws_resumo.unmerge_cells(str(merged))
+    for col in range(1, len(SUMMARY_COLUMNS) + 1):
+        ws_resumo.cell(row=old_total_row, column=col).style = 'Normal'
+        ws_resumo.cell(row=old_total_row, column=col).value = None
+
+    # Reescrever só as linhas alteradas ou que mudaram de posição
+    for i, values in enumerate(summary.itertuples(index=False)):
+        unchanged = i < len(current) and current['competência'].iloc[i] == values[0] and values[0] not in changed
+        if not unchanged:
+            write_summary_row(ws_resumo, 3 + i, values, thin_border)
+
+    write_summary_total(ws_resumo, 3 + len(summary) + 1, summary, thin_border)
+
+
+def summarize_by_competencia(df):
+    """Calcula o resumo por competência em uma única passagem agrupada
+
+    Para cada competência (em ordem): situação predominante, NFs emitidas,
+    canceladas e válidas, e as somas de base de cálculo, ISS próprio e ISS
+    retido das notas não canceladas. Linhas repetidas são contadas uma vez.
+
+    Returns:
+        DataFrame com as colunas competência, situação, nfs_emitidas,
+        nfs_canceladas, nfs_validas, bc_tributavel, iss_proprio e iss_retido;
+        os valores monetários estão em centavos (int64).
+    """
+    summary = SummaryAccumulator()
+    summary.add(df)
+    return summary.result()
+
+
+class SummaryAccumulator:
+    """Acumula o resumo por competência bloco a bloco
+
+    Cada bloco é reduzido a contagens e somas por (competência, situação), de
+    modo que o resumo de um arquivo gravado em partes não exige manter todas
+    as linhas em memória. Linhas repetidas, a qualquer distância, são contadas
+    uma vez: das linhas já contadas fica só o hash de 64 bits (8 bytes por
+    linha distinta, em blocos ordenados), e o resultado é o mesmo de
+    summarize_by_competencia sobre todas as linhas.
+
+    Uso:
+        summary = SummaryAccumulator()
+        for df in blocos:
+            summary.add(df)
+        resumo = summary.result()
+    """
+
+    # Colunas monetárias somadas no resumo: (nome no resumo, coluna dos dados)
+    MONEY_COLUMNS = [('bc_tributavel', 'base de cálculo'), ('iss_proprio', 'iss próprio'), ('iss_retido', 'iss retido')]
+
+    # Número de linhas acumuladas antes de reduzi-las a contagens e somas
+    BUFFER_ROWS = 50_000
+
+    # Número de blocos parciais acumulados antes de combiná-los
+    COMBINE_EVERY = 64
+
+    def __init__(self):
+        self._pending = []
+        self._pending_rows = 0
+        self._parts = []
+        # Hashes das linhas já contadas: um vetor ordenado por bloco reduzido
+        self._seen = []
+        self._rows = 0
+
+    def add(self, df):
+        """Acrescenta as linhas de df ao resumo"""
+        if 'competência' not in df.columns:
+            return
+        self._pending.append(df[df['competência'].notna() & (df['competência'] != '')])
+        self._pending_rows += len(self._pending[-1])
+        if self._pending_rows >= self.BUFFER_ROWS:
+            self._flush()
+
+    def _flush(self):
+        # Reduz os blocos pendentes a contagens e somas parciais
+        if not self._pending:
+            return
+        data = pd.concat(self._pending, ignore_index=True) if len(self._pending) > 1 else self._pending[0]
+        self._pending = []
+        self._pending_rows = 0
+
+        # Remover registros duplicados (no bloco e em relação aos blocos anteriores)
+        hashes = pd.util.hash_pandas_object(data, index=False).to_numpy()
+        new = ~pd.Series(hashes).duplicated().to_numpy()
+        for seen in self._seen:
+            positions = np.searchsorted(seen, hashes).clip(max=len(seen) - 1)
+            new &= seen[positions] != hashes
+        data = data[new]
+        self._seen.append(np.sort(hashes[new]))
+        if len(self._seen) >= self.COMBINE_EVERY:
+            self._seen = [np.sort(np.concatenate(self._seen))]
+        if data.empty:
+            return
+
+        # Identificar notas canceladas
+        if 'situação' in data.columns:
+            situacao = data['situação']
+            canceladas = situacao.str.contains('CANCELAD', case=False, na=False)
+        else:
+            situacao = pd.Series(None, index=data.index, dtype=object)
+            canceladas = pd.Series(False, index=data.index)
+
+        part = pd.DataFrame({'competência': data['competência'], 'situação': situacao, 'cancelada': canceladas,
+                             'n': 1, 'ordem': range(self._rows, self._rows + len(data))})
+        # Valores monetários das notas válidas (não canceladas), em centavos
+        for name, column in self.MONEY_COLUMNS:
+            part[name] = 0
+            if column in data.columns:
+                try:
+                    part[name] = money_centavos(data[column]).where(~canceladas, 0)
+                except Exception as e:
+                    print(f"Erro ao calcular a coluna '{column}' do resumo: {str(e)}")
+        self._rows += len(data)
+
+        self._parts.append(self._combine([part]))
+        if len(self._parts) >= self.COMBINE_EVERY:
+            self._parts = [self._combine(self._parts)]
+
+    def _combine(self, parts):
+        # Contagens e somas por (competência, situação), com a primeira aparição de cada par
+        combined = pd.concat(parts, ignore_index=True)
+        aggregations = {'cancelada': 'first', 'n': 'sum', 'ordem': 'min'}
+        aggregations.update({name: 'sum' for name, _ in self.MONEY_COLUMNS})
+        return combined.groupby(['competência', 'situação'], sort=False, dropna=False).agg(aggregations).reset_index()
+
+    def result(self):
+        """Retorna o resumo por competência (mesmas colunas de summarize_by_competencia)"""
+        columns = ['competência', 'situação', 'nfs_emitidas', 'nfs_canceladas', 'nfs_validas',
+                   'bc_tributavel', 'iss_proprio', 'iss_retido']
+        self._flush()
+        if not self._parts:
+            return pd.DataFrame(columns=columns)
+        parts = self._combine(self._parts)
+        parts['n_canceladas'] = parts['n'].where(parts['cancelada'], 0)
+
+        aggregations = {'nfs_emitidas': ('n', 'sum'), 'nfs_canceladas': ('n_canceladas', 'sum')}
+        aggregations.update({name: (name, 'sum') for name, _ in self.MONEY_COLUMNS})
+        summary = parts.groupby('competência', sort=True).agg(**aggregations)
+        summary['nfs_validas'] = summary['nfs_emitidas'] - summary['nfs_canceladas']
+
+        # Situação: CANCELADA se todas as notas foram canceladas; senão a mais comum
+        # entre as não canceladas (em caso de empate, a que aparece primeiro)
+        ativas = parts[~parts['cancelada'] & parts['situação'].notna()]
+        predominante = ativas.sort_values('ordem').sort_values('n', ascending=False, kind='stable')
+        predominante = predominante.drop_duplicates('competência').set_index('competência')['situação']
+        summary['situação'] = predominante.reindex(summary.index).fillna('EM ABERTO')
+        summary.loc[summary['nfs_canceladas'] == summary['nfs_emitidas'], 'situação'] = 'CANCELADA'
+
+        return summary.reset_index()[columns]
+
+
+class ExcelStreamWriter:
+    """Escreve o Excel bloco a bloco, formatando as células no momento da escrita
+
+    O arquivo gerado tem as mesmas abas e a mesma formatação de load_to_excel,
+    mas é escrito numa única passagem com o xlsxwriter em modo de memória
+    constante: cada linha vai para o disco assim que é escrita, e os formatos
+    são definidos por coluna e reaproveitados entre as células. A aba de
+    resumo é acumulada com SummaryAccumulator e escrita ao fechar o arquivo.
+    As colunas são definidas pelo primeiro bloco escrito; os blocos seguintes
+    são alinhados a elas.
+
+    Quando a aba 'Dados' atinge max_rows linhas, os dados continuam em novas
+    abas ('Dados_2', 'Dados_3', ...), com o mesmo cabeçalho; o resumo considera
+    todas elas.
+
+    O arquivo é escrito num temporário que só substitui o destino em close();
+    com abort() (ou um erro dentro do with), o destino fica como estava.
+
+    Uso:
+        with ExcelStreamWriter('saida.xlsx') as writer:
+            for df in blocos:
+                writer.write(df)
+    """
+
+    def __init__(self, excel_path, max_rows=MAX_SHEET_ROWS):
+        self.excel_path = excel_path
+        self.max_rows = max_rows
+        self.columns = None
+        self.rows_written = 0
+        self._workbook = None
+        self._sheets = []
+        self._sheet_rows = 0
+        self._summary = None
+        self._formats = {}
+        self._widths = []
+        self._tmp_path = None
+
+    def open(self):
+        # Criar diretório de saída se não existir
+        output_dir = os.path.dirname(self.excel_path)
+        if output_dir and not os.path.exists(output_dir):
+            os.makedirs(output_dir)
+
+        self._tmp_path = f"{self.excel_path}.{os.getpid()}.tmp"
+        self._workbook = xlsxwriter.Workbook(self._tmp_path, {'constant_memory': True})
+        return self
+
+    def _format(self, **properties):
+        # Um formato por combinação de propriedades, compartilhado entre as células
+        key = tuple(sorted(properties.items()))
+        if key not in self._formats:
+            self._formats[key] = self._workbook.add_format(properties)
+        return self._formats[key]
+
+    def _cell_format(self, column_name, kind):
+        """Formato de uma célula de dados, conforme a coluna e o tipo do valor
+
+        kind é 'number' (valor numérico), 'match' (texto no formato de data ou
+        competência da coluna) ou 'text' (demais valores e células vazias).
+        """
+        properties = {'border': 1}
+        # Alinhar números à direita
+        if kind == 'number':
+            properties['align'] = 'right'
+        # Datas (DD/MM/AAAA) e competências (MM/AAAA) como texto
+        if kind == 'match':
+            properties['num_format'] = '@'
+            if 'competência' in column_name:
+                properties['align'] = 'center'
+        # Colunas de texto longo
+        if 'incidência' in column_name or 'incidencia' in column_name or ('nat' in column_name and 'operação' in column_name):
+            properties['align'] = 'left'
+            properties['text_wrap'] = True
+        # Valores monetários
+        if any(value_term in column_name for value_term in ['valor', 'vlr', 'preço', 'preco', 'total']):
+            properties['num_format'] = 'R$ #,##0.00'
+        return self._format(**properties)
+
+    def _start(self, df):
+        # Abas criadas na ordem final: resumo (se houver competência) e dados
+        self.columns = list(df.columns)
+        if 'competência' in self.columns:
+            self._summary = SummaryAccumulator()
+            self._summary_sheet = self._workbook.add_worksheet('Resumo')
+        self._widths = [len(str(column_name)) for column_name in self.columns]
+        self._add_data_sheet()
+
+        # Formatos de cada coluna: (número, texto no formato esperado, demais)
+        self._column_formats = []
+        for column_name in self.columns:
+            name = str(column_name).lower()
+            self._column_formats.append({kind: self._cell_format(name, kind) for kind in ('number', 'match', 'text')})
+
+    def _add_data_sheet(self):
+        # Nova aba de dados ('Dados', 'Dados_2', ...) com o cabeçalho das colunas
+        name = 'Dados' if not self._sheets else f"Dados_{len(self._sheets) + 1}"
+        self._sheet = self._workbook.add_worksheet(name)
+        self._sheets.append(self._sheet)
+        self._sheet_rows = 0
+
+        header_format = self._format(bold=True, font_size=12, font_color='#FFFFFF', bg_color='#4472C4',
+                                     align='center', valign='vcenter', text_wrap=True, border=1)
+        for col_num, column_name in enumerate(self.columns):
+            self._sheet.write_string(0, col_num, str(column_name), header_format)
+        self._sheet.freeze_panes(1, 0)
+
+    def _column_cells(self, values, column_name, formats):
+        """Converte uma coluna do bloco em listas de valores (None se vazio) e formatos"""
+        name = str(column_name).lower()
+        blank = values.isna().to_numpy()
+        if pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values):
+            kinds = np.where(blank, formats['text'], formats['number'])
+        else:
+            if 'competência' in name:
+                pattern = r'\d{2}/\d{4}'
+            elif any(date_term in name for date_term in ['data', 'dt', 'date', 'emissão', 'emissao']):
+                pattern = r'\d{2}/\d{2}/\d{4}'
+            else:
+                pattern = None
+            kinds = np.full(len(values), formats['text'], dtype=object)
+            if pattern:
+                matches = values.astype(str).str.match(pattern).to_numpy(dtype=bool, na_value=False)
+                kinds[matches & ~blank] = formats['match']
+            if values.dtype == object:
+                # Colunas mistas: números continuam números
+                numbers = np.array([isinstance(v, (int, float)) and not isinstance(v, bool) for v in values], dtype=bool)
+                kinds[numbers & ~blank] = formats['number']
+        cells = values.to_numpy(dtype=object, copy=True)
+        cells[blank] = None
+        return cells.tolist(), kinds.tolist()
+
+    def write(self, df):
+        """Acrescenta as linhas de df à aba de dados"""
+        if self._workbook is None:
+            self.open()
+        if self.columns is None:
+            self._start(df)
+        else:
+            df = align_columns(df, self.columns)
+
+        if self._summary is not None:
+            self._summary.add(df)
+
+        # Valores monetários em centavos são gravados em reais
+        df = centavos_to_reais(df)
+        columns = [self._column_cells(df[column], column, formats)
+                   for column, formats in zip(self.columns, self._column_formats)]
+
+        # Largura das colunas pelo maior conteúdo já escrito
+        lengths = max_text_lengths(df, sample_size=WIDTH_SAMPLE_ROWS)
+        self._widths = [max(width, length) for width, length in zip(self._widths, lengths)]
+
+        sheet = self._sheet
+        row_num = self._sheet_rows + 1
+        for i in range(len(df)):
+            if row_num > self.max_rows:
+                # Aba cheia: continuar numa nova aba
+                self._sheet_rows = self.max_rows
+                self._add_data_sheet()
+                sheet = self._sheet
+                row_num = 1
+            for col_num, (cells, formats) in enumerate(columns):
+                value = cells[i]
+                if value is None:
+                    sheet.write_blank(row_num, col_num, None, formats[i])
+                elif isinstance(value, str):
+                    sheet.write_string(row_num, col_num, value, formats[i])
+                elif isinstance(value, bool):
+                    sheet.write_boolean(row_num, col_num, value, formats[i])
+                elif isinstance(value, (int, float)):
+                    sheet.write_number(row_num, col_num, value, formats[i])
+                else:
+                    sheet.write_string(row_num, col_num, str(value), formats[i])
+            row_num += 1
+        self._sheet_rows = row_num - 1
+        self.rows_written += len(df)
+
+    def _write_summary(self):
+        """Escreve a aba de resumo com o mesmo layout de create_summary_sheet"""
+        ws = self._summary_sheet
+        summary = self._summary.result()
+        header_format = self._format(bold=True, font_size=12, font_color='#FFFFFF', bg_color='#4472C4',
+                                     align='center', valign='vcenter', text_wrap=True, border=1)
+        subheader_format = self._format(bold=True, font_size=11, bg_color='#D9E1F2', align='center', border=1)
+
+        # Cabeçalho, com "RESUMO DA COMPETÊNCIA:" mesclado em C1:I1
+        ws.write_string(0, 0, SUMMARY_HEADERS[0], header_format)
+        ws.write_string(0, 1, SUMMARY_HEADERS[1], header_format)
+        ws.merge_range(0, 2, 0, len(SUMMARY_HEADERS) - 1, SUMMARY_HEADERS[2], header_format)
+        for col_num, subcabeçalho in enumerate(SUMMARY_SUBHEADERS, 2):
+            ws.write_string(1, col_num, subcabeçalho, subheader_format)
+
+        # Uma linha por competência
+        formats = [self._format(align=alignment, border=1, **({'num_format': number_format} if number_format else {}))
+                   for _, alignment, number_format, _ in SUMMARY_COLUMNS]
+        row_num = 2
+        for values in summary.itertuples(index=False):
+            for col_num, ((name, alignment, number_format, centavos), value) in enumerate(zip(SUMMARY_COLUMNS, values)):
+                if isinstance(value, str):
+                    ws.write_string(row_num, col_num, value, formats[col_num])
+                else:
+                    ws.write_number(row_num, col_num, value / 100 if centavos else int(value), formats[col_num])
+            row_num += 1
+
+        # Linha de totais, depois de uma linha em branco
+        row_num += 1
+        total_label = self._format(bold=True, align='center', border=1, bg_color='#D9E1F2')
+        ws.merge_range(row_num, 0, row_num, 1, 'TOTAL:', total_label)
+        for col_num, (name, alignment, number_format, centavos) in enumerate(SUMMARY_COLUMNS[2:], 2):
+            total = int(summary[name].sum())
+            properties = {'bold': True, 'align': alignment, 'border': 1, 'bg_color': '#D9E1F2'}
+            if number_format:
+                properties['num_format'] = number_format
+            ws.write_number(row_num, col_num, total / 100 if centavos else total, self._format(**properties))
+
+        for col_num, width in enumerate(SUMMARY_WIDTHS):
+            ws.set_column(col_num, col_num, width)
+        ws.freeze_panes(2, 0)
+
+    def close(self):
+        """Grava larguras e resumo, fecha a planilha e a move para o destino"""
+        if self._workbook is None:
+            self.open()
+        if self.columns is not None:
+            # Ajustar largura das colunas (mesmas regras de load_to_excel)
+            for sheet in self._sheets:
+                for col_num, (column_name, max_length) in enumerate(zip(self.columns, self._widths)):
+                    sheet.set_column(col_num, col_num, adjust_column_width(column_name, max_length))
+            if self._summary is not None:
+                self._write_summary()
+        else:
+            # Nenhum bloco escrito: planilha de dados vazia
+            self._workbook.add_worksheet('Dados')
+        self._workbook.close()
+        os.replace(self._tmp_path, self.excel_path)
+        return self.excel_path
+
+    def abort(self):
+        """Descarta a planilha temporária, mantendo o destino como estava"""
+        if self._workbook is not None:
+            try:
+                # Fechar libera os arquivos temporários do modo de memória constante
+                self._workbook.close()
+            except Exception:
+                pass
+            self._workbook = None
+            if os.path.exists(self._tmp_path):
+                os.remove(self._tmp_path)
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
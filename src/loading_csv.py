@@ -1,51 +1,149 @@
+import gzip
+import io
 import os
+import sys
 import pandas as pd
 
-def load_to_csv(df, csv_path, include_header=True):
-    """Exporta DataFrame para arquivo CSV com opções de formatação"""
-    # Criar diretório de saída se não existir
-    output_dir = os.path.dirname(csv_path)
-    if output_dir and not os.path.exists(output_dir):
-        os.makedirs(output_dir)
-
-    # Adicionar cabeçalho com informações do documento se solicitado
-    if include_header:
-        # Criar um novo DataFrame para o cabeçalho
-        header_df = pd.DataFrame([
-            ["PREFEITURA DE IMPERATRIZ"],
-            ["SECRETARIA DE FAZENDA E GESTÃO ORÇAMENTARIA"],
-            ["SEFAZGO"],
-            ["CNPJ: 06.158.455/0001-16"],
-            ["Rua Godofredo Viana 722/738, Centro CEP: 65901-480 - Imperatriz-MA"],
-            [""],  # Linha em branco
-            ["RELATÓRIO DE SERVIÇOS PRESTADOS"],
-            ["Gerado em: " + pd.Timestamp.now().strftime("%d/%m/%Y %H:%M:%S")],
-            [""],  # Linha em branco
-        ])
-
-        # Salvar o cabeçalho em um arquivo temporário
-        temp_header_path = csv_path + ".header.tmp"
-        header_df.to_csv(temp_header_path, index=False, header=False, encoding='utf-8-sig', sep=';')
-
-        # Salvar os dados em um arquivo temporário
-        temp_data_path = csv_path + ".data.tmp"
-        df.to_csv(temp_data_path, index=False, encoding='utf-8-sig', sep=';')
-
-        # Combinar os arquivos
-        with open(csv_path, 'w', encoding='utf-8-sig') as outfile:
-            # Adicionar o cabeçalho
-            with open(temp_header_path, 'r', encoding='utf-8-sig') as header_file:
-                outfile.write(header_file.read())
-
-            # Adicionar os dados
-            with open(temp_data_path, 'r', encoding='utf-8-sig') as data_file:
-                outfile.write(data_file.read())
-
-        # Remover arquivos temporários
-        os.remove(temp_header_path)
-        os.remove(temp_data_path)
-    else:
-        # Salvar diretamente sem cabeçalho
-        df.to_csv(csv_path, index=False, encoding='utf-8-sig', sep=';')
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - depende do ambiente
+    zstandard = None
 
+# Adicionar o diretório atual ao caminho de busca do Python
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from transformation import centavos_to_reais
+
+# Número de linhas convertidas e gravadas por vez
+CSV_CHUNK_ROWS = 100_000
+
+# Extensões reconhecidas quando a compressão é inferida do nome do arquivo
+COMPRESSION_EXTENSIONS = {'.gz': 'gzip', '.zst': 'zstd', '.zstd': 'zstd'}
+
+def load_to_csv(df, csv_path, include_header=True, compression='infer'):
+    """Exporta DataFrame para arquivo CSV com opções de formatação
+
+    O cabeçalho da Prefeitura e os dados são gravados numa única passagem, em
+    blocos, num arquivo temporário que substitui o destino ao final.
+
+    Args:
+        df: DataFrame limpo (valores monetários em centavos)
+        csv_path: Caminho do arquivo CSV
+        include_header: Se True, inclui o cabeçalho da Prefeitura
+        compression: 'gzip', 'zstd', None (sem compressão) ou 'infer' (pela
+            extensão: .gz, .zst)
+    """
+    with CSVStreamWriter(csv_path, include_header=include_header, compression=compression) as writer:
+        for start in range(0, len(df), CSV_CHUNK_ROWS):
+            writer.write(df.iloc[start:start + CSV_CHUNK_ROWS])
+        if not len(df):
+            writer.write(df)
     return csv_path
+
+
+def csv_compression(csv_path, compression='infer'):
+    """Resolve o tipo de compressão do arquivo ('gzip', 'zstd' ou None)"""
+    if compression == 'infer':
+        compression = COMPRESSION_EXTENSIONS.get(os.path.splitext(csv_path)[1].lower())
+    if compression not in (None, 'gzip', 'zstd'):
+        raise ValueError(f"Compressão não suportada: {compression}")
+    if compression == 'zstd' and zstandard is None:
+        raise Exception("Falha ao gravar CSV: o pacote zstandard não está instalado (pip install zstandard)")
+    return compression
+
+
+def document_header():
+    """Retorna o bloco de cabeçalho da Prefeitura como DataFrame de uma coluna"""
+    return pd.DataFrame([
+        ["PREFEITURA DE IMPERATRIZ"],
+        ["SECRETARIA DE FAZENDA E GESTÃO ORÇAMENTARIA"],
+        ["SEFAZGO"],
+        ["CNPJ: 06.158.455/0001-16"],
+        ["Rua Godofredo Viana 722/738, Centro CEP: 65901-480 - Imperatriz-MA"],
+        [""],  # Linha em branco
+        ["RELATÓRIO DE SERVIÇOS PRESTADOS"],
+        ["Gerado em: " + pd.Timestamp.now().strftime("%d/%m/%Y %H:%M:%S")],
+        [""],  # Linha em branco
+    ])
+
+
+class CSVStreamWriter:
+    """Escreve um CSV bloco a bloco, sem manter os dados em memória
+
+    O arquivo gerado tem o mesmo formato de load_to_csv. As colunas são
+    definidas pelo primeiro bloco escrito; os blocos seguintes são alinhados a
+    elas. Os dados são gravados num arquivo temporário, que só substitui o
+    destino quando o arquivo é fechado sem erros.
+
+    Uso:
+        with CSVStreamWriter('saida.csv.gz') as writer:
+            for df in blocos:
+                writer.write(df)
+    """
+
+    def __init__(self, csv_path, include_header=True, compression='infer'):
+        self.csv_path = csv_path
+        self.include_header = include_header
+        self.compression = csv_compression(csv_path, compression)
+        self.columns = None
+        self.rows_written = 0
+        self._file = None
+        self._tmp_path = None
+
+    def open(self):
+        # Criar diretório de saída se não existir
+        output_dir = os.path.dirname(self.csv_path)
+        if output_dir and not os.path.exists(output_dir):
+            os.makedirs(output_dir)
+
+        self._tmp_path = f"{self.csv_path}.{os.getpid()}.tmp"
+        if self.compression == 'gzip':
+            self._file = gzip.open(self._tmp_path, 'wt', encoding='utf-8-sig', newline='')
+        elif self.compression == 'zstd':
+            raw = zstandard.ZstdCompressor().stream_writer(open(self._tmp_path, 'wb'))
+            self._file = io.TextIOWrapper(raw, encoding='utf-8-sig', newline='')
+        else:
+            self._file = open(self._tmp_path, 'w', encoding='utf-8-sig', newline='')
+        if self.include_header:
+            document_header().to_csv(self._file, index=False, header=False, sep=';')
+        return self
+
+    def write(self, df):
+        """Acrescenta as linhas de df ao arquivo"""
+        if self._file is None:
+            self.open()
+
+        df = centavos_to_reais(df)
+        if self.columns is None:
+            self.columns = list(df.columns)
+            write_columns = True
+        else:
+            df = df.reindex(columns=self.columns)
+            write_columns = False
+
+        df.to_csv(self._file, index=False, header=write_columns, sep=';')
+        self.rows_written += len(df)
+
+    def close(self):
+        """Fecha o arquivo e o move para o destino"""
+        if self._file is None:
+            self.open()
+        self._file.close()
+        os.replace(self._tmp_path, self.csv_path)
+        return self.csv_path
+
+    def abort(self):
+        """Descarta o arquivo temporário, mantendo o destino como estava"""
+        if self._file is not None:
+            self._file.close()
+            if os.path.exists(self._tmp_path):
+                os.remove(self._tmp_path)
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
@@ -0,0 +1,241 @@
+import os
+import shutil
+import sys
+from collections import Counter
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+except ImportError:  # pragma: no cover - depende do ambiente
+    pa = None
+    ds = None
+
+# Adicionar o diretório atual ao caminho de busca do Python
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from transformation import align_columns, is_date_column, money_centavos, money_columns
+
+# Coluna de partição (AAAA-MM) usada nos nomes das pastas: competencia=2022-01
+PARTITION_COLUMN = 'competencia'
+
+# Colunas de poucos valores distintos, gravadas como categorias (dicionário)
+CATEGORY_TERMS = ['competência', 'situação', 'situacao', 'incidência', 'incidencia', 'nat', 'aliq']
+
+# Número de linhas acumuladas antes de gravar cada arquivo do conjunto
+PARQUET_CHUNK_ROWS = 200_000
+
+def load_to_parquet(df, parquet_path):
+    """Exporta DataFrame para um conjunto Parquet tipado, particionado por competência
+
+    O conjunto é uma pasta com uma subpasta por competência
+    (competencia=AAAA-MM). As datas são gravadas como date32, os valores
+    monetários como inteiros em centavos e as colunas de poucos valores
+    (situação, incidência, ...) como categorias. Pode ser lido com
+    pd.read_parquet(parquet_path), inclusive filtrando competências.
+
+    Args:
+        df: DataFrame limpo (valores monetários em centavos)
+        parquet_path: Pasta do conjunto Parquet (substituída se existir)
+    """
+    with ParquetStreamWriter(parquet_path) as writer:
+        writer.write(df)
+    return parquet_path
+
+
+def parquet_schema(df):
+    """Define o esquema Arrow de cada coluna do DataFrame limpo, a partir do nome e do tipo"""
+    centavos = set(money_columns(df))
+    fields = []
+    for column in df.columns:
+        name = str(column).lower()
+        if column in centavos:
+            field_type = pa.int64()
+        elif is_date_column(name) and 'competência' not in name:
+            field_type = pa.date32()
+        elif any(term in name for term in CATEGORY_TERMS):
+            field_type = pa.dictionary(pa.int32(), pa.string())
+        elif pd.api.types.is_numeric_dtype(df[column]) and not pd.api.types.is_bool_dtype(df[column]):
+            field_type = pa.float64()
+        else:
+            field_type = pa.string()
+        fields.append(pa.field(str(column), field_type))
+    fields.append(pa.field(PARTITION_COLUMN, pa.string()))
+    return pa.schema(fields)
+
+
+def to_arrow_table(df, schema, invalid_dates=None):
+    """Converte um bloco do DataFrame limpo para uma tabela Arrow com o esquema informado
+
+    Args:
+        df: Bloco do DataFrame limpo
+        schema: Esquema definido por parquet_schema
+        invalid_dates: Counter opcional onde são somadas, por coluna, as datas
+            que não estão no formato DD/MM/AAAA e foram gravadas como nulas
+
+    Levanta uma exceção com o nome da coluna se algum valor não puder ser
+    convertido para o tipo do esquema.
+    """
+    arrays = []
+    for field in schema:
+        try:
+            arrays.append(_column_array(df, field, invalid_dates))
+        except Exception as e:
+            raise Exception(f"Falha ao gravar Parquet: a coluna '{field.name}' não pôde ser convertida "
+                            f"para {field.type}: {str(e)}")
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+
+def _column_array(df, field, invalid_dates=None):
+    # Valores de uma coluna do bloco convertidos para o tipo do campo
+    if field.name == PARTITION_COLUMN:
+        competencias = df['competência'] if 'competência' in df.columns else pd.Series(None, index=df.index)
+        # MM/AAAA -> AAAA-MM (ordenável e válido como nome de pasta)
+        values = competencias.astype(str).str.replace(r'^(\d{2})/(\d{4})$', r'\2-\1', regex=True)
+        values = values.where(competencias.notna() & (competencias.astype(str).str.match(r'^\d{2}/\d{4}$')), None)
+    else:
+        values = df[field.name]
+        if pa.types.is_int64(field.type):
+            # Centavos: o esquema vem do primeiro bloco, e os seguintes podem trazer texto ou reais
+            present = values.notna()
+            values = money_centavos(values[present]).astype('Int64').reindex(values.index)
+        elif pa.types.is_date32(field.type):
+            dates = pd.to_datetime(values, format='%d/%m/%Y', errors='coerce')
+            invalid = dates.isna() & values.notna() & (values.astype(str).str.strip() != '')
+            if invalid_dates is not None and invalid.any():
+                invalid_dates[field.name] += int(invalid.sum())
+            values = dates.dt.date
+        elif pa.types.is_dictionary(field.type) or pa.types.is_string(field.type):
+            values = values.astype(str).where(values.notna() & (values.astype(str) != ''), None)
+    value_type = field.type.value_type if pa.types.is_dictionary(field.type) else field.type
+    array = pa.array(values.astype(object).where(values.notna(), None), type=value_type, from_pandas=True)
+    if pa.types.is_dictionary(field.type):
+        array = array.dictionary_encode()
+    return array
+
+
+def _replace_path(src, dest):
+    """Substitui dest (pasta ou arquivo) pela pasta src
+
+    O destino antigo é renomeado à parte antes da troca e só é removido depois
+    que a nova pasta está no lugar; se a troca falhar, o destino antigo volta.
+    """
+    old_path = None
+    if os.path.lexists(dest):
+        old_path = f"{dest}.{os.getpid()}.old"
+        _remove_path(old_path)
+        os.replace(dest, old_path)
+    try:
+        os.replace(src, dest)
+    except Exception:
+        if old_path is not None:
+            os.replace(old_path, dest)
+        raise
+    if old_path is not None:
+        _remove_path(old_path)
+
+def _remove_path(path):
+    """Remove uma pasta ou um arquivo, se existir"""
+    if os.path.isdir(path) and not os.path.islink(path):
+        shutil.rmtree(path)
+    elif os.path.lexists(path):
+        os.remove(path)
+
+
+class ParquetStreamWriter:
+    """Escreve o conjunto Parquet bloco a bloco, sem manter os dados em memória
+
+    O conjunto gerado é o mesmo de load_to_parquet. As colunas e os tipos são
+    definidos pelo primeiro bloco escrito; os blocos seguintes são alinhados a
+    eles: as colunas monetárias são convertidas para centavos em cada bloco,
+    e um valor que não pode ser convertido interrompe a gravação com o nome
+    da coluna. Datas fora do formato DD/MM/AAAA são gravadas como nulas e
+    contadas em invalid_dates (um aviso é impresso ao fechar). As linhas são
+    acumuladas até PARQUET_CHUNK_ROWS e então gravadas, numa pasta temporária
+    que só substitui o destino quando o conjunto é fechado sem erros.
+
+    Uso:
+        with ParquetStreamWriter('saida.parquet') as writer:
+            for df in blocos:
+                writer.write(df)
+    """
+
+    def __init__(self, parquet_path):
+        if pa is None:
+            raise Exception("Falha ao gravar Parquet: o pacote pyarrow não está instalado")
+        self.parquet_path = parquet_path
+        self.columns = None
+        self.rows_written = 0
+        self.invalid_dates = Counter()
+        self._schema = None
+        self._pending = []
+        self._pending_rows = 0
+        self._parts = 0
+        self._tmp_path = None
+
+    def open(self):
+        # Criar diretório de saída se não existir
+        output_dir = os.path.dirname(os.path.abspath(self.parquet_path))
+        os.makedirs(output_dir, exist_ok=True)
+
+        self._tmp_path = f"{self.parquet_path}.{os.getpid()}.tmp"
+        if os.path.isdir(self._tmp_path):
+            shutil.rmtree(self._tmp_path)
+        os.makedirs(self._tmp_path)
+        return self
+
+    def write(self, df):
+        """Acrescenta as linhas de df ao conjunto"""
+        if self._tmp_path is None:
+            self.open()
+        if self.columns is None:
+            self.columns = list(df.columns)
+            self._schema = parquet_schema(df)
+        else:
+            df = align_columns(df, self.columns)
+
+        self._pending.append(to_arrow_table(df, self._schema, self.invalid_dates))
+        self._pending_rows += len(df)
+        self.rows_written += len(df)
+        if self._pending_rows >= PARQUET_CHUNK_ROWS:
+            self._flush()
+
+    def _flush(self):
+        # Grava as linhas acumuladas, um arquivo por competência
+        if not self._pending:
+            return
+        table = pa.concat_tables(self._pending)
+        self._pending = []
+        self._pending_rows = 0
+        ds.write_dataset(table, self._tmp_path, format='parquet',
+                         partitioning=ds.partitioning(pa.schema([(PARTITION_COLUMN, pa.string())]), flavor='hive'),
+                         basename_template=f"parte-{self._parts:05d}-{{i}}.parquet",
+                         existing_data_behavior='overwrite_or_ignore')
+        self._parts += 1
+
+    def close(self):
+        """Grava as linhas pendentes e move o conjunto para o destino"""
+        if self._tmp_path is None:
+            self.open()
+        self._flush()
+        if self.invalid_dates:
+            print("Aviso: datas inválidas gravadas como nulas no Parquet: "
+                  + ', '.join(f"{column} ({n})" for column, n in self.invalid_dates.items()))
+        _replace_path(self._tmp_path, self.parquet_path)
+        return self.parquet_path
+
+    def abort(self):
+        """Descarta a pasta temporária, mantendo o destino como estava"""
+        self._pending = []
+        if self._tmp_path is not None:
+            shutil.rmtree(self._tmp_path, ignore_errors=True)
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
@@ -0,0 +1,293 @@
+import argparse
+import os
+import re
+import sqlite3
+import sys
+import time
+
+import pandas as pd
+
+# Adicionar o diretório atual ao caminho de busca do Python
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from transformation import money_centavos
+
+DEFAULT_DB_PATH = os.environ.get(
+    'PDF_ETL_DB_PATH', os.path.join(os.path.expanduser('~'), '.pdf_etl_app', 'notas.db'))
+
+# Colunas do DataFrame limpo -> colunas da tabela notas
+SQL_COLUMNS = {
+    'n° nota': 'numero_nota',
+    'dt,. emissão': 'data_emissao',
+    'competência': 'competencia',
+    'cpf/cnpj tomador': 'cpf_cnpj_tomador',
+    'tomador do serviço': 'tomador',
+    'serviço': 'servico',
+    'vrl. serviço': 'valor_servico',
+    'base de cálculo': 'base_calculo',
+    'aliq.': 'aliquota',
+    'iss próprio': 'iss_proprio',
+    'iss retido': 'iss_retido',
+    'nat. da operação': 'natureza_operacao',
+    'incidência': 'incidencia',
+    'situação': 'situacao',
+}
+
+# Colunas gravadas em centavos (INTEGER)
+CENTAVOS_COLUMNS = ['valor_servico', 'base_calculo', 'iss_proprio', 'iss_retido']
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS notas (
+    numero_nota TEXT PRIMARY KEY,
+    data_emissao TEXT,          -- AAAA-MM-DD
+    competencia TEXT,           -- AAAA-MM
+    cpf_cnpj_tomador TEXT,
+    tomador TEXT,
+    servico TEXT,
+    valor_servico INTEGER,      -- centavos
+    base_calculo INTEGER,       -- centavos
+    aliquota TEXT,
+    iss_proprio INTEGER,        -- centavos
+    iss_retido INTEGER,         -- centavos
+    natureza_operacao TEXT,
+    incidencia TEXT,
+    situacao TEXT,
+    arquivo TEXT,
+    atualizado_em TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_notas_competencia ON notas (competencia);
+CREATE INDEX IF NOT EXISTS idx_notas_cpf_cnpj_tomador ON notas (cpf_cnpj_tomador);
+CREATE INDEX IF NOT EXISTS idx_notas_situacao ON notas (situacao);
+"""
+
+# Linhas enviadas por chamada de executemany
+INSERT_BATCH_ROWS = 10_000
+
+def connect(db_path=None):
+    """Abre o banco de notas, criando a tabela e os índices se necessário"""
+    db_path = db_path or DEFAULT_DB_PATH
+    output_dir = os.path.dirname(os.path.abspath(db_path))
+    os.makedirs(output_dir, exist_ok=True)
+    conn = sqlite3.connect(db_path, timeout=30)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    conn.executescript(SCHEMA)
+    return conn
+
+def notas_records(df, source=None):
+    """Converte o DataFrame limpo nas colunas da tabela notas
+
+    Notas sem número são ignoradas. Datas vão para AAAA-MM-DD e competências
+    para AAAA-MM, de modo que intervalos possam ser consultados por ordem de
+    texto; valores monetários ficam em centavos.
+    """
+    data = pd.DataFrame(index=df.index)
+    for column, sql_column in SQL_COLUMNS.items():
+        if column not in df.columns:
+            data[sql_column] = None
+        elif sql_column in CENTAVOS_COLUMNS:
+            try:
+                # Valores ausentes (tabela sem a coluna, na concatenação) ficam nulos
+                data[sql_column] = money_centavos(df[column]).astype('Int64').where(df[column].notna())
+            except Exception as e:
+                print(f"Aviso: coluna '{column}' não gravada no banco: {str(e)}")
+                data[sql_column] = None
+        else:
+            values = df[column].astype(str).str.strip()
+            data[sql_column] = values.where(df[column].notna() & (values != ''), None)
+
+    data['data_emissao'] = pd.to_datetime(data['data_emissao'], format='%d/%m/%Y', errors='coerce').dt.strftime('%Y-%m-%d')
+    data['competencia'] = data['competencia'].str.replace(r'^(\d{2})/(\d{4})$', r'\2-\1', regex=True)
+    data['arquivo'] = os.path.basename(source) if source else None
+    data['atualizado_em'] = pd.Timestamp.now().strftime('%Y-%m-%d %H:%M:%S')
+
+    data = data[data['numero_nota'].notna()]
+    data = data.astype(object).where(data.notna(), None)
+    return data
+
+
+class SQLiteStreamWriter:
+    """Grava as notas no banco SQLite bloco a bloco, numa única transação
+
+    Cada bloco é enviado com executemany; notas já existentes (mesmo número)
+    são atualizadas. A transação só é confirmada quando o escritor é fechado
+    sem erros.
+
+    Uso:
+        with SQLiteStreamWriter('notas.db', source='2022.pdf') as writer:
+            for df in blocos:
+                writer.write(df)
+    """
+
+    def __init__(self, db_path=None, source=None):
+        self.db_path = db_path or DEFAULT_DB_PATH
+        self.source = source
+        self.columns = None
+        self.rows_written = 0
+        self._conn = None
+
+    def open(self):
+        self._conn = connect(self.db_path)
+        self._conn.execute('BEGIN')
+        return self
+
+    def write(self, df):
+        """Insere ou atualiza as notas de df"""
+        if self._conn is None:
+            self.open()
+        if self.columns is None:
+            self.columns = list(df.columns)
+
+        records = notas_records(df, self.source)
+        columns = list(records.columns)
+        updates = ', '.join(f"{column} = excluded.{column}" for column in columns if column != 'numero_nota')
+        sql = (f"INSERT INTO notas ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))}) "
+               f"ON CONFLICT(numero_nota) DO UPDATE SET {updates}")
+        rows = list(records.itertuples(index=False, name=None))
+        for start in range(0, len(rows), INSERT_BATCH_ROWS):
+            self._conn.executemany(sql, rows[start:start + INSERT_BATCH_ROWS])
+        self.rows_written += len(rows)
+
+    def close(self):
+        """Confirma a transação e fecha o banco"""
+        if self._conn is None:
+            self.open()
+        self._conn.commit()
+        self._conn.close()
+        return self.db_path
+
+    def abort(self):
+        """Desfaz a transação, mantendo o banco como estava"""
+        if self._conn is not None:
+            self._conn.rollback()
+            self._conn.close()
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def load_to_sqlite(df, db_path=None, source=None):
+    """Grava o DataFrame limpo no banco SQLite de notas (inserção ou atualização)
+
+    Args:
+        df: DataFrame limpo (valores monetários em centavos)
+        db_path: Caminho do banco (padrão: ~/.pdf_etl_app/notas.db ou PDF_ETL_DB_PATH)
+        source: Nome do PDF de origem, gravado na coluna arquivo
+    """
+    with SQLiteStreamWriter(db_path, source=source) as writer:
+        writer.write(df)
+    return writer.db_path
+
+
+def format_documento(documento):
+    """Formata CPF (11 dígitos) ou CNPJ (14 dígitos) como no livro; outros valores ficam como estão"""
+    digits = re.sub(r'\D', '', documento)
+    if len(digits) == 11:
+        return f"{digits[:3]}.{digits[3:6]}.{digits[6:9]}-{digits[9:]}"
+    if len(digits) == 14:
+        return f"{digits[:2]}.{digits[2:5]}.{digits[5:8]}/{digits[8:12]}-{digits[12:]}"
+    return documento
+
+def competencia_key(competencia):
+    """Converte MM/AAAA (ou AAAA) em AAAA-MM, como gravado no banco"""
+    match = re.fullmatch(r'(\d{2})/(\d{4})', competencia)
+    if match:
+        return f"{match.group(2)}-{match.group(1)}"
+    if re.fullmatch(r'\d{4}', competencia):
+        return competencia
+    raise ValueError(f"Competência inválida: {competencia} (use MM/AAAA ou AAAA)")
+
+def query_notas(db_path=None, documento=None, de=None, ate=None, situacao=None, nota=None, limit=None):
+    """Consulta as notas gravadas, usando os índices do banco
+
+    Args:
+        db_path: Caminho do banco
+        documento: CPF/CNPJ do tomador (com ou sem pontuação)
+        de, ate: Competências inicial e final (MM/AAAA ou AAAA), inclusive
+        situacao: Situação da nota (ex.: ESCRITURADA)
+        nota: Número da nota
+        limit: Número máximo de notas retornadas
+
+    Returns:
+        DataFrame com as notas, ordenadas por competência e número
+    """
+    conditions = []
+    params = []
+    if documento:
+        conditions.append('cpf_cnpj_tomador = ?')
+        params.append(format_documento(documento))
+    if de:
+        conditions.append('competencia >= ?')
+        params.append(competencia_key(de))
+    if ate:
+        key = competencia_key(ate)
+        # Um ano inteiro: até dezembro
+        conditions.append('competencia <= ?')
+        params.append(key if '-' in key else f"{key}-12")
+    if situacao:
+        conditions.append('situacao = ?')
+        params.append(situacao.upper())
+    if nota:
+        conditions.append('numero_nota = ?')
+        params.append(nota)
+
+    sql = 'SELECT * FROM notas'
+    if conditions:
+        sql += ' WHERE ' + ' AND '.join(conditions)
+    sql += ' ORDER BY competencia, numero_nota'
+    if limit:
+        sql += f' LIMIT {int(limit)}'
+
+    conn = connect(db_path)
+    try:
+        return pd.read_sql_query(sql, conn, params=params)
+    finally:
+        conn.close()
+
+def format_reais(centavos):
+    """Formata um valor em centavos como R$ 1.234,56"""
+    text = f"{int(centavos) / 100:,.2f}"
+    return 'R$ ' + text.replace(',', '_').replace('.', ',').replace('_', '.')
+
+def parse_args(argv=None):
+    """Lê os argumentos da linha de comando"""
+    parser = argparse.ArgumentParser(description='Consulta as notas acumuladas no banco SQLite')
+    parser.add_argument('--banco', default=DEFAULT_DB_PATH, help='Caminho do banco (padrão: ~/.pdf_etl_app/notas.db)')
+    parser.add_argument('--documento', help='CPF/CNPJ do tomador, com ou sem pontuação')
+    parser.add_argument('--de', help='Competência inicial (MM/AAAA ou AAAA)')
+    parser.add_argument('--ate', help='Competência final (MM/AAAA ou AAAA)')
+    parser.add_argument('--situacao', help='Situação da nota (ex.: ESCRITURADA)')
+    parser.add_argument('--nota', help='Número da nota')
+    parser.add_argument('--limite', type=int, help='Número máximo de notas exibidas')
+    parser.add_argument('--saida', help='Grava o resultado em CSV em vez de exibir')
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    start = time.perf_counter()
+    notas = query_notas(args.banco, documento=args.documento, de=args.de, ate=args.ate,
+                        situacao=args.situacao, nota=args.nota, limit=args.limite)
+    elapsed = (time.perf_counter() - start) * 1000
+
+    if args.saida:
+        notas.to_csv(args.saida, index=False, encoding='utf-8-sig', sep=';')
+        print(f"{len(notas)} notas gravadas em: {args.saida}")
+    else:
+        with pd.option_context('display.max_rows', None, 'display.width', None):
+            print(notas.drop(columns=['arquivo', 'atualizado_em']).to_string(index=False))
+
+    validas = notas[~notas['situacao'].fillna('').str.contains('CANCELAD')]
+    print(f"\n{len(notas)} notas ({len(validas)} não canceladas) em {elapsed:.1f} ms")
+    print(f"Base de cálculo: {format_reais(validas['base_calculo'].sum())} | "
+          f"ISS próprio: {format_reais(validas['iss_proprio'].sum())} | "
+          f"ISS retido: {format_reais(validas['iss_retido'].sum())}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,3 +1,4 @@
+import multiprocessing
 import os
 import sys
 import traceback
@@ -6,13 +7,35 @@ import traceback
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 # Importar os módulos do projeto
-from extraction import extract_tables_from_pdf
-from transformation import clean_dataframe
-from loading import load_to_excel
-from loading_csv import load_to_csv
+from extraction_checkpoint import DEFAULT_CHECKPOINT_DIR
+from pipeline import Pipeline
 
-def run_etl_cli(pdf_path, output_path, format_type='excel', include_header=True, apply_formatting=True):
-    """Executa o pipeline ETL em modo linha de comando"""
+def run_etl_cli(pdf_path, output_path, format_type='excel', include_header=True, apply_formatting=True, workers=1,
+                streaming=False, use_cache=True, refresh_cache=False, method='auto',
+                checkpoint_dir=None, resume=False, incremental=False, profile_dir=None,
+                metrics_path=None):
+    """Executa o pipeline ETL em modo linha de comando
+
+    format_type pode ser 'excel', 'csv', 'parquet' (conjunto Parquet
+    particionado por competência, gravado na pasta output_path) ou 'sqlite'
+    (notas inseridas ou atualizadas no banco output_path).
+
+    Com checkpoint_dir, a extração grava pontos de controle nessa pasta; com
+    resume=True (em DEFAULT_CHECKPOINT_DIR se checkpoint_dir não for
+    informado), uma extração interrompida continua a partir das páginas já
+    extraídas. Sem nenhum dos dois, não há pontos de controle.
+
+    Com incremental=True (Excel), as notas do PDF são acrescentadas à planilha
+    output_path já existente, sem regravar as notas anteriores.
+
+    Com um único processo de extração (workers=1), extração, limpeza e
+    gravação rodam sobrepostas (run_pipelined_etl): as tabelas já extraídas são
+    limpas e gravadas enquanto as páginas seguintes ainda são extraídas.
+
+    Com profile_dir, um perfil cProfile de cada etapa é gravado nessa pasta.
+    As métricas da execução (JSON) são gravadas em metrics_path ou em
+    ~/.pdf_etl_app/metrics.
+    """
     print(f"Iniciando processamento do arquivo: {pdf_path}")
     print(f"Saída será salva em: {output_path}")
     print(f"Formato de saída: {format_type.upper()}")
@@ -23,54 +46,42 @@ def run_etl_cli(pdf_path, output_path, format_type='excel', include_header=True,
         return False
 
     try:
-        # Extração
-        print("\n1. EXTRAÇÃO")
-        print("Extraindo tabelas do PDF...")
-        tables = extract_tables_from_pdf(pdf_path)
-        print(f"Extraídas {len(tables)} tabelas")
-
-        if not tables:
-            print("ERRO: Nenhuma tabela encontrada no PDF")
+        if resume and not checkpoint_dir:
+            checkpoint_dir = DEFAULT_CHECKPOINT_DIR
+        pipeline = Pipeline(pdf_path, method=method, workers=workers, use_cache=use_cache,
+                            refresh_cache=refresh_cache, checkpoint_dir=checkpoint_dir, resume=resume,
+                            profile_dir=profile_dir, metrics_path=metrics_path)
+        pipeline.run(output_path, format_type=format_type, include_header=include_header,
+                     streaming=streaming, incremental=incremental)
+        if not pipeline.stats['extracao'].rows:
+            # Nenhuma tabela encontrada no PDF
             return False
 
-        # Transformação
-        print("\n2. TRANSFORMAÇÃO")
-        print("Limpando e transformando dados...")
-        cleaned_tables = [clean_dataframe(df) for df in tables]
-        print(f"Transformadas {len(cleaned_tables)} tabelas")
-
-        # Combinar todas as tabelas em uma única
-        print("\nCombinando todas as tabelas...")
-        import pandas as pd
-        combined_df = pd.concat(cleaned_tables, ignore_index=True)
-        print(f"Tabela combinada: {len(combined_df)} linhas, {len(combined_df.columns)} colunas")
-
-        # Carregamento
-        print("\n3. CARREGAMENTO")
-        if format_type.lower() == 'csv':
-            print("Salvando dados no CSV...")
-            output_file = load_to_csv(combined_df, output_path, include_header=include_header)
-            print(f"Dados salvos em: {output_file}")
-        else:  # Excel é o padrão
-            print("Salvando dados no Excel...")
-            output_file = load_to_excel(combined_df, output_path)
-            print(f"Dados salvos em: {output_file}")
-
         # Verificar se o arquivo de saída foi criado
-        if os.path.exists(output_path):
-            print("\nPROCESSAMENTO CONCLUÍDO COM SUCESSO!")
-            print(f"Arquivo criado: {output_path}")
-            print(f"Tamanho do arquivo: {os.path.getsize(output_path)} bytes")
-            return True
-        else:
-            print(f"ERRO: Arquivo não foi criado: {output_path}")
-            return False
+        return _check_output(output_path)
 
     except Exception as e:
         print(f"\nERRO durante o processamento: {str(e)}")
         traceback.print_exc()
         return False
 
+def _check_output(output_path):
+    """Verifica se o arquivo de saída foi criado e informa o resultado"""
+    if os.path.exists(output_path):
+        print("\nPROCESSAMENTO CONCLUÍDO COM SUCESSO!")
+        print(f"Arquivo criado: {output_path}")
+        if os.path.isdir(output_path):
+            # Conjunto Parquet: soma dos arquivos da pasta
+            size = sum(os.path.getsize(os.path.join(root, name))
+                       for root, _, names in os.walk(output_path) for name in names)
+        else:
+            size = os.path.getsize(output_path)
+        print(f"Tamanho do arquivo: {size} bytes")
+        return True
+    else:
+        print(f"ERRO: Arquivo não foi criado: {output_path}")
+        return False
+
 def main():
     # Tentar usar a interface gráfica
     try:
@@ -85,11 +96,13 @@ def main():
         # Definir caminhos e opções
         pdf_path = r"C:\Users\Murilo\Desktop\pdf_etl_app\Arquivo\2022.pdf"
         output_path = r"C:\Users\Murilo\Desktop\pdf_etl_app\Arquivo\saida_cli.xlsx"
-        format_type = 'excel'  # ou 'csv'
+        format_type = 'excel'  # ou 'csv', 'parquet'
         include_header = True
 
         # Executar o pipeline ETL
         run_etl_cli(pdf_path, output_path, format_type, include_header)
 
 if __name__ == '__main__':
+    # Necessário para a extração paralela no executável gerado pelo PyInstaller
+    multiprocessing.freeze_support()
     main()
@@ -1,3 +1,4 @@
+import argparse
 import os
 import sys
 
@@ -5,14 +6,30 @@ import sys
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 # Importar os módulos do projeto
-from extraction import extract_tables_from_pdf
-from transformation import clean_dataframe
-from loading import load_to_excel
+from extraction_checkpoint import DEFAULT_CHECKPOINT_DIR
+from pipeline import Pipeline
 
-def run_etl_cli(pdf_path, excel_path):
-    """Executa o pipeline ETL em modo linha de comando"""
+def run_etl_cli(pdf_path, excel_path, workers=1, streaming=False, use_cache=True, refresh_cache=False,
+                method='auto', checkpoint_dir=None, resume=False, incremental=False,
+                profile_dir=None, metrics_path=None):
+    """Executa o pipeline ETL em modo linha de comando
+
+    Com incremental=True, as notas do PDF são acrescentadas à planilha
+    excel_path já existente (só as notas novas e as competências afetadas do
+    resumo são gravadas).
+
+    Pontos de controle da extração só são gravados com checkpoint_dir ou
+    resume=True (em DEFAULT_CHECKPOINT_DIR se checkpoint_dir não for informado).
+
+    Com workers=1, extração, limpeza e gravação rodam sobrepostas
+    (run_pipelined_etl). Com profile_dir, um perfil cProfile de cada etapa é
+    gravado nessa pasta. As métricas da execução (JSON) são gravadas em
+    metrics_path ou em ~/.pdf_etl_app/metrics.
+    """
     print(f"Iniciando processamento do arquivo: {pdf_path}")
     print(f"Saída será salva em: {excel_path}")
+    if workers > 1:
+        print(f"Extração paralela com {workers} processos")
     
     # Verificar se o arquivo PDF existe
     if not os.path.exists(pdf_path):
@@ -20,28 +37,16 @@ def run_etl_cli(pdf_path, excel_path):
         return False
     
     try:
-        # Extração
-        print("\n1. EXTRAÇÃO")
-        print("Extraindo tabelas do PDF...")
-        tables = extract_tables_from_pdf(pdf_path)
-        print(f"Extraídas {len(tables)} tabelas")
-        
-        if not tables:
-            print("ERRO: Nenhuma tabela encontrada no PDF")
+        if resume and not checkpoint_dir:
+            checkpoint_dir = DEFAULT_CHECKPOINT_DIR
+        pipeline = Pipeline(pdf_path, method=method, workers=workers, use_cache=use_cache,
+                            refresh_cache=refresh_cache, checkpoint_dir=checkpoint_dir, resume=resume,
+                            profile_dir=profile_dir, metrics_path=metrics_path)
+        pipeline.run(excel_path, streaming=streaming, incremental=incremental)
+        if not pipeline.stats['extracao'].rows:
+            # Nenhuma tabela encontrada no PDF
             return False
         
-        # Transformação
-        print("\n2. TRANSFORMAÇÃO")
-        print("Limpando e transformando dados...")
-        cleaned_tables = [clean_dataframe(df) for df in tables]
-        print(f"Transformadas {len(cleaned_tables)} tabelas")
-        
-        # Carregamento
-        print("\n3. CARREGAMENTO")
-        print("Salvando dados no Excel...")
-        excel_file = load_to_excel(cleaned_tables[0], excel_path)
-        print(f"Dados salvos em: {excel_file}")
-        
         # Verificar se o arquivo Excel foi criado
         if os.path.exists(excel_path):
             print("\nPROCESSAMENTO CONCLUÍDO COM SUCESSO!")
@@ -58,13 +63,49 @@ def run_etl_cli(pdf_path, excel_path):
         traceback.print_exc()
         return False
 
-def main():
-    # Definir caminhos
-    pdf_path = r"C:\Users\Murilo\Desktop\pdf_etl_app\Arquivo\2022.pdf"
-    excel_path = r"C:\Users\Murilo\Desktop\pdf_etl_app\Arquivo\saida_cli.xlsx"
-    
+def parse_args(argv=None):
+    """Lê os argumentos da linha de comando"""
+    parser = argparse.ArgumentParser(description='ETL de PDF (Livro de Serviços Prestados) para Excel')
+    parser.add_argument('pdf_path', nargs='?',
+                        default=r"C:\Users\Murilo\Desktop\pdf_etl_app\Arquivo\2022.pdf",
+                        help='Arquivo PDF de entrada')
+    parser.add_argument('excel_path', nargs='?',
+                        default=r"C:\Users\Murilo\Desktop\pdf_etl_app\Arquivo\saida_cli.xlsx",
+                        help='Arquivo Excel de saída')
+    parser.add_argument('--metodo', dest='method', default='auto',
+                        choices=['auto', 'camelot', 'pdfplumber', 'template'],
+                        help="Método de extração (padrão: auto; 'template' é o mais rápido para o layout do livro)")
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Número de processos para extração paralela (padrão: 1)')
+    parser.add_argument('--streaming', action='store_true',
+                        help='Extrai, limpa e grava página a página, com uso de memória constante')
+    parser.add_argument('--no-cache', dest='use_cache', action='store_false',
+                        help='Não usa nem grava o cache de extração')
+    parser.add_argument('--refresh-cache', action='store_true',
+                        help='Refaz a extração e substitui a entrada do cache')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Acrescenta só as notas novas a uma planilha já existente')
+    parser.add_argument('--resume', action='store_true',
+                        help='Grava pontos de controle e retoma uma extração interrompida, '
+                             'reaproveitando as páginas já extraídas')
+    parser.add_argument('--checkpoint-dir',
+                        help='Grava os pontos de controle da extração nesta pasta '
+                             f'(padrão com --resume: {DEFAULT_CHECKPOINT_DIR})')
+    parser.add_argument('--profile', dest='profile_dir', metavar='PASTA',
+                        help='Grava um perfil cProfile de cada etapa nesta pasta (.prof e resumo .txt); '
+                             'a extração roda num único processo (--workers é ignorado)')
+    parser.add_argument('--metricas', dest='metrics_path', metavar='ARQUIVO',
+                        help='Arquivo JSON de métricas da execução (padrão: ~/.pdf_etl_app/metrics/<pdf>-<data>.json)')
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+
     # Executar o pipeline ETL
-    run_etl_cli(pdf_path, excel_path)
+    run_etl_cli(args.pdf_path, args.excel_path, workers=args.workers, streaming=args.streaming,
+                use_cache=args.use_cache, refresh_cache=args.refresh_cache, method=args.method,
+                checkpoint_dir=args.checkpoint_dir, resume=args.resume, incremental=args.incremental,
+                profile_dir=args.profile_dir, metrics_path=args.metrics_path)
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,135 @@
+import ctypes
+import json
+import os
+import sys
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - depende do ambiente (Windows)
+    resource = None
+
+# Adicionar o diretório atual ao caminho de busca do Python
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from extraction import count_pages
+
+DEFAULT_METRICS_DIR = os.environ.get(
+    'PDF_ETL_METRICS_DIR', os.path.join(os.path.expanduser('~'), '.pdf_etl_app', 'metrics'))
+
+# Versão do formato do arquivo de métricas (muda quando campos são renomeados ou removidos)
+METRICS_VERSION = 1
+
+def peak_rss_mb(children=False):
+    """Pico de memória residente (RSS) do processo em MB, ou None se não puder ser medido
+
+    Com children=True, retorna o maior pico entre os processos filhos já
+    encerrados (processo de extração do pipeline, processos paralelos).
+    """
+    if resource is not None:
+        usage = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF)
+        # ru_maxrss vem em bytes no macOS e em KB nos demais sistemas
+        scale = 1 if sys.platform == 'darwin' else 1024
+        return round(usage.ru_maxrss * scale / 2 ** 20, 1)
+    if sys.platform == 'win32' and not children:  # pragma: no cover - depende do ambiente
+        return _windows_peak_rss_mb()
+    return None
+
+def _windows_peak_rss_mb():  # pragma: no cover - depende do ambiente
+    """Pico do working set do processo no Windows (GetProcessMemoryInfo)"""
+    class ProcessMemoryCounters(ctypes.Structure):
+        _fields_ = [('cb', ctypes.c_ulong), ('PageFaultCount', ctypes.c_ulong),
+                    ('PeakWorkingSetSize', ctypes.c_size_t), ('WorkingSetSize', ctypes.c_size_t),
+                    ('QuotaPeakPagedPoolUsage', ctypes.c_size_t), ('QuotaPagedPoolUsage', ctypes.c_size_t),
+                    ('QuotaPeakNonPagedPoolUsage', ctypes.c_size_t), ('QuotaNonPagedPoolUsage', ctypes.c_size_t),
+                    ('PagefileUsage', ctypes.c_size_t), ('PeakPagefileUsage', ctypes.c_size_t)]
+
+    counters = ProcessMemoryCounters()
+    counters.cb = ctypes.sizeof(counters)
+    process = ctypes.windll.kernel32.GetCurrentProcess()
+    if not ctypes.windll.psapi.GetProcessMemoryInfo(process, ctypes.byref(counters), counters.cb):
+        return None
+    return round(counters.PeakWorkingSetSize / 2 ** 20, 1)
+
+def _rate(amount, seconds):
+    return round(amount / seconds, 2) if seconds else None
+
+def collect_metrics(timer, pdf_path, output_path, format_type, mode, started_at, rows_written, error=None):
+    """Monta o dicionário de métricas de uma execução a partir das etapas medidas em timer
+
+    Args:
+        timer: StageTimer (ou Pipeline) da execução
+        pdf_path: PDF processado
+        output_path: Arquivo (ou pasta/banco) de saída
+        format_type: Formato de saída
+        mode: Modo de execução ('pipeline', 'streaming' ou 'sequencial')
+        started_at: datetime do início da execução
+        rows_written: Linhas gravadas na saída
+        error: Mensagem de erro, se a execução falhou
+    """
+    stats = timer.stats
+    extraction = stats['extracao']
+    transformation = stats['transformacao']
+    skipped = extraction.pages_skipped
+    try:
+        total_pages = count_pages(pdf_path)
+    except Exception:
+        total_pages = None
+
+    return {
+        'versao': METRICS_VERSION,
+        'arquivo': os.path.basename(pdf_path),
+        'tamanho_pdf_bytes': os.path.getsize(pdf_path) if os.path.exists(pdf_path) else None,
+        'saida': output_path,
+        'formato': format_type,
+        'modo': mode,
+        'metodo': getattr(timer, 'method', None),
+        'workers': getattr(timer, 'workers', None),
+        'inicio': started_at.isoformat(timespec='seconds'),
+        'duracao_s': round(timer.wall_time, 4),
+        'sucesso': error is None,
+        'erro': error,
+        'paginas': {
+            'total': total_pages,
+            'processadas': extraction.pages,
+            # Descartadas pelo pré-filtro por não terem números de nota (capa, termos de abertura e
+            # encerramento); None se o pré-filtro não rodou, como numa extração em cache
+            'ignoradas': skipped,
+            # Enviadas à detecção de tabelas sem que nenhuma tabela relevante fosse encontrada
+            'sem_tabelas': extraction.pages_checked - skipped - extraction.pages if skipped is not None else None,
+        },
+        'tabelas': {
+            'total': extraction.tables,
+            'por_metodo': dict(extraction.methods),
+        },
+        'linhas': {
+            'extraidas': extraction.rows,
+            'transformadas': transformation.rows,
+            'gravadas': rows_written,
+        },
+        'vazao': {
+            'paginas_por_s': _rate(extraction.pages, timer.wall_time),
+            'linhas_por_s': _rate(transformation.rows, timer.wall_time),
+        },
+        'memoria': {
+            'pico_rss_mb': peak_rss_mb(),
+            'pico_rss_processos_filhos_mb': peak_rss_mb(children=True),
+        },
+        'etapas': [stage.as_dict() for stage in stats.values() if stage.calls],
+    }
+
+def metrics_file_path(pdf_path, metrics_dir=None, started_at=None):
+    """Caminho do arquivo de métricas de uma execução: <pasta>/<pdf>-AAAAMMDD-HHMMSS.json"""
+    started_at = started_at or datetime.now()
+    name = os.path.splitext(os.path.basename(pdf_path))[0]
+    return os.path.join(metrics_dir or DEFAULT_METRICS_DIR, f"{name}-{started_at:%Y%m%d-%H%M%S}.json")
+
+def write_metrics(metrics, metrics_path):
+    """Grava as métricas em JSON (num arquivo temporário que substitui o destino ao final)"""
+    output_dir = os.path.dirname(os.path.abspath(metrics_path))
+    os.makedirs(output_dir, exist_ok=True)
+    tmp_path = f"{metrics_path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(metrics, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, metrics_path)
+    return metrics_path
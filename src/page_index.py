@@ -0,0 +1,89 @@
+import json
+import os
+import re
+import sys
+
+import pypdfium2 as pdfium
+
+# Adicionar o diretório atual ao caminho de busca do Python
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from extraction_cache import file_hash
+
+DEFAULT_INDEX_DIR = os.environ.get(
+    'PDF_ETL_INDEX_DIR', os.path.join(os.path.expanduser('~'), '.pdf_etl_app', 'index'))
+
+# Incrementar sempre que a forma de montar o índice mudar
+INDEX_VERSION = 1
+
+# Número da nota seguido da data de emissão (DD/MM/AAAA) na camada de texto
+NOTE_DATE_RE = re.compile(r'2022000000\d+\s+\d{2}/(\d{2})/(\d{4})')
+
+def iter_page_texts(pdf_path, page_numbers=None):
+    """Lê a camada de texto das páginas, produzindo pares (página, texto)
+
+    Args:
+        pdf_path: Caminho para o arquivo PDF
+        page_numbers: Lista de páginas (a partir de 1), ou None para todas
+    """
+    pdf = pdfium.PdfDocument(pdf_path)
+    try:
+        if page_numbers is None:
+            page_numbers = range(1, len(pdf) + 1)
+        for page_num in page_numbers:
+            page = pdf[page_num - 1]
+            textpage = page.get_textpage()
+            try:
+                yield page_num, textpage.get_text_range()
+            finally:
+                textpage.close()
+                page.close()
+    finally:
+        pdf.close()
+
+def build_page_index(pdf_path):
+    """Monta o índice {página: [competências]} a partir da camada de texto do PDF
+
+    A competência de cada nota é o mês de emissão (MM/AAAA), como na coluna
+    'competência' gerada por clean_dataframe. Só entram no índice as páginas
+    com notas; as competências aparecem na ordem em que surgem na página.
+    """
+    index = {}
+    for page_num, text in iter_page_texts(pdf_path):
+        competencias = []
+        for mes, ano in NOTE_DATE_RE.findall(text):
+            competencia = f"{mes}/{ano}"
+            if competencia not in competencias:
+                competencias.append(competencia)
+        if competencias:
+            index[page_num] = competencias
+    return index
+
+def load_page_index(pdf_path, index_dir=None):
+    """Retorna o índice de competências do PDF, montando e gravando na primeira vez
+
+    O índice é gravado em JSON, identificado pelo conteúdo do PDF, e reaproveitado
+    nas consultas seguintes ao mesmo arquivo.
+    """
+    index_dir = index_dir or DEFAULT_INDEX_DIR
+    path = os.path.join(index_dir, f"{file_hash(pdf_path)}.json")
+    if os.path.exists(path):
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('versao') == INDEX_VERSION:
+            return {int(page_num): competencias for page_num, competencias in data['paginas'].items()}
+
+    print(f"Montando índice de competências de {pdf_path}...")
+    index = build_page_index(pdf_path)
+    os.makedirs(index_dir, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'versao': INDEX_VERSION, 'paginas': index}, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+    return index
+
+def pages_for_competencias(index, competencias):
+    """Retorna, em ordem, as páginas com notas de alguma das competências"""
+    wanted = set(competencias)
+    return sorted(page_num for page_num, page_competencias in index.items()
+                  if wanted.intersection(page_competencias))
@@ -0,0 +1,213 @@
+import os
+import sys
+import time
+from datetime import datetime
+
+import pandas as pd
+
+# Adicionar o diretório atual ao caminho de busca do Python
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+# Importar os módulos do projeto
+from extraction import extract_tables_from_pdf
+from transformation import clean_dataframe
+from loading import append_to_excel, load_to_excel
+from loading_csv import load_to_csv
+from loading_parquet import load_to_parquet
+from loading_sqlite import load_to_sqlite
+from metrics import collect_metrics, metrics_file_path, write_metrics
+from stages import ProfileHook, StageTimer
+from streaming import run_pipelined_etl, run_streaming_etl
+
+class Pipeline(StageTimer):
+    """Pipeline ETL de um PDF: extração, transformação, combinação e carregamento
+
+    Reúne a sequência usada pela linha de comando, pela interface e pelos
+    scripts de diagnóstico. Cada etapa é medida (tempo de relógio, tempo de
+    CPU, linhas e páginas) e notifica os ganchos em hooks (ver StageTimer);
+    com profile_dir, um ProfileHook grava um perfil cProfile por etapa. O
+    perfil só enxerga o processo atual: com profile_dir, a extração roda num
+    único processo, e um workers maior é ignorado com um aviso.
+
+    Cada execução de run() grava um arquivo JSON de métricas (tempo por etapa,
+    páginas processadas e ignoradas, tabelas por motor, linhas, vazão e pico
+    de memória) em metrics_path ou, por padrão, em
+    ~/.pdf_etl_app/metrics/<pdf>-AAAAMMDD-HHMMSS.json (PDF_ETL_METRICS_DIR).
+    Com metrics=False, nenhum arquivo é gravado.
+
+    Uso:
+        pipeline = Pipeline('2022.pdf', method='template', profile_dir='perfis')
+        pipeline.run('saida.xlsx')
+
+    ou, etapa a etapa:
+        tables = pipeline.extract()
+        df = pipeline.combine(pipeline.transform(tables))
+        pipeline.print_report()
+    """
+
+    def __init__(self, pdf_path, method='auto', workers=1, use_cache=True, refresh_cache=False,
+                 checkpoint_dir=None, resume=False, transform_options=None, hooks=None, profile_dir=None,
+                 metrics=True, metrics_path=None):
+        if profile_dir and workers > 1:
+            print(f"Aviso: com perfil por etapa, a extração roda num único processo ({workers} processos ignorados)")
+            workers = 1
+        self.pdf_path = pdf_path
+        self.method = method
+        self.workers = workers
+        self.use_cache = use_cache
+        self.refresh_cache = refresh_cache
+        self.checkpoint_dir = checkpoint_dir
+        self.resume = resume
+        self.transform_options = transform_options or {}
+        self.profile_dir = profile_dir
+        self.metrics = metrics
+        self.metrics_path = metrics_path
+        hooks = list(hooks or [])
+        if profile_dir:
+            prefix = os.path.splitext(os.path.basename(pdf_path))[0]
+            hooks.append(ProfileHook(profile_dir, prefix=prefix))
+        super().__init__(hooks)
+        self._pages = []
+        self.data = None
+
+    def extract(self, pages=None, competencias=None):
+        """Extrai as tabelas do PDF (ou das páginas/competências informadas)"""
+        print("\n1. EXTRAÇÃO")
+        print("Extraindo tabelas do PDF...")
+        with self.stage('extracao') as stats:
+            page_tables = extract_tables_from_pdf(self.pdf_path, method=self.method, workers=self.workers,
+                                                  use_cache=self.use_cache, refresh_cache=self.refresh_cache,
+                                                  checkpoint_dir=self.checkpoint_dir, resume=self.resume,
+                                                  pages=pages, competencias=competencias, with_pages=True,
+                                                  on_prefilter=self.record_prefilter)
+            self._pages = [page_num for page_num, _ in page_tables]
+            for page_num, df in page_tables:
+                stats.add_table(df, page_num)
+        print(f"Extraídas {len(page_tables)} tabelas")
+        return [df for _, df in page_tables]
+
+    def transform(self, tables):
+        """Limpa cada tabela extraída"""
+        print("\n2. TRANSFORMAÇÃO")
+        print("Limpando e transformando dados...")
+        with self.stage('transformacao') as stats:
+            cleaned_tables = [clean_dataframe(df, **self.transform_options) for df in tables]
+            for df in cleaned_tables:
+                stats.add_table(df)
+            stats.add_pages(self._pages)
+        print(f"Transformadas {len(cleaned_tables)} tabelas")
+        return cleaned_tables
+
+    def combine(self, cleaned_tables):
+        """Combina as tabelas limpas numa única tabela"""
+        print("\nCombinando todas as tabelas...")
+        with self.stage('combinacao') as stats:
+            combined_df = pd.concat(cleaned_tables, ignore_index=True)
+            stats.rows += len(combined_df)
+            stats.add_pages(self._pages)
+        print(f"Tabela combinada: {len(combined_df)} linhas, {len(combined_df.columns)} colunas")
+        return combined_df
+
+    def process(self, pages=None, competencias=None):
+        """Extrai, limpa e combina; retorna o DataFrame combinado ou None se não houver tabelas"""
+        tables = self.extract(pages=pages, competencias=competencias)
+        if not tables:
+            print("ERRO: Nenhuma tabela encontrada no PDF")
+            return None
+        return self.combine(self.transform(tables))
+
+    def load(self, df, output_path, format_type='excel', include_header=True, incremental=False):
+        """Grava df no formato escolhido; retorna o número de linhas gravadas
+
+        Com incremental=True (Excel), só as notas novas são acrescentadas à
+        planilha existente, e o número retornado é o de notas acrescentadas.
+        """
+        print("\n3. CARREGAMENTO")
+        with self.stage('carregamento') as stats:
+            rows = len(df)
+            if format_type.lower() == 'csv':
+                print("Salvando dados no CSV...")
+                load_to_csv(df, output_path, include_header=include_header)
+            elif format_type.lower() == 'parquet':
+                print("Salvando dados no Parquet...")
+                load_to_parquet(df, output_path)
+            elif format_type.lower() == 'sqlite':
+                print("Salvando dados no banco SQLite...")
+                load_to_sqlite(df, output_path, source=self.pdf_path)
+            elif incremental:
+                print("Acrescentando notas novas ao Excel existente...")
+                rows = append_to_excel(df, output_path)
+            else:  # Excel é o padrão
+                print("Salvando dados no Excel...")
+                load_to_excel(df, output_path)
+            stats.rows += rows
+            stats.add_pages(self._pages)
+        if incremental and format_type.lower() == 'excel':
+            print(f"{rows} notas acrescentadas em: {output_path}")
+        else:
+            print(f"Dados salvos em: {output_path}")
+        return rows
+
+    def run(self, output_path, format_type='excel', include_header=True, streaming=False,
+            incremental=False, progress=None, keep_data=False):
+        """Executa o pipeline completo e imprime o relatório das etapas
+
+        Com um único processo de extração, as etapas rodam sobrepostas
+        (run_pipelined_etl); com streaming=True, página a página numa única
+        thread (run_streaming_etl). Com incremental=True, keep_data=True ou
+        workers > 1, as etapas rodam uma após a outra; com keep_data=True, o
+        DataFrame combinado fica em self.data. Com profile_dir, o modo
+        sobreposto dá lugar ao streaming, para que o perfil de cada etapa
+        inclua a extração, que no modo sobreposto roda em outro processo.
+
+        Returns:
+            Número de linhas gravadas (0 se nenhuma tabela foi encontrada)
+        """
+        started_at = datetime.now()
+        start = time.perf_counter()
+        rows = 0
+        mode = error = None
+        try:
+            if incremental or keep_data or (self.workers > 1 and not streaming):
+                mode = 'sequencial'
+                df = self.process()
+                rows = 0 if df is None else self.load(df, output_path, format_type, include_header, incremental)
+                if keep_data:
+                    self.data = df
+            else:
+                if streaming or self.profile_dir:
+                    # Extração, transformação e carregamento página a página
+                    print("\nModo streaming: extraindo, limpando e gravando página a página...")
+                    mode, run_etl = 'streaming', run_streaming_etl
+                else:
+                    # Extração, transformação e carregamento sobrepostos
+                    print("\nExtraindo, limpando e gravando em paralelo (pipeline)...")
+                    mode, run_etl = 'pipeline', run_pipelined_etl
+                rows = run_etl(self.pdf_path, output_path, format_type=format_type, include_header=include_header,
+                               method=self.method, transform_options=self.transform_options, progress=progress,
+                               use_cache=self.use_cache, refresh_cache=self.refresh_cache,
+                               checkpoint_dir=self.checkpoint_dir, resume=self.resume, timer=self)
+                if rows:
+                    print(f"Gravadas {rows} linhas em: {output_path}")
+                else:
+                    print("ERRO: Nenhuma tabela encontrada no PDF")
+        except Exception as e:
+            error = str(e)
+            raise
+        finally:
+            self.wall_time += time.perf_counter() - start
+            self.close()
+            if self.metrics:
+                self._write_metrics(output_path, format_type, mode, started_at, rows, error)
+        self.print_report()
+        return rows
+
+    def _write_metrics(self, output_path, format_type, mode, started_at, rows, error):
+        """Grava o arquivo JSON de métricas da execução; uma falha aqui não interrompe o ETL"""
+        try:
+            metrics = collect_metrics(self, self.pdf_path, output_path, format_type, mode, started_at, rows, error)
+            path = self.metrics_path or metrics_file_path(self.pdf_path, started_at=started_at)
+            write_metrics(metrics, path)
+            print(f"Métricas da execução gravadas em: {path}")
+        except Exception as e:
+            print(f"Aviso: métricas da execução não gravadas: {str(e)}")
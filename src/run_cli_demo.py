@@ -5,10 +5,7 @@ import sys
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 # Importar os módulos do projeto
-from extraction import extract_tables_from_pdf
-from transformation import clean_dataframe
-from loading import load_to_excel
-from loading_csv import load_to_csv
+from pipeline import Pipeline
 
 def run_demo():
     """Executa uma demonstração do pipeline ETL em modo linha de comando"""
@@ -26,12 +23,17 @@ def run_demo():
     print("=" * 80)
 
     try:
+        # Opções de transformação
+        transform_options = {
+            'remove_empty_rows': True,
+            'remove_empty_cols': True,
+            'convert_dates': False,  # Desativar conversão de datas para evitar conflitos
+            'convert_money': True
+        }
+        pipeline = Pipeline(pdf_path, method='auto', transform_options=transform_options)
+
         # Extração
-        print("\n1. EXTRAÇÃO")
-        print("-" * 40)
-        print("Extraindo tabelas do PDF...")
-        tables = extract_tables_from_pdf(pdf_path, method='auto')
-        print(f"Extraídas {len(tables)} tabelas")
+        tables = pipeline.extract()
 
         if not tables:
             print("ERRO: Nenhuma tabela encontrada no PDF")
@@ -42,31 +44,12 @@ def run_demo():
         print(tables[0].head())
 
         # Transformação
-        print("\n2. TRANSFORMAÇÃO")
-        print("-" * 40)
-        print("Limpando e transformando dados...")
-
-        # Opções de transformação
-        transform_options = {
-            'remove_empty_rows': True,
-            'remove_empty_cols': True,
-            'convert_dates': False,  # Desativar conversão de datas para evitar conflitos
-            'convert_money': True
-        }
-
-        cleaned_tables = [clean_dataframe(df, **transform_options) for df in tables]
-        print(f"Transformadas {len(cleaned_tables)} tabelas")
+        cleaned_tables = pipeline.transform(tables)
 
         # Mostrar exemplo da primeira tabela limpa
         print("\nExemplo da primeira tabela limpa (primeiras 5 linhas):")
         print(cleaned_tables[0].head())
 
-        # Combinar todas as tabelas em uma única
-        print("\nCombinando todas as tabelas...")
-        import pandas as pd
-        combined_df = pd.concat(cleaned_tables, ignore_index=True)
-        print(f"Tabela combinada: {len(combined_df)} linhas, {len(combined_df.columns)} colunas")
-
         # Formatar datas corretamente antes de exportar
         print("\nFormatando datas...")
         # Extrair as datas originais do PDF
@@ -89,22 +72,13 @@ def run_demo():
                     if len(date_values) == len(cleaned_tables[i]):
                         cleaned_tables[i][col] = date_values
 
-        # Recombinar as tabelas com as datas corrigidas
-        combined_df = pd.concat(cleaned_tables, ignore_index=True)
-
-        # Carregamento para Excel
-        print("\n3. CARREGAMENTO PARA EXCEL")
-        print("-" * 40)
-        print("Salvando dados no Excel...")
-        excel_file = load_to_excel(combined_df, excel_path)
-        print(f"Dados salvos em: {excel_file}")
-
-        # Carregamento para CSV
-        print("\n4. CARREGAMENTO PARA CSV")
-        print("-" * 40)
-        print("Salvando dados no CSV...")
-        csv_file = load_to_csv(combined_df, csv_path, include_header=True)
-        print(f"Dados salvos em: {csv_file}")
+        # Combinar as tabelas com as datas corrigidas
+        combined_df = pipeline.combine(cleaned_tables)
+
+        # Carregamento para Excel e para CSV
+        pipeline.load(combined_df, excel_path)
+        pipeline.load(combined_df, csv_path, format_type='csv', include_header=True)
+        pipeline.print_report()
 
         # Verificar se os arquivos foram criados
         if os.path.exists(excel_path) and os.path.exists(csv_path):
@@ -0,0 +1,182 @@
+import cProfile
+import os
+import pstats
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+# Etapas do pipeline, na ordem de execução, e seus nomes no relatório
+STAGES = {
+    'extracao': 'Extração',
+    'transformacao': 'Transformação',
+    'combinacao': 'Combinação',
+    'carregamento': 'Carregamento',
+}
+
+# Funções listadas no resumo em texto de cada perfil
+PROFILE_TOP_FUNCTIONS = 30
+
+
+class StageStats:
+    """Tempo de relógio, tempo de CPU, tabelas, linhas e páginas acumulados de uma etapa
+
+    Uma etapa pode ser executada várias vezes (uma por tabela, no modo
+    streaming); os valores são somados a cada execução. Em methods, as
+    tabelas são contadas pelo motor de extração que as produziu
+    (DataFrame.attrs['metodo']). Na extração, pages_checked e pages_skipped
+    são as páginas verificadas e descartadas pelo pré-filtro (None se o
+    pré-filtro não rodou, ex.: extração em cache).
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.wall_time = 0.0
+        self.cpu_time = 0.0
+        self.rows = 0
+        self.tables = 0
+        self.methods = Counter()
+        self.calls = 0
+        self.pages_checked = None
+        self.pages_skipped = None
+        self._pages = set()
+
+    @property
+    def pages(self):
+        """Número de páginas distintas que passaram pela etapa"""
+        return len(self._pages)
+
+    def add_pages(self, pages):
+        self._pages.update(pages)
+
+    def add_prefilter(self, checked, skipped):
+        """Soma as páginas verificadas e as descartadas pelo pré-filtro"""
+        self.pages_checked = (self.pages_checked or 0) + checked
+        self.pages_skipped = (self.pages_skipped or 0) + skipped
+
+    def add_table(self, df, page_num=None):
+        """Conta uma tabela (e suas linhas) que passou pela etapa"""
+        self.tables += 1
+        self.rows += len(df)
+        method = df.attrs.get('metodo')
+        if method:
+            self.methods[method] += 1
+        if page_num is not None:
+            self._pages.add(page_num)
+
+    def as_dict(self):
+        stats = {'etapa': self.name, 'tempo_s': round(self.wall_time, 4), 'cpu_s': round(self.cpu_time, 4),
+                 'tabelas': self.tables, 'linhas': self.rows, 'paginas': self.pages, 'execucoes': self.calls}
+        if self.methods:
+            stats['tabelas_por_metodo'] = dict(self.methods)
+        if self.pages_skipped is not None:
+            stats['paginas_ignoradas'] = self.pages_skipped
+        return stats
+
+
+class ProfileHook:
+    """Gancho que grava um perfil cProfile por etapa em output_dir
+
+    Cada etapa gera <prefixo>.<etapa>.prof, que pode ser aberto com pstats ou
+    snakeviz, e <prefixo>.<etapa>.txt, com as funções de maior tempo
+    acumulado. Os perfis de uma etapa executada várias vezes são somados.
+    """
+
+    def __init__(self, output_dir, prefix='pipeline'):
+        self.output_dir = output_dir
+        self.prefix = prefix
+        self._profiles = {}
+
+    def stage_started(self, name):
+        self._profiles.setdefault(name, cProfile.Profile()).enable()
+
+    def stage_finished(self, name, stats):
+        self._profiles[name].disable()
+
+    def close(self):
+        """Grava os perfis coletados"""
+        os.makedirs(self.output_dir, exist_ok=True)
+        for name, profile in self._profiles.items():
+            path = os.path.join(self.output_dir, f"{self.prefix}.{name}.prof")
+            profile.dump_stats(path)
+            with open(os.path.join(self.output_dir, f"{self.prefix}.{name}.txt"), 'w', encoding='utf-8') as f:
+                pstats.Stats(profile, stream=f).sort_stats('cumulative').print_stats(PROFILE_TOP_FUNCTIONS)
+        if self._profiles:
+            print(f"Perfis por etapa gravados em: {self.output_dir}")
+
+
+
+class StageTimer:
+    """Mede as etapas de uma execução e notifica os ganchos
+
+    Os ganchos (hooks) são objetos com os métodos stage_started(etapa) e
+    stage_finished(etapa, estatísticas) e, opcionalmente, close() (ex.:
+    ProfileHook).
+
+    Etapas diferentes podem ser medidas em threads diferentes (ex.:
+    run_pipelined_etl): os totais e os ganchos são atualizados sob uma trava.
+    O bloco de stage() não a segura, e cada etapa deve rodar numa só thread.
+    """
+
+    def __init__(self, hooks=None):
+        self.hooks = list(hooks or [])
+        self.stats = {name: StageStats(name) for name in STAGES}
+        self.wall_time = 0.0
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name):
+        """Mede uma execução da etapa name; o bloco recebe as estatísticas da etapa"""
+        with self._lock:
+            stats = self.stats.setdefault(name, StageStats(name))
+            for hook in self.hooks:
+                hook.stage_started(name)
+        start_wall = time.perf_counter()
+        start_cpu = time.thread_time()
+        try:
+            yield stats
+        finally:
+            wall_time = time.perf_counter() - start_wall
+            cpu_time = time.thread_time() - start_cpu
+            with self._lock:
+                stats.wall_time += wall_time
+                stats.cpu_time += cpu_time
+                stats.calls += 1
+                for hook in self.hooks:
+                    hook.stage_finished(name, stats)
+
+    def record(self, name, wall_time, cpu_time, df=None, page_num=None):
+        """Soma uma execução da etapa name medida fora desta thread (ex.: em outro processo)"""
+        with self._lock:
+            stats = self.stats.setdefault(name, StageStats(name))
+            stats.wall_time += wall_time
+            stats.cpu_time += cpu_time
+            stats.calls += 1
+            if df is not None:
+                stats.add_table(df, page_num)
+
+    def record_prefilter(self, checked, skipped):
+        """Registra o resultado do pré-filtro da extração (páginas verificadas e ignoradas)"""
+        with self._lock:
+            self.stats.setdefault('extracao', StageStats('extracao')).add_prefilter(checked, skipped)
+
+    def close(self):
+        """Finaliza os ganchos (ex.: grava os perfis)"""
+        for hook in self.hooks:
+            if hasattr(hook, 'close'):
+                hook.close()
+
+    def report(self):
+        """Tabela em texto com o tempo, a CPU, as linhas e as páginas de cada etapa"""
+        lines = [f"{'Etapa':<15} {'Tempo (s)':>10} {'CPU (s)':>9} {'Linhas':>9} {'Páginas':>8}"]
+        for name, stats in self.stats.items():
+            if stats.calls:
+                lines.append(f"{STAGES.get(name, name):<15} {stats.wall_time:>10.2f} {stats.cpu_time:>9.2f} "
+                             f"{stats.rows:>9} {stats.pages:>8}")
+        if self.wall_time:
+            lines.append(f"{'Total':<15} {self.wall_time:>10.2f}")
+        return '\n'.join(lines)
+
+    def print_report(self):
+        print("\nTempo por etapa:")
+        print(self.report())
@@ -0,0 +1,250 @@
+import multiprocessing
+import os
+import queue
+import shutil
+import sys
+import threading
+import time
+
+# Adicionar o diretório atual ao caminho de busca do Python
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+# Importar os módulos do projeto
+from extraction import iter_page_tables
+from transformation import clean_dataframe
+from loading import ExcelStreamWriter
+from loading_csv import CSVStreamWriter
+from loading_parquet import ParquetStreamWriter
+from loading_sqlite import SQLiteStreamWriter
+from stages import StageTimer
+
+# Tabelas em espera entre duas etapas do pipeline (limita o uso de memória)
+PIPELINE_QUEUE_SIZE = 8
+
+# Marca de fim das tabelas numa fila do pipeline
+END_OF_TABLES = None
+
+# Marca do resultado do pré-filtro na fila da extração: (PREFILTER, páginas verificadas, páginas ignoradas)
+PREFILTER = 'prefiltro'
+
+def open_stream_writer(output_path, format_type='excel', include_header=True, source=None):
+    """Cria o escritor em streaming do formato de saída (excel, csv, parquet ou sqlite)"""
+    if format_type.lower() == 'csv':
+        return CSVStreamWriter(output_path, include_header=include_header)
+    if format_type.lower() == 'parquet':
+        return ParquetStreamWriter(output_path)
+    if format_type.lower() == 'sqlite':
+        return SQLiteStreamWriter(output_path, source=source)
+    return ExcelStreamWriter(output_path)
+
+def _close_writer(writer, timer):
+    # Fechamento medido como carregamento: no Excel, é quando o resumo e as larguras são gravados
+    with timer.stage('carregamento'):
+        writer.close()
+
+def _discard_empty_output(writer, output_path, format_type):
+    # Nenhuma tabela encontrada: não deixar um arquivo sem dados
+    if writer.columns is None and format_type.lower() != 'sqlite':
+        if os.path.isdir(output_path):
+            shutil.rmtree(output_path)
+        elif os.path.exists(output_path):
+            os.remove(output_path)
+
+def run_streaming_etl(pdf_path, output_path, format_type='excel', include_header=True,
+                      method='auto', transform_options=None, chunk_size=10, progress=None,
+                      use_cache=True, refresh_cache=False, checkpoint_dir=None, resume=False, timer=None):
+    """Executa o ETL em modo streaming: extrai, limpa e grava uma tabela por vez
+
+    As tabelas brutas de cada página são descartadas assim que limpas, e as
+    linhas limpas são gravadas imediatamente, de modo que o uso de memória não
+    cresce com o número de páginas. No formato Excel a aba de resumo é
+    acumulada por competência e escrita ao final.
+
+    Args:
+        pdf_path: Caminho para o arquivo PDF
+        output_path: Caminho do arquivo de saída
+        format_type: 'excel', 'csv', 'parquet' ou 'sqlite'
+        include_header: Se True, inclui o cabeçalho da Prefeitura no CSV
+        method: Método de extração ('auto', 'camelot' ou 'pdfplumber')
+        transform_options: Opções repassadas para clean_dataframe
+        chunk_size: Número de páginas extraídas por bloco
+        progress: Função opcional chamada como progress(página, linhas) a cada tabela
+        use_cache: Se True, reutiliza extrações anteriores do mesmo PDF
+        refresh_cache: Se True, refaz a extração e substitui a entrada do cache
+        checkpoint_dir: Pasta de trabalho para os pontos de controle da extração
+        resume: Se True, retoma uma extração interrompida a partir dos pontos de controle
+        timer: StageTimer (ou Pipeline) que acumula o tempo de cada etapa
+
+    Returns:
+        Número de linhas gravadas (0 se nenhuma tabela foi encontrada)
+    """
+    transform_options = transform_options or {}
+    timer = timer or StageTimer()
+    tables = iter_page_tables(pdf_path, method=method, chunk_size=chunk_size,
+                              use_cache=use_cache, refresh_cache=refresh_cache,
+                              checkpoint_dir=checkpoint_dir, resume=resume, on_prefilter=timer.record_prefilter)
+    rows = 0
+
+    writer = open_stream_writer(output_path, format_type, include_header, source=pdf_path).open()
+    try:
+        while True:
+            with timer.stage('extracao') as stats:
+                item = next(tables, None)
+                if item is not None:
+                    stats.add_table(item[1], item[0])
+            if item is None:
+                break
+            page_num, df = item
+            with timer.stage('transformacao') as stats:
+                df = clean_dataframe(df, **transform_options)
+                stats.add_table(df, page_num)
+            with timer.stage('carregamento') as stats:
+                writer.write(df)
+                stats.add_table(df, page_num)
+            rows = writer.rows_written
+            if progress:
+                progress(page_num, rows)
+        _close_writer(writer, timer)
+    except BaseException:
+        # A saída parcial (ou que não pôde ser finalizada) é descartada e o destino fica como estava
+        writer.abort()
+        raise
+    _discard_empty_output(writer, output_path, format_type)
+    return rows
+
+
+def _extract_to_queue(tables, pdf_path, method, chunk_size, use_cache, refresh_cache, checkpoint_dir, resume):
+    """Etapa de extração (processo separado): envia (página, tabela, tempo, CPU) para a fila
+
+    O resultado do pré-filtro vai para a mesma fila, antes das tabelas.
+    """
+    def on_prefilter(checked, skipped):
+        tables.put((PREFILTER, checked, skipped))
+
+    try:
+        start_wall, start_cpu = time.perf_counter(), time.process_time()
+        for page_num, df in iter_page_tables(pdf_path, method=method, chunk_size=chunk_size,
+                                             use_cache=use_cache, refresh_cache=refresh_cache,
+                                             checkpoint_dir=checkpoint_dir, resume=resume,
+                                             on_prefilter=on_prefilter):
+            wall_time, cpu_time = time.perf_counter() - start_wall, time.process_time() - start_cpu
+            tables.put((page_num, df, wall_time, cpu_time))
+            start_wall, start_cpu = time.perf_counter(), time.process_time()
+    except Exception as e:
+        tables.put(Exception(str(e)))
+        return
+    tables.put(END_OF_TABLES)
+
+def _next_table(tables, extractor):
+    """Lê a próxima tabela extraída, falhando se o processo de extração terminar sem avisar"""
+    while True:
+        try:
+            return tables.get(timeout=1)
+        except queue.Empty:
+            if not extractor.is_alive():
+                # O processo pode ter terminado logo após enviar a última tabela
+                try:
+                    return tables.get(timeout=1)
+                except queue.Empty:
+                    raise Exception("Falha ao extrair tabelas do PDF: o processo de extração foi encerrado "
+                                    f"(código {extractor.exitcode})")
+
+def _put(items, item, stop):
+    # put bloqueante que desiste se o pipeline foi interrompido
+    while not stop.is_set():
+        try:
+            items.put(item, timeout=0.5)
+            return
+        except queue.Full:
+            continue
+
+def _clean_tables(tables, extractor, cleaned, transform_options, stop, timer):
+    """Etapa de transformação (thread): limpa cada tabela assim que ela é extraída"""
+    try:
+        while not stop.is_set():
+            item = _next_table(tables, extractor)
+            if item is END_OF_TABLES or isinstance(item, Exception):
+                _put(cleaned, item, stop)
+                return
+            if item[0] == PREFILTER:
+                timer.record_prefilter(*item[1:])
+                continue
+            page_num, df, wall_time, cpu_time = item
+            timer.record('extracao', wall_time, cpu_time, df, page_num)
+            with timer.stage('transformacao') as stats:
+                df = clean_dataframe(df, **transform_options)
+                stats.add_table(df, page_num)
+            _put(cleaned, (page_num, df), stop)
+    except Exception as e:
+        _put(cleaned, e, stop)
+
+def run_pipelined_etl(pdf_path, output_path, format_type='excel', include_header=True,
+                      method='auto', transform_options=None, chunk_size=10, progress=None,
+                      use_cache=True, refresh_cache=False, checkpoint_dir=None, resume=False,
+                      queue_size=PIPELINE_QUEUE_SIZE, timer=None):
+    """Executa o ETL com extração, transformação e carregamento sobrepostos
+
+    As três etapas rodam ao mesmo tempo, ligadas por filas limitadas a
+    queue_size tabelas: a extração roda num processo separado (é a etapa mais
+    pesada e não disputa o GIL com as demais), a limpeza numa thread e a
+    gravação na thread que chamou a função. Enquanto as páginas seguintes são
+    extraídas, as tabelas já extraídas são limpas e gravadas, e o tempo total
+    se aproxima do tempo da etapa mais lenta em vez da soma das três. Se uma
+    etapa fica para trás, as filas cheias fazem as anteriores esperarem.
+
+    A saída é a mesma de run_streaming_etl, e os argumentos também. Em
+    timer, o tempo de cada etapa é o tempo em que ela esteve trabalhando (a
+    espera nas filas não conta); a extração é medida no seu processo.
+
+    Returns:
+        Número de linhas gravadas (0 se nenhuma tabela foi encontrada)
+    """
+    transform_options = transform_options or {}
+    timer = timer or StageTimer()
+    tables = multiprocessing.Queue(maxsize=queue_size)
+    cleaned = queue.Queue(maxsize=queue_size)
+    stop = threading.Event()
+
+    extractor = multiprocessing.Process(target=_extract_to_queue, daemon=True,
+                                        args=(tables, pdf_path, method, chunk_size, use_cache,
+                                              refresh_cache, checkpoint_dir, resume))
+    cleaner = threading.Thread(target=_clean_tables, daemon=True,
+                               args=(tables, extractor, cleaned, transform_options, stop, timer))
+    extractor.start()
+    cleaner.start()
+
+    rows = 0
+    finished = False
+    writer = open_stream_writer(output_path, format_type, include_header, source=pdf_path)
+    try:
+        writer.open()
+        try:
+            while True:
+                item = cleaned.get()
+                if item is END_OF_TABLES:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                page_num, df = item
+                with timer.stage('carregamento') as stats:
+                    writer.write(df)
+                    stats.add_table(df, page_num)
+                rows = writer.rows_written
+                if progress:
+                    progress(page_num, rows)
+            _close_writer(writer, timer)
+        except BaseException:
+            # A saída parcial (ou que não pôde ser finalizada) é descartada e o destino fica como estava
+            writer.abort()
+            raise
+        finished = True
+    finally:
+        stop.set()
+        if not finished and extractor.is_alive():
+            # Erro numa das etapas: a extração não é mais necessária
+            extractor.terminate()
+        extractor.join()
+        cleaner.join()
+        tables.close()
+    _discard_empty_output(writer, output_path, format_type)
+    return rows
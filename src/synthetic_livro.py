@@ -0,0 +1,253 @@
+import argparse
+import os
+import random
+import sys
+import zlib
+
+import pandas as pd
+
+# Adicionar o diretório atual ao caminho de busca do Python
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from template_extraction import SERVICE_HEADERS
+
+# Página A4 em paisagem, como no livro emitido pela prefeitura (pontos)
+PAGE_WIDTH = 842
+PAGE_HEIGHT = 595.28
+
+# Posição x do cabeçalho de cada coluna e das notas, medida no Arquivo/2022.pdf.
+# Valores monetários são alinhados à direita em x; os demais, à esquerda.
+HEADER_X = [26.2, 80.2, 138.0, 206.9, 331.5, 385.4, 442.6, 504.4, 545.5, 606.7, 645.9, 722.9, 787.2]
+VALUE_X = [14.2, 85.1, 140.0, 206.9, 335.3, 418.5, 489.0, 504.8, 578.2, 636.7, 657.9, 721.9, 780.6]
+RIGHT_ALIGNED = {5, 6, 8, 9}
+
+# Linhas de texto das notas: tamanho da fonte, espaçamento e área útil (topo, em pontos)
+FONT_SIZE = 6
+LINE_HEIGHT = 7.5
+HEADER_TOP = 51.3
+FIRST_ROW_TOP = 58.8
+LAST_ROW_TOP = 575.0
+TABLE_LEFT = 14.2
+TABLE_RIGHT = 833.9
+
+# Larguras da Helvetica (1/1000 do corpo) dos caracteres dos valores alinhados à direita
+HELVETICA_WIDTHS = {**{digit: 556 for digit in '0123456789'}, ',': 278, '.': 278, ' ': 278, '%': 889}
+
+YEAR = 2022
+NOTE_PREFIX = '2022000000'
+
+# Valores sorteados para as notas
+FIRST_NAMES = ['ANA', 'BRUNO', 'CARLA', 'DANIEL', 'EDUARDA', 'FABIO', 'GABRIELA', 'HELIO', 'IRENE', 'JOAO',
+               'LUCIA', 'MARCOS', 'NATALIA', 'OTAVIO', 'PAULA', 'RAFAEL', 'SILVIA', 'TIAGO', 'VERA']
+LAST_NAMES = ['SILVA', 'SANTOS', 'OLIVEIRA', 'SOUZA', 'LIMA', 'PEREIRA', 'COSTA', 'RODRIGUES', 'ALMEIDA',
+              'NASCIMENTO', 'CARVALHO', 'ARAUJO', 'RIBEIRO', 'MARTINS']
+COMPANY_WORDS = ['COMERCIO', 'SERVICOS', 'CLINICA', 'LABORATORIO', 'DISTRIBUIDORA', 'ENGENHARIA', 'TRANSPORTES',
+                 'ALIMENTOS', 'HOSPITALAR', 'CONSTRUCOES', 'TECNOLOGIA', 'FARMACIA']
+SERVICE_CODES = ['0401', '0402', '0403', '1701', '0702']
+ALIQUOTAS = [200, 300, 500]  # centésimos de ponto percentual (2,00 %, 3,00 %, 5,00 %)
+CANCELED_RATE = 0.04
+WITHHELD_RATE = 0.2
+
+def format_money(centavos):
+    """Formata centavos como no livro: 1.323,37"""
+    return f"{centavos // 100:,}".replace(',', '.') + f",{centavos % 100:02d}"
+
+def _format_document(rng):
+    if rng.random() < 0.5:
+        digits = f"{rng.randrange(10 ** 11):011d}"
+        return f"{digits[:3]}.{digits[3:6]}.{digits[6:9]}-{digits[9:]}"
+    digits = f"{rng.randrange(10 ** 14):014d}"
+    return f"{digits[:2]}.{digits[2:5]}.{digits[5:8]}/{digits[8:12]}-{digits[12:]}"
+
+def _tomador_lines(rng, is_company):
+    """Nome do tomador quebrado em linhas de até 30 caracteres, como no livro"""
+    if is_company:
+        words = [rng.choice(COMPANY_WORDS) for _ in range(rng.randint(2, 6))] + [rng.choice(LAST_NAMES), 'LTDA']
+    else:
+        words = [rng.choice(FIRST_NAMES)] + [rng.choice(LAST_NAMES) for _ in range(rng.randint(1, 4))]
+    lines = ['']
+    for word in words:
+        if lines[-1] and len(lines[-1]) + 1 + len(word) > 30:
+            lines.append(word)
+        else:
+            lines[-1] = f"{lines[-1]} {word}".strip()
+    return lines
+
+def _note(rng, number, month):
+    """Sorteia uma nota: (valores das 13 colunas, linhas de continuação do tomador)"""
+    document = _format_document(rng)
+    tomador = _tomador_lines(rng, '/' in document)
+    base = int(10 ** rng.uniform(3, 6.7))
+    aliquota = rng.choice(ALIQUOTAS)
+    iss = round(base * aliquota / 10_000)
+    withheld = rng.random() < WITHHELD_RATE
+    situacao = 'CANCELADA' if rng.random() < CANCELED_RATE else 'ESCRITURADA'
+    values = [f"{NOTE_PREFIX}{number:05d}", f"{rng.randint(1, 28):02d}/{month:02d}/{YEAR}", document, tomador[0],
+              rng.choice(SERVICE_CODES), format_money(base), format_money(base),
+              f"{aliquota // 100},{aliquota % 100:02d} %", format_money(0 if withheld else iss),
+              format_money(iss if withheld else 0), 'EXIGÍVEL', 'ESTAB. DO', situacao]
+    return values, tomador[1:]
+
+def _text_width(text, size=FONT_SIZE):
+    return sum(HELVETICA_WIDTHS.get(char, 556) for char in text) * size / 1000
+
+def _escape(text):
+    return text.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)').encode('cp1252')
+
+class _Page:
+    """Conteúdo de uma página: texto posicionado pelo topo, como medido no pdfplumber"""
+
+    def __init__(self):
+        self.parts = []
+
+    def text(self, x, top, text, size=FONT_SIZE, bold=False):
+        baseline = PAGE_HEIGHT - top - size
+        font = b'/F2' if bold else b'/F1'
+        self.parts.append(b'BT ' + font + b' %d Tf %.2f %.2f Td (' % (size, x, baseline) + _escape(text) + b') Tj ET\n')
+
+    def rect(self, x0, top, x1, bottom, gray):
+        """Retângulo preenchido com borda, como as faixas das linhas do livro"""
+        self.parts.append(b'q 0.75 w 0 G %.3f g %.2f %.2f %.2f %.2f re B Q\n'
+                          % (gray, x0, PAGE_HEIGHT - bottom, x1 - x0, bottom - top))
+
+    def line(self, x, top, bottom):
+        self.parts.append(b'q 0.75 w 0 G %.2f %.2f m %.2f %.2f l S Q\n'
+                          % (x, PAGE_HEIGHT - top, x, PAGE_HEIGHT - bottom))
+
+    def content(self):
+        return b''.join(self.parts)
+
+def _cover_page(page_num, total_pages, title, lines):
+    page = _Page()
+    page.text(324.3, 24.6, 'PREFEITURA MUNICIPAL (LIVRO SINTÉTICO)', size=14, bold=True)
+    page.text(22.4, 129.1, 'INFORMAÇÕES DO CONTRIBUINTE', size=10, bold=True)
+    page.text(143.9, 149.4, 'CNPJ: 00.000.000/0001-00', size=10)
+    page.text(143.9, 164.4, 'RAZÃO SOCIAL: PRESTADOR DE TESTE LTDA', size=10)
+    page.text(249.2, 275.1, title, size=16, bold=True)
+    for i, line in enumerate(lines):
+        page.text(146.2, 335.3 + 14.3 * i, line, size=10)
+    page.text(762.3, 583.0, f"Página {page_num} de {total_pages}", size=6)
+    return page
+
+def _notes_page(page_num, total_pages, month, notes):
+    page = _Page()
+    page.rect(TABLE_LEFT, 2.8, TABLE_RIGHT, 33.6, 0.941)
+    page.line(99.3, 2.8, 33.6)
+    page.line(190.8, 2.8, 33.6)
+    page.rect(TABLE_LEFT + 0.7, 32.8, TABLE_RIGHT, 50.1, 0.941)
+    page.text(16.6, 5.4, 'COMPETÊNCIA:', size=8, bold=True)
+    page.text(37.4, 18.9, f"{month:02d}/{YEAR}", size=8)
+    page.text(111.8, 5.4, 'SITUAÇÃO:', size=8, bold=True)
+    page.text(114.5, 18.9, 'EM ABERTO', size=8)
+    page.text(17.9, 37.7, 'ESCRITURAÇÃO MENSAL', size=10, bold=True)
+    for x, header in zip(HEADER_X, SERVICE_HEADERS):
+        page.text(x, HEADER_TOP, header, bold=True)
+
+    top = FIRST_ROW_TOP
+    for i, (values, continuation) in enumerate(notes):
+        height = LINE_HEIGHT * max(2, len(continuation) + 1)
+        # Faixas alternadas (branca/cinza) delimitam cada nota, como no livro
+        page.rect(TABLE_LEFT, top - 1.2, TABLE_RIGHT, top - 1.2 + height, 1.0 if i % 2 == 0 else 0.89)
+        for column, (x, value) in enumerate(zip(VALUE_X, values)):
+            if column in RIGHT_ALIGNED:
+                x -= _text_width(value)
+            page.text(x, top, value)
+        # Segunda linha: continuação do tomador e da incidência
+        page.text(VALUE_X[11] - 2.6, top + LINE_HEIGHT, 'PRESTADOR')
+        for i, line in enumerate(continuation):
+            page.text(VALUE_X[3], top + LINE_HEIGHT * (i + 1), line)
+        top += height
+    page.text(762.3, 583.0, f"Página {page_num} de {total_pages}", size=6)
+    return page
+
+def _page_notes(rng, month, first_number):
+    """Sorteia as notas que cabem numa página"""
+    notes = []
+    top = FIRST_ROW_TOP
+    while True:
+        values, continuation = _note(rng, first_number + len(notes), month)
+        height = LINE_HEIGHT * max(2, len(continuation) + 1)
+        if top + height - LINE_HEIGHT > LAST_ROW_TOP:
+            # A nota sorteada que não coube é descartada; o gerador continua determinístico
+            return notes
+        notes.append((values, continuation))
+        top += height
+
+def _write_pdf(pdf_path, pages):
+    """Grava as páginas num PDF mínimo (fontes padrão Helvetica, conteúdo comprimido)"""
+    tmp_path = f"{pdf_path}.{os.getpid()}.tmp"
+    offsets = {}
+    with open(tmp_path, 'wb') as f:
+        def write_object(number, body):
+            offsets[number] = f.tell()
+            f.write(b'%d 0 obj\n' % number + body + b'\nendobj\n')
+
+        f.write(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+        write_object(1, b'<< /Type /Catalog /Pages 2 0 R >>')
+        write_object(3, b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>')
+        write_object(4, b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>')
+        kids = []
+        number = 5
+        for page in pages:
+            content = zlib.compress(page.content(), 6)
+            write_object(number + 1, b'<< /Length %d /Filter /FlateDecode >>\nstream\n' % len(content)
+                         + content + b'\nendstream')
+            write_object(number, b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %d %.2f] '
+                                 b'/Resources << /Font << /F1 3 0 R /F2 4 0 R >> >> /Contents %d 0 R >>'
+                         % (PAGE_WIDTH, PAGE_HEIGHT, number + 1))
+            kids.append(b'%d 0 R' % number)
+            number += 2
+        write_object(2, b'<< /Type /Pages /Kids [' + b' '.join(kids) + b'] /Count %d >>' % len(kids))
+
+        xref = f.tell()
+        f.write(b'xref\n0 %d\n0000000000 65535 f \n' % number)
+        for i in range(1, number):
+            f.write(b'%010d 00000 n \n' % offsets[i])
+        f.write(b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (number, xref))
+    os.replace(tmp_path, pdf_path)
+
+def generate_livro(pdf_path, pages=100, seed=0):
+    """Gera um Livro de Serviços Prestados sintético com o layout de 13 colunas do livro real
+
+    A primeira página é a capa, a segunda o termo de abertura e a última o
+    termo de encerramento (sem notas, descartadas pelo pré-filtro); as demais
+    trazem as notas, distribuídas pelas 12 competências do ano em ordem. O
+    mesmo número de páginas e a mesma semente geram sempre o mesmo arquivo.
+
+    Args:
+        pdf_path: Arquivo PDF de saída
+        pages: Número total de páginas (mínimo 4)
+        seed: Semente do sorteio das notas
+
+    Returns:
+        DataFrame com as notas gravadas (colunas do livro, valores como impressos)
+    """
+    if pages < 4:
+        raise ValueError("O livro sintético precisa de pelo menos 4 páginas")
+    rng = random.Random(seed)
+    note_pages = pages - 3
+    rendered = [_cover_page(1, pages, 'LIVRO ANUAL DE SERVIÇOS PRESTADOS', [f"(EXERCÍCIO:{YEAR})"]),
+                _cover_page(2, pages, 'TERMO DE ABERTURA DO LIVRO',
+                            ['Contém este livro folhas enumeradas eletronicamente.'])]
+    rows = []
+    for i in range(note_pages):
+        month = 1 + i * 12 // note_pages
+        notes = _page_notes(rng, month, len(rows) + 1)
+        rendered.append(_notes_page(i + 3, pages, month, notes))
+        rows.extend(values for values, _ in notes)
+    rendered.append(_cover_page(pages, pages, 'TERMO DE ENCERRAMENTO DO LIVRO',
+                                ['Nesta data, procedemos ao encerramento do presente livro.']))
+
+    output_dir = os.path.dirname(os.path.abspath(pdf_path))
+    os.makedirs(output_dir, exist_ok=True)
+    _write_pdf(pdf_path, rendered)
+    return pd.DataFrame(rows, columns=SERVICE_HEADERS)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Gera um Livro de Serviços Prestados sintético para benchmarks')
+    parser.add_argument('pdf_path', help='Arquivo PDF de saída')
+    parser.add_argument('--paginas', type=int, default=100, help='Número de páginas (padrão: 100)')
+    parser.add_argument('--semente', type=int, default=0, help='Semente do sorteio das notas (padrão: 0)')
+    args = parser.parse_args()
+    notes = generate_livro(args.pdf_path, args.paginas, args.semente)
+    print(f"{args.pdf_path}: {args.paginas} páginas, {len(notes)} notas")
@@ -0,0 +1,141 @@
+import bisect
+import re
+
+import pandas as pd
+import pypdfium2 as pdfium
+
+# Colunas fixas do Livro de Serviços Prestados, na ordem em que aparecem no PDF
+SERVICE_HEADERS = ['N° Nota', 'Dt,. Emissão', 'CPF/CNPJ Tomador', 'Tomador do Serviço',
+                   'Serviço', 'Vrl. Serviço', 'Base de Cálculo', 'Aliq.',
+                   'ISS Próprio', 'ISS Retido', 'Nat. da Operação', 'Incidência', 'Situação']
+
+NOTE_PATTERN = re.compile(r'^2022000000\d+$')
+
+# Tolerância vertical (em pontos) para considerar dois trechos de texto na mesma linha
+LINE_TOLERANCE = 3
+
+def extract_pages(pdf_path, page_numbers):
+    """Extrai as notas das páginas usando o layout fixo do livro
+
+    Os limites entre colunas são aprendidos a cada chamada, a partir da
+    primeira linha de cabeçalho ("N° Nota", "Dt,. Emissão", ...) das páginas
+    pedidas, e depois cada trecho de texto de cada página é alocado
+    diretamente na sua coluna, sem detecção de tabelas. Nada é guardado entre
+    chamadas: um PDF substituído no mesmo caminho é lido com os seus próprios
+    limites.
+
+    Args:
+        pdf_path: Caminho para o arquivo PDF
+        page_numbers: Lista de páginas (a partir de 1), ou None para todas
+
+    Returns:
+        Tupla (resultados, pendentes): resultados é uma lista de (página,
+        tabelas encontradas, [DataFrames]); pendentes são as páginas com notas
+        que não puderam ser lidas por falta de um cabeçalho de referência.
+    """
+    results = []
+    waiting = []
+    boundaries = None
+    pdf = pdfium.PdfDocument(pdf_path)
+    try:
+        if page_numbers is None:
+            page_numbers = range(1, len(pdf) + 1)
+
+        for page_num in page_numbers:
+            segments = _page_segments(pdf, page_num)
+            lines = _group_lines(segments)
+
+            if boundaries is None:
+                boundaries = learn_column_boundaries(lines)
+
+            note_lines = [line for line in lines if NOTE_PATTERN.match(line[0][4])]
+            if not note_lines:
+                results.append((page_num, 0, []))
+            elif boundaries is None:
+                # Notas antes do primeiro cabeçalho: lidas quando os limites forem aprendidos
+                waiting.append((page_num, note_lines))
+            else:
+                results.append((page_num, 1, [_build_table(note_lines, boundaries)]))
+    finally:
+        pdf.close()
+
+    if boundaries is None:
+        return results, [page_num for page_num, _ in waiting]
+    results.extend((page_num, 1, [_build_table(note_lines, boundaries)]) for page_num, note_lines in waiting)
+    results.sort(key=lambda result: result[0])
+    return results, []
+
+def learn_column_boundaries(lines):
+    """Calcula as coordenadas x que separam as colunas a partir da linha de cabeçalho
+
+    Cada limite fica no meio do maior espaço livre entre duas colunas vizinhas,
+    considerando o cabeçalho e as linhas de notas da mesma página. Retorna None
+    se a página não tiver o cabeçalho do livro.
+    """
+    header = None
+    for line in lines:
+        texts = [segment[4] for segment in line]
+        if texts == SERVICE_HEADERS:
+            header = [(segment[0], segment[2]) for segment in line]
+            break
+    if header is None:
+        return None
+
+    occupied = header + [(segment[0], segment[2]) for line in lines
+                         if NOTE_PATTERN.match(line[0][4]) for segment in line]
+
+    boundaries = []
+    for (left_x0, left_x1), (right_x0, right_x1) in zip(header, header[1:]):
+        low = (left_x0 + left_x1) / 2
+        high = (right_x0 + right_x1) / 2
+        gap = _largest_gap(occupied, low, high)
+        boundaries.append((gap[0] + gap[1]) / 2 if gap else (left_x1 + right_x0) / 2)
+    return boundaries
+
+def _largest_gap(intervals, low, high):
+    """Retorna o maior intervalo em [low, high] não coberto por nenhum dos intervalos"""
+    covered = sorted((max(x0, low), min(x1, high)) for x0, x1 in intervals if x1 > low and x0 < high)
+    best = None
+    cursor = low
+    for x0, x1 in covered + [(high, high)]:
+        if x0 > cursor and (best is None or x0 - cursor > best[1] - best[0]):
+            best = (cursor, x0)
+        cursor = max(cursor, x1)
+    return best
+
+def _page_segments(pdf, page_num):
+    """Lê os trechos de texto da página como (x0, base, x1, topo, texto)"""
+    page = pdf[page_num - 1]
+    textpage = page.get_textpage()
+    try:
+        segments = []
+        for i in range(textpage.count_rects()):
+            left, bottom, right, top = textpage.get_rect(i)
+            text = ' '.join(textpage.get_text_bounded(left, bottom, right, top).split())
+            if text:
+                segments.append((left, bottom, right, top, text))
+        return segments
+    finally:
+        textpage.close()
+        page.close()
+
+def _group_lines(segments):
+    """Agrupa os trechos em linhas (de cima para baixo), ordenando cada linha por x"""
+    lines = []
+    for segment in sorted(segments, key=lambda s: (-(s[1] + s[3]) / 2, s[0])):
+        center = (segment[1] + segment[3]) / 2
+        if lines and abs(lines[-1][0] - center) <= LINE_TOLERANCE:
+            lines[-1][1].append(segment)
+        else:
+            lines.append((center, [segment]))
+    return [sorted(line, key=lambda s: s[0]) for _, line in lines]
+
+def _build_table(note_lines, boundaries):
+    """Monta o DataFrame com as linhas de notas, alocando cada trecho na sua coluna"""
+    rows = []
+    for line in note_lines:
+        cells = [[] for _ in SERVICE_HEADERS]
+        for x0, _, x1, _, text in line:
+            cells[bisect.bisect(boundaries, (x0 + x1) / 2)].append(text)
+        rows.append([' '.join(cell) for cell in cells])
+    return pd.DataFrame(rows, columns=SERVICE_HEADERS)
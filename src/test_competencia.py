@@ -1,15 +1,12 @@
 import os
 import sys
-import pandas as pd
 
 # Adicionar o diretório src ao caminho de busca do Python
 src_path = os.path.dirname(os.path.abspath(__file__))
 sys.path.append(src_path)
 
 # Importar os módulos do projeto
-from extraction import extract_tables_from_pdf
-from transformation import clean_dataframe
-from loading import load_to_excel
+from pipeline import Pipeline
 
 def test_competencia():
     """Testa a funcionalidade de adicionar a coluna de competência"""
@@ -27,20 +24,15 @@ def test_competencia():
     
     try:
         # Extração
-        print("\n1. EXTRAÇÃO")
-        print("Extraindo tabelas do PDF...")
-        tables = extract_tables_from_pdf(pdf_path)
-        print(f"Extraídas {len(tables)} tabelas")
+        pipeline = Pipeline(pdf_path)
+        tables = pipeline.extract()
         
         if not tables:
             print("ERRO: Nenhuma tabela encontrada no PDF")
             return False
         
         # Transformação
-        print("\n2. TRANSFORMAÇÃO")
-        print("Limpando e transformando dados...")
-        cleaned_tables = [clean_dataframe(df) for df in tables]
-        print(f"Transformadas {len(cleaned_tables)} tabelas")
+        cleaned_tables = pipeline.transform(tables)
         
         # Verificar se a coluna de competência foi adicionada
         for i, df in enumerate(cleaned_tables):
@@ -54,10 +46,8 @@ def test_competencia():
                 print(f"\nERRO: Tabela {i+1}: Coluna de competência não foi adicionada!")
         
         # Carregamento
-        print("\n3. CARREGAMENTO")
-        print("Salvando dados no Excel...")
-        excel_file = load_to_excel(cleaned_tables[0], excel_path)
-        print(f"Dados salvos em: {excel_file}")
+        pipeline.load(cleaned_tables[0], excel_path)
+        pipeline.print_report()
         
         # Verificar se o arquivo Excel foi criado
         if os.path.exists(excel_path):
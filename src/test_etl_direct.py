@@ -1,24 +1,20 @@
-from extraction import extract_tables_from_pdf
-from transformation import clean_dataframe
-from loading import load_to_excel
+from pipeline import Pipeline
 
 def run_etl(pdf_path, excel_output):
     print(f"Iniciando processamento do arquivo: {pdf_path}")
 
+    pipeline = Pipeline(pdf_path)
+
     # Extração
-    print("Extraindo tabelas...")
-    tables = extract_tables_from_pdf(pdf_path)
-    print(f"Encontradas {len(tables)} tabelas")
+    tables = pipeline.extract()
 
     # Transformação
-    print("Limpando dados...")
-    cleaned_tables = [clean_dataframe(df) for df in tables]
+    cleaned_tables = pipeline.transform(tables)
 
     # Loading
     if cleaned_tables:
-        print("Salvando no Excel...")
-        load_to_excel(cleaned_tables[0], excel_output)
-        print(f"Arquivo Excel salvo em: {excel_output}")
+        pipeline.load(cleaned_tables[0], excel_output)
+        pipeline.print_report()
     else:
         print("Nenhuma tabela encontrada para processar")
 
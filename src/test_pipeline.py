@@ -1,6 +1,4 @@
-from extraction import extract_tables_from_pdf
-from transformation import clean_dataframe
-from loading import load_to_excel
+from pipeline import Pipeline
 import os
 
 def test_pipeline():
@@ -19,10 +17,8 @@ def test_pipeline():
     
     try:
         # Extração
-        print("\n1. EXTRAÇÃO")
-        print("Extraindo tabelas do PDF...")
-        tables = extract_tables_from_pdf(pdf_path)
-        print(f"Extraídas {len(tables)} tabelas")
+        pipeline = Pipeline(pdf_path)
+        tables = pipeline.extract()
         
         if not tables:
             print("ERRO: Nenhuma tabela encontrada no PDF")
@@ -33,20 +29,15 @@ def test_pipeline():
         print(tables[0].head())
         
         # Transformação
-        print("\n2. TRANSFORMAÇÃO")
-        print("Limpando e transformando dados...")
-        cleaned_tables = [clean_dataframe(df) for df in tables]
-        print(f"Transformadas {len(cleaned_tables)} tabelas")
+        cleaned_tables = pipeline.transform(tables)
         
         # Mostrar exemplo da primeira tabela limpa
         print("\nExemplo da primeira tabela limpa (primeiras 5 linhas):")
         print(cleaned_tables[0].head())
         
         # Carregamento
-        print("\n3. CARREGAMENTO")
-        print("Salvando dados no Excel...")
-        excel_file = load_to_excel(cleaned_tables[0], excel_path)
-        print(f"Dados salvos em: {excel_file}")
+        pipeline.load(cleaned_tables[0], excel_path)
+        pipeline.print_report()
         
         # Verificar se o arquivo Excel foi criado
         if os.path.exists(excel_path):
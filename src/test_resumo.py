@@ -1,15 +1,12 @@
 import os
 import sys
-import pandas as pd
 
 # Adicionar o diretório src ao caminho de busca do Python
 src_path = os.path.dirname(os.path.abspath(__file__))
 sys.path.append(src_path)
 
 # Importar os módulos do projeto
-from extraction import extract_tables_from_pdf
-from transformation import clean_dataframe
-from loading import load_to_excel
+from pipeline import Pipeline
 
 def test_resumo():
     """Testa a funcionalidade de criar uma aba de resumo"""
@@ -27,25 +24,18 @@ def test_resumo():
     
     try:
         # Extração
-        print("\n1. EXTRAÇÃO")
-        print("Extraindo tabelas do PDF...")
-        tables = extract_tables_from_pdf(pdf_path)
-        print(f"Extraídas {len(tables)} tabelas")
+        pipeline = Pipeline(pdf_path)
+        tables = pipeline.extract()
         
         if not tables:
             print("ERRO: Nenhuma tabela encontrada no PDF")
             return False
         
         # Transformação
-        print("\n2. TRANSFORMAÇÃO")
-        print("Limpando e transformando dados...")
-        cleaned_tables = [clean_dataframe(df) for df in tables]
-        print(f"Transformadas {len(cleaned_tables)} tabelas")
+        cleaned_tables = pipeline.transform(tables)
         
         # Combinar todas as tabelas em uma única
-        print("\nCombinando todas as tabelas...")
-        combined_df = pd.concat(cleaned_tables, ignore_index=True)
-        print(f"Tabela combinada: {len(combined_df)} linhas, {len(combined_df.columns)} colunas")
+        combined_df = pipeline.combine(cleaned_tables)
         
         # Adicionar coluna de situação para teste
         if 'situação' not in combined_df.columns:
@@ -62,11 +52,9 @@ def test_resumo():
         if 'iss retido' not in combined_df.columns:
             combined_df['iss retido'] = 25.0
         
-        # Carregamento
-        print("\n3. CARREGAMENTO")
-        print("Salvando dados no Excel com aba de resumo...")
-        excel_file = load_to_excel(combined_df, excel_path)
-        print(f"Dados salvos em: {excel_file}")
+        # Carregamento (Excel com aba de resumo)
+        pipeline.load(combined_df, excel_path)
+        pipeline.print_report()
         
         # Verificar se o arquivo Excel foi criado
         if os.path.exists(excel_path):
@@ -1,6 +1,22 @@
 import pandas as pd
 import re
 
+# Termos que identificam colunas de data e de valores monetários
+DATE_TERMS = ['data', 'dt', 'date', 'emissão', 'emissao']
+MONEY_TERMS = ['valor', 'vlr', 'preço', 'preco', 'total', 'base', 'iss', 'alíquota']
+
+# Data no formato DD/MM/AAAA
+DATE_RE = re.compile(r'(\d{2}/\d{2}/\d{4})')
+
+# Formatos aceitos para a data de emissão, em ordem de prioridade: DD/MM/AAAA,
+# DDMMAAAA e DMMAAAA (datas lidas como números).
+# Para cada formato: padrão de busca, padrão de substituição e modelo da data resultante.
+EMISSION_DATE_FORMATS = [
+    (r'\d{2}/\d{2}/\d{4}', r'(?s)^.*?(\d{2})/(\d{2})/(\d{4}).*$', r'\1/\2/\3'),
+    (r'\d{8}', r'(?s)^.*?(\d{2})(\d{2})(\d{4}).*$', r'\1/\2/\3'),
+    (r'\d{7}', r'(?s)^.*?(\d)(\d{2})(\d{4}).*$', r'0\1/\2/\3'),
+]
+
 def clean_dataframe(df: pd.DataFrame, remove_empty_rows=True, remove_empty_cols=True,
                   convert_dates=True, convert_money=True) -> pd.DataFrame:
     """Limpa e padroniza colunas, tipos de dados e trata valores faltantes
@@ -10,7 +26,8 @@ def clean_dataframe(df: pd.DataFrame, remove_empty_rows=True, remove_empty_cols=
         remove_empty_rows: Se True, remove linhas completamente vazias
         remove_empty_cols: Se True, remove colunas completamente vazias
         convert_dates: Se True, tenta converter colunas de data
-        convert_money: Se True, tenta converter colunas de valores monetários
+        convert_money: Se True, converte colunas de valores monetários em
+            centavos (Int64); a conversão para reais é feita só na gravação
     """
     # Cria uma cópia para não modificar o original
     df = df.copy()
@@ -28,38 +45,31 @@ def clean_dataframe(df: pd.DataFrame, remove_empty_rows=True, remove_empty_cols=
 
     # Tentar identificar e converter colunas de data
     if convert_dates:
-        date_columns = [col for col in df.columns if any(date_term in str(col).lower() for date_term in ['data', 'dt', 'date', 'emissão', 'emissao'])]
+        date_columns = [col for col in df.columns if is_date_column(col)]
         for col in date_columns:
             if col in df.columns:
                 try:
-                    # Converter para string e limpar
-                    df[col] = df[col].astype(str).str.strip()
-
-                    # Aplicar regex para extrair datas no formato DD/MM/YYYY
-                    df[col] = df[col].astype(str).apply(lambda x: re.search(r'(\d{2}/\d{2}/\d{4})', x).group(1) if re.search(r'(\d{2}/\d{2}/\d{4})', x) else '')
-
-                    # Substituir valores NaN ou 'nan' por string vazia
-                    df[col] = df[col].replace(['nan', 'NaN', 'NaT', 'None', 'none'], '')
+                    df[col] = extract_dates(df[col])
                 except Exception as e:
                     print(f"Erro ao processar coluna {col}: {str(e)}")
                     pass  # Se não conseguir processar, mantém como está
 
     # Tentar identificar e converter colunas de valores monetários
     if convert_money:
-        value_columns = [col for col in df.columns if any(value_term in str(col).lower() for value_term in ['valor', 'vlr', 'preço', 'preco', 'total', 'base', 'iss', 'alíquota'])]
+        value_columns = [col for col in df.columns if has_money_term(col)]
         for col in value_columns:
             if col in df.columns:
                 try:
-                    # Verificar se a coluna não é 'tomador do serviço' ou similar
-                    if 'tomador' in str(col).lower() or 'serviço' in str(col).lower() or 'servico' in str(col).lower():
-                        continue
-
-                    # Converter valores monetários (substituir pontos e vírgulas)
-                    df[col] = df[col].astype(str).str.replace('R$', '', regex=False).str.strip()
-                    df[col] = df[col].apply(lambda x: re.sub(r'[^\d,.]', '', str(x)))
-                    # Substituir strings vazias por '0'
-                    df[col] = df[col].replace('', '0')
-                    df[col] = df[col].str.replace('.', '').str.replace(',', '.').astype(float)
+                    centavos = parse_money(df[col])
+                    if is_date_column(col):
+                        # Data com termo monetário no nome ('dt,. emissão' contém 'iss'): os
+                        # dígitos viram um número (03/01/2022 -> 3012022.0), que a formatação
+                        # das datas abaixo converte de volta; datas vazias ficam 0.0
+                        df[col] = centavos / 100
+                    else:
+                        # Int64 aceita valores ausentes: ao concatenar tabelas com colunas
+                        # diferentes, os centavos continuam inteiros em vez de virar float
+                        df[col] = centavos.astype('Int64')
                 except Exception as e:
                     print(f"Erro ao converter coluna {col} para valor monetário: {str(e)}")
                     pass  # Se não conseguir converter, mantém como está
@@ -76,7 +86,7 @@ def clean_dataframe(df: pd.DataFrame, remove_empty_rows=True, remove_empty_cols=
     # Formatar corretamente as datas de emissão e adicionar coluna de competência
     try:
         # Identificar a coluna de data de emissão
-        date_columns = [col for col in df.columns if any(date_term in str(col).lower() for date_term in ['data', 'dt', 'date', 'emissão', 'emissao'])]
+        date_columns = [col for col in df.columns if is_date_column(col)]
 
         if date_columns:
             date_col = date_columns[0]  # Usar a primeira coluna de data encontrada
@@ -84,79 +94,150 @@ def clean_dataframe(df: pd.DataFrame, remove_empty_rows=True, remove_empty_cols=
             # Encontrar o índice da coluna para inserir a competência logo após
             col_index = list(df.columns).index(date_col)
 
-            # Formatar as datas de emissão corretamente
-            formatted_dates = []
-            competencia_values = []
+            # Formatar as datas de emissão e inserir a competência logo após
+            df[date_col], competencias = format_emission_dates(df[date_col])
+            df.insert(col_index + 1, 'competência', competencias)
+    except Exception as e:
+        print(f"Erro ao adicionar coluna de competência: {str(e)}")
 
-            for date_str in df[date_col]:
-                try:
-                    # Limpar o valor da data (remover .0 e espaços)
-                    clean_date = str(date_str).replace('.0', '').strip()
-
-                    # Tentar extrair a data no formato DD/MM/YYYY
-                    date_match = re.search(r'(\d{2})/(\d{2})/(\d{4})', clean_date)
-                    if date_match:
-                        # Já está no formato correto
-                        dia = date_match.group(1)
-                        mes = date_match.group(2)
-                        ano = date_match.group(3)
-                        formatted_date = f"{dia}/{mes}/{ano}"
-                        competencia = f"{mes}/{ano}"  # MM/AAAA
-                    else:
-                        # Tentar extrair a data no formato numérico (DDMMYYYY)
-                        date_match = re.search(r'(\d{2})(\d{2})(\d{4})', clean_date)
-                        if date_match:
-                            # Converter para formato DD/MM/YYYY
-                            dia = date_match.group(1)
-                            mes = date_match.group(2)
-                            ano = date_match.group(3)
-                            formatted_date = f"{dia}/{mes}/{ano}"
-                            competencia = f"{mes}/{ano}"  # MM/AAAA
-                        else:
-                            # Tentar extrair a data no formato numérico (DMYYYY)
-                            date_match = re.search(r'(\d{1})(\d{2})(\d{4})', clean_date)
-                            if date_match:
-                                # Converter para formato DD/MM/YYYY
-                                dia = date_match.group(1)
-                                mes = date_match.group(2)
-                                ano = date_match.group(3)
-                                formatted_date = f"0{dia}/{mes}/{ano}"
-                                competencia = f"{mes}/{ano}"  # MM/AAAA
-                            else:
-                                formatted_date = date_str  # Manter o valor original se não conseguir processar
-                                competencia = ""
-                except Exception as e:
-                    print(f"Erro ao processar data '{date_str}': {str(e)}")
-                    formatted_date = date_str  # Manter o valor original se ocorrer erro
-                    competencia = ""
+    # Corrigir o campo de incidência para exibir o texto completo
+    if 'incidência' in df.columns:
+        df['incidência'] = df['incidência'].apply(lambda x: 'ESTAB. DO PRESTADOR' if str(x).startswith('ESTAB. DO') else x)
 
-                formatted_dates.append(formatted_date)
-                competencia_values.append(competencia)
+    return df
 
-            # Atualizar a coluna de data com os valores formatados
-            df[date_col] = formatted_dates
 
-            # Inserir a coluna de competência após a coluna de data
-            new_cols = list(df.columns)
-            new_cols.insert(col_index + 1, 'competência')
+def is_date_column(col) -> bool:
+    """Indica se o nome da coluna é de uma coluna de data"""
+    return any(date_term in str(col).lower() for date_term in DATE_TERMS)
 
-            # Criar um novo DataFrame com as colunas reorganizadas
-            new_df = pd.DataFrame(columns=new_cols)
 
-            # Copiar os dados do DataFrame original
-            for col in df.columns:
-                new_df[col] = df[col]
+def has_money_term(col) -> bool:
+    """Indica se o nome da coluna contém um termo monetário (exceto colunas de tomador/serviço)"""
+    name = str(col).lower()
+    if 'tomador' in name or 'serviço' in name or 'servico' in name:
+        return False
+    return any(value_term in name for value_term in MONEY_TERMS)
 
-            # Adicionar os valores de competência
-            new_df['competência'] = competencia_values
 
-            # Substituir o DataFrame original pelo novo
-            df = new_df
-    except Exception as e:
-        print(f"Erro ao adicionar coluna de competência: {str(e)}")
+def is_money_column(col) -> bool:
+    """Indica se o nome da coluna é de uma coluna de valores monetários (em centavos após a limpeza)
 
-    # Corrigir o campo de incidência para exibir o texto completo
-    if 'incidência' in df.columns:
-        df['incidência'] = df['incidência'].apply(lambda x: 'ESTAB. DO PRESTADOR' if str(x).startswith('ESTAB. DO') else x)
+    Colunas de data ('dt,. emissão' contém 'iss') não são consideradas
+    monetárias, embora passem pela conversão em clean_dataframe.
+    """
+    return has_money_term(col) and not is_date_column(col)
+
+
+def parse_money(values: pd.Series) -> pd.Series:
+    """Converte valores monetários ('R$ 1.234,56') em centavos (int64)
+
+    Separadores de milhar, 'R$' e espaços são ignorados; valores vazios viram
+    0. Casas decimais além da segunda são arredondadas. Levanta ValueError se
+    algum valor tiver mais de uma vírgula.
+    """
+    text = values.astype(str).fillna('').str.replace(r'[^\d,]', '', regex=True)
+    invalid = ~text.str.fullmatch(r'\d*(?:,\d*)?')
+    if invalid.any():
+        raise ValueError(f"valor monetário inválido: {values[invalid].iloc[0]!r}")
 
+    # Reais seguidos de três casas decimais (milésimos), arredondados para centavos
+    reais = text.str.replace(r',.*$', '', regex=True)
+    decimals = text.str.replace(r'^[^,]*,?', '', regex=True) + '000'
+    milesimos = (reais + decimals.str.slice(0, 3)).astype('int64')
+    return (milesimos + 5) // 10
+
+
+def money_centavos(values: pd.Series) -> pd.Series:
+    """Retorna os valores de uma coluna monetária em centavos (int64)
+
+    Aceita colunas já convertidas por clean_dataframe (centavos, inteiros),
+    colunas em reais (float) e texto. Valores ausentes viram 0.
+    """
+    if pd.api.types.is_integer_dtype(values):
+        return values.fillna(0).astype('int64')
+    if pd.api.types.is_float_dtype(values):
+        return (values.fillna(0) * 100).round().astype('int64')
+    return parse_money(values)
+
+
+def money_columns(df: pd.DataFrame) -> list:
+    """Colunas monetárias do DataFrame que estão em centavos (de tipo inteiro, int64 ou Int64)"""
+    return [col for col in df.columns if is_money_column(col) and pd.api.types.is_integer_dtype(df[col])]
+
+
+def align_columns(df: pd.DataFrame, columns: list) -> pd.DataFrame:
+    """Alinha df às colunas informadas, criando vazias as que faltam
+
+    As colunas monetárias criadas são Int64, para que continuem sendo
+    reconhecidas como centavos ao lado das mesmas colunas de outros blocos.
+    """
+    added = [col for col in columns if col not in df.columns]
+    df = df.reindex(columns=columns)
+    for col in added:
+        if is_money_column(col):
+            df[col] = df[col].astype('Int64')
     return df
+
+
+def centavos_to_reais(df: pd.DataFrame) -> pd.DataFrame:
+    """Retorna uma cópia do DataFrame com as colunas em centavos convertidas para reais
+
+    Usado pelos carregadores no momento da gravação.
+    """
+    columns = money_columns(df)
+    if not columns:
+        return df
+    df = df.copy()
+    for col in columns:
+        df[col] = df[col] / 100
+    return df
+
+
+def extract_dates(values: pd.Series) -> pd.Series:
+    """Extrai a data no formato DD/MM/YYYY de cada valor (vazio se não houver)"""
+    return values.astype(str).str.strip().str.extract(DATE_RE, expand=False).fillna('')
+
+
+def format_emission_dates(dates: pd.Series):
+    """Formata as datas de emissão como DD/MM/YYYY e calcula a competência (MM/AAAA)
+
+    Aceita datas como DD/MM/AAAA, DDMMAAAA ou DMMAAAA (valores numéricos, com
+    '.0' removido). Valores que não são datas são mantidos, com competência vazia.
+
+    Returns:
+        Tupla (datas formatadas, competências), com o mesmo índice de dates
+    """
+    text = _date_texts(dates).reset_index(drop=True)
+
+    # Cada formato é aplicado às linhas ainda não reconhecidas pelos anteriores
+    converted = []
+    pending = text.notna()
+    for search, pattern, repl in EMISSION_DATE_FORMATS:
+        mask = pending & text.str.contains(search, na=False)
+        if mask.any():
+            converted.append(text[mask].str.replace(pattern, repl, regex=True))
+            pending &= ~mask
+
+    if converted:
+        formatted = pd.concat(converted).reindex(text.index)
+    else:
+        formatted = pd.Series(pd.NA, index=text.index, dtype=text.dtype)
+    formatted.index = dates.index
+    competencias = formatted.str.slice(3).fillna('')
+
+    # Manter o valor original quando não for uma data
+    found = formatted.notna()
+    if not found.all():
+        formatted = formatted.astype(object).where(found, dates).infer_objects()
+    return formatted, competencias
+
+
+def _date_texts(dates: pd.Series) -> pd.Series:
+    """Converte as datas em texto como str(valor), removendo '.0' e espaços"""
+    if pd.api.types.is_float_dtype(dates):
+        # Datas numéricas inteiras (ex.: 3012022.0): a conversão pela parte
+        # inteira dá o mesmo texto e é bem mais rápida
+        if (dates.notna() & (dates % 1 == 0) & (dates.abs() < 1e15)).all():
+            return dates.astype('int64').astype(str)
+    return dates.astype(str).str.replace('.0', '', regex=False).str.strip()
@@ -0,0 +1,74 @@
+import json
+import multiprocessing
+import os
+import sqlite3
+import sys
+
+import pandas as pd
+import pytest
+
+from src import batch
+
+
+def test_batch_isolates_failures_and_consolidates(tmp_path, monkeypatch):
+    input_dir = tmp_path / 'livros'
+    input_dir.mkdir()
+    for name in ['a.pdf', 'b.pdf', 'c.PDF', 'notas.txt']:
+        (input_dir / name).write_bytes(b'%PDF-1.4')
+
+    def fake_extract(pdf_path, with_pages=False, **kwargs):
+        if pdf_path.endswith('b.pdf'):
+            raise Exception('PDF corrompido')
+        return [(1, pd.DataFrame({'N° Nota': ['202200000000001'], 'Situação': ['ESCRITURADA']}))]
+
+    # batch usa o Pipeline, importado pelo nome do módulo (src/ no caminho de busca)
+    pipeline = sys.modules[batch.Pipeline.__module__]
+    monkeypatch.setattr(pipeline, 'extract_tables_from_pdf', fake_extract)
+    output_dir = tmp_path / 'saida'
+    consolidated = tmp_path / 'consolidado.csv'
+
+    results = batch.run_batch([str(input_dir)], str(output_dir), format_type='csv',
+                              consolidated_path=str(consolidated), include_header=False,
+                              metrics_dir=str(tmp_path / 'metricas'))
+
+    assert [r['status'] for r in results] == ['ok', 'erro', 'ok']
+    assert 'PDF corrompido' in results[1]['erro']
+    assert sorted(p.name for p in output_dir.iterdir()) == ['a.csv', 'c.csv', batch.REPORT_NAME]
+    merged = pd.read_csv(consolidated, sep=';', encoding='utf-8-sig', dtype=str)
+    assert merged['arquivo'].tolist() == ['a.pdf', 'c.PDF']
+    report = pd.read_csv(output_dir / batch.REPORT_NAME, sep=';', encoding='utf-8-sig')
+    assert len(report) == 3
+    assert {'tempo_extracao', 'tempo_transformacao', 'tempo_carregamento'} <= set(report.columns)
+
+    # Um arquivo de métricas por PDF, inclusive o que falhou
+    metrics = sorted((tmp_path / 'metricas').iterdir())
+    assert [path.name.rsplit('-', 2)[0] for path in metrics] == ['a', 'b', 'c']
+    assert [json.loads(path.read_text(encoding='utf-8'))['sucesso'] for path in metrics] == [True, False, True]
+
+@pytest.mark.skipif(multiprocessing.get_start_method() != 'fork',
+                    reason='os processos do lote não herdam o monkeypatch sem fork')
+def test_batch_writes_sqlite_only_from_the_main_process(tmp_path, monkeypatch):
+    input_dir = tmp_path / 'livros'
+    input_dir.mkdir()
+    for name in ['a.pdf', 'b.pdf']:
+        (input_dir / name).write_bytes(b'%PDF-1.4')
+
+    def fake_extract(pdf_path, with_pages=False, **kwargs):
+        number = '202200000000001' if pdf_path.endswith('a.pdf') else '202200000000002'
+        return [(1, pd.DataFrame({'N° Nota': [number], 'Situação': ['ESCRITURADA']}))]
+
+    pipeline = sys.modules[batch.Pipeline.__module__]
+    monkeypatch.setattr(pipeline, 'extract_tables_from_pdf', fake_extract)
+    writers = []
+    load_to_sqlite = batch.load_to_sqlite
+    monkeypatch.setattr(batch, 'load_to_sqlite',
+                        lambda df, db_path, source=None: writers.append(os.getpid()) or load_to_sqlite(df, db_path, source))
+    db_path = tmp_path / 'notas.db'
+
+    results = batch.run_batch([str(input_dir)], str(tmp_path / 'saida'), format_type='csv', workers=2,
+                              db_path=str(db_path), metrics_dir=str(tmp_path / 'metricas'))
+
+    assert [r['status'] for r in results] == ['ok', 'ok']
+    assert writers == [os.getpid()] * 2
+    with sqlite3.connect(db_path) as conn:
+        assert conn.execute('SELECT COUNT(*) FROM notas').fetchone()[0] == 2
@@ -0,0 +1,49 @@
+import copy
+
+from src.benchmark_compare import compare_reports
+
+BASELINE = {'tamanhos': [{
+    'paginas': 10, 'tabelas': 7, 'linhas': 205,
+    'resumo': {'nfs_emitidas': 205, 'nfs_canceladas': 8, 'bc_tributavel': 123456},
+    'etapas': {'extracao_template': 0.5, 'load_to_excel': 2.0, 'create_summary_sheet': 0.01},
+}]}
+
+def _current(**stages):
+    report = copy.deepcopy(BASELINE)
+    report['tamanhos'][0]['etapas'].update(stages)
+    return report
+
+def test_compare_accepts_times_within_tolerance():
+    rows, failures = compare_reports(BASELINE, _current(load_to_excel=2.5), tolerance=0.3)
+    assert failures == []
+    assert [row['situacao'] for row in rows] == ['ok', 'ok', 'ok']
+
+def test_compare_flags_slow_stage_but_ignores_noise_on_tiny_stages():
+    # create_summary_sheet fica 3x mais lenta, mas só 0,02 s: ruído de medição
+    rows, failures = compare_reports(BASELINE, _current(load_to_excel=2.7, create_summary_sheet=0.03),
+                                     tolerance=0.3, min_seconds=0.05)
+    assert len(failures) == 1 and 'load_to_excel' in failures[0]
+    situations = {row['etapa']: row['situacao'] for row in rows}
+    assert situations == {'extracao_template': 'ok', 'load_to_excel': 'LENTA', 'create_summary_sheet': 'ok'}
+
+def test_compare_fails_when_results_change_even_if_faster():
+    current = _current(extracao_template=0.1)
+    current['tamanhos'][0]['linhas'] = 204
+    current['tamanhos'][0]['resumo']['bc_tributavel'] = 123000
+    rows, failures = compare_reports(BASELINE, current)
+    assert rows[0]['situacao'] == 'mais rápida'
+    assert len(failures) == 2
+    assert any('linhas' in failure for failure in failures)
+    assert any('bc_tributavel' in failure for failure in failures)
+
+def test_compare_scales_baseline_by_machine_calibration():
+    # Máquina atual duas vezes mais lenta: o dobro do tempo da base não é regressão
+    baseline = dict(copy.deepcopy(BASELINE), calibracao_s=0.2)
+    current = dict(_current(extracao_template=1.0, load_to_excel=4.0, create_summary_sheet=0.02), calibracao_s=0.4)
+    rows, failures = compare_reports(baseline, current, tolerance=0.3)
+    assert failures == []
+    assert rows[1]['ajustada_s'] == 4.0
+
+    current['tamanhos'][0]['etapas']['load_to_excel'] = 6.0
+    _, failures = compare_reports(baseline, current, tolerance=0.3)
+    assert len(failures) == 1 and 'load_to_excel' in failures[0]
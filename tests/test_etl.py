@@ -1,6 +1,116 @@
+import multiprocessing
+
 import pytest
-from src.extraction import extract_tables_from_pdf
+from src.extraction import extract_tables_from_pdf, parse_service_lines, process_service_line, split_page_ranges
 
 def test_extract_invalid_path():
     with pytest.raises(Exception):
         extract_tables_from_pdf('inexiste.pdf')
+
+def test_split_page_ranges_covers_all_pages_in_order():
+    ranges = split_page_ranges(10, 1)
+    assert ranges == ['1-3', '4-6', '7-8', '9-10']
+    assert split_page_ranges(3, 4) == ['1-1', '2-2', '3-3']
+
+def test_auto_runs_pdfplumber_only_on_pages_without_notes(monkeypatch):
+    from src import extraction
+    calls = []
+    monkeypatch.setattr(extraction, '_extract_camelot_pages',
+                        lambda pdf_path, page_range: [(1, 1, ['camelot p1']), (2, 1, [])])
+    monkeypatch.setattr(extraction, '_extract_pdfplumber_pages',
+                        lambda pdf_path, pages: calls.append(pages) or [(page, 1, [f'plumber p{page}']) for page in pages])
+
+    results = extraction._extract_auto_pages('livro.pdf', '1-3')
+
+    assert calls == [[2, 3]]
+    assert [dfs for _, _, dfs in results if dfs] == [['camelot p1'], ['plumber p2'], ['plumber p3']]
+
+def test_parse_service_lines_matches_process_service_line():
+    lines = [
+        '20220000001 05/01/2022 12.345.678/0001-90 EMPRESA X 1.500,00 1.500,00 5,00 75,00 0,00',
+        'linha sem nota 1.000,00',
+        '20220000002 123.456.789-01 2.000,00',
+        '20220000003',
+    ]
+    expected = [row for row in map(process_service_line, lines) if row]
+
+    data = parse_service_lines(lines)
+
+    assert data.to_dict('records') == expected
+    assert parse_service_lines(['sem notas']).empty
+
+def test_split_page_ranges_only_distributes_prefiltered_pages():
+    from src.extraction import _parse_page_range
+    ranges = split_page_ranges(0, pages_per_range=3, pages=[3, 4, 5, 7, 9, 10])
+    assert ranges == ['3-5', '7-7,9-10']
+    assert [page for page_range in ranges for page in _parse_page_range(page_range)] == [3, 4, 5, 7, 9, 10]
+
+def _fake_page_tables(pdf_path, **kwargs):
+    import pandas as pd
+    for page in range(1, 6):
+        yield page, pd.DataFrame({'N° Nota': [f'2022000000{page:05d}'], 'Base de Cálculo': [f'{page}.500,00'],
+                                  'Situação': ['ESCRITURADA']})
+
+# O processo de extração do pipeline só enxerga os monkeypatch se for criado com fork
+needs_fork = pytest.mark.skipif(multiprocessing.get_start_method() != 'fork',
+                                reason='o processo de extração não herda o monkeypatch sem fork')
+
+@needs_fork
+def test_pipelined_etl_matches_streaming_etl(tmp_path, monkeypatch):
+    from src import streaming
+    monkeypatch.setattr(streaming, 'iter_page_tables', _fake_page_tables)
+    pages = []
+
+    sequential = streaming.run_streaming_etl('livro.pdf', str(tmp_path / 'sequencial.csv'), format_type='csv',
+                                             include_header=False)
+    pipelined = streaming.run_pipelined_etl('livro.pdf', str(tmp_path / 'pipeline.csv'), format_type='csv',
+                                            include_header=False, queue_size=1,
+                                            progress=lambda page, rows: pages.append(page))
+
+    assert sequential == pipelined == 5
+    assert pages == [1, 2, 3, 4, 5]
+    assert (tmp_path / 'pipeline.csv').read_bytes() == (tmp_path / 'sequencial.csv').read_bytes()
+
+@needs_fork
+def test_pipelined_etl_reports_extraction_errors(tmp_path, monkeypatch):
+    from src import streaming
+
+    def failing_page_tables(pdf_path, **kwargs):
+        yield from _fake_page_tables(pdf_path)
+        raise Exception('Falha ao extrair tabelas do PDF: página 6 ilegível')
+
+    monkeypatch.setattr(streaming, 'iter_page_tables', failing_page_tables)
+
+    with pytest.raises(Exception, match='página 6 ilegível'):
+        streaming.run_pipelined_etl('livro.pdf', str(tmp_path / 'dados.csv'), format_type='csv', queue_size=1)
+    assert list(tmp_path.iterdir()) == []
+
+def test_streaming_etl_discards_partial_excel_on_error(tmp_path, monkeypatch):
+    from src import streaming
+
+    def failing_page_tables(pdf_path, **kwargs):
+        yield from _fake_page_tables(pdf_path)
+        raise Exception('Falha ao extrair tabelas do PDF: página 6 ilegível')
+
+    monkeypatch.setattr(streaming, 'iter_page_tables', failing_page_tables)
+
+    with pytest.raises(Exception, match='página 6 ilegível'):
+        streaming.run_streaming_etl('livro.pdf', str(tmp_path / 'dados.xlsx'), format_type='excel')
+    assert list(tmp_path.iterdir()) == []
+
+def test_pipelined_cleaner_records_prefilter_result_sent_by_extraction():
+    import queue
+    import threading
+    from src import streaming
+    from src.stages import StageTimer
+
+    tables, cleaned, timer = queue.Queue(), queue.Queue(), StageTimer()
+    page_num, df = next(_fake_page_tables('livro.pdf'))
+    for item in [(streaming.PREFILTER, 5, 2), (page_num, df, 0.1, 0.1), streaming.END_OF_TABLES]:
+        tables.put(item)
+
+    streaming._clean_tables(tables, None, cleaned, {}, threading.Event(), timer)
+
+    assert cleaned.get()[0] == 1 and cleaned.get() is streaming.END_OF_TABLES
+    extraction = timer.stats['extracao']
+    assert (extraction.pages_checked, extraction.pages_skipped, extraction.tables) == (5, 2, 1)
@@ -0,0 +1,68 @@
+import os
+
+import pandas as pd
+import pytest
+
+pytest.importorskip('pyarrow')
+
+from src.extraction_cache import ExtractionCache
+
+def _pdf(tmp_path, content=b'%PDF-1.4 livro'):
+    path = tmp_path / 'livro.pdf'
+    path.write_bytes(content)
+    return str(path)
+
+def test_cache_roundtrip_preserves_pages_and_tables(tmp_path):
+    cache = ExtractionCache(str(tmp_path / 'cache'))
+    key = cache.key(_pdf(tmp_path), 'auto')
+    first = pd.DataFrame([['202200000000001', '03/01/2022'], ['202200000000002', None]],
+                         columns=['N° Nota', 'Dt,. Emissão'], index=[0, 3])
+    second = pd.DataFrame([['202200000000003', '04/01/2022']], columns=['N° Nota', 'Dt,. Emissão'])
+
+    assert cache.load(key) is None
+    cache.store(key, [(3, first), (3, second), (4, first)])
+
+    loaded = cache.load(key)
+    assert [page for page, _ in loaded] == [3, 3, 4]
+    assert loaded[0][1].values.tolist() == first.values.tolist()
+    assert list(loaded[0][1].index) == [0, 3]
+    assert list(loaded[1][1].columns) == ['N° Nota', 'Dt,. Emissão']
+
+def test_cache_key_changes_with_content_and_method(tmp_path):
+    cache = ExtractionCache(str(tmp_path / 'cache'))
+    pdf_path = _pdf(tmp_path)
+    key = cache.key(pdf_path, 'auto')
+    assert key != cache.key(pdf_path, 'camelot')
+    assert key != cache.key(_pdf(tmp_path, b'%PDF-1.4 outro livro'), 'auto')
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    cache = ExtractionCache(str(tmp_path / 'cache'))
+    df = pd.DataFrame([['202200000000001'] * 5] * 50)
+    for i, key in enumerate(['a', 'b', 'c']):
+        cache.store(key, [(1, df)])
+        os.utime(cache.path(key), (i, i))
+
+    cache.max_bytes = os.path.getsize(cache.path('c')) * 2
+    cache.evict()
+    assert sorted(os.listdir(cache.cache_dir)) == ['b.parquet', 'c.parquet']
+
+def test_extraction_with_and_without_prefilter_use_separate_cache_entries(tmp_path, monkeypatch):
+    from src import extraction
+    cache_dir = str(tmp_path / 'cache')
+    monkeypatch.setattr(extraction, 'open_cache', lambda use_cache: ExtractionCache(cache_dir))
+    calls = []
+
+    def fake_extract(pdf_path, method, workers, prefilter=True, checkpoint=None, pages=None, on_prefilter=None):
+        calls.append(prefilter)
+        return [(1, pd.DataFrame({'N° Nota': ['202200000000001' if prefilter else 'capa']}))]
+
+    monkeypatch.setattr(extraction, '_extract_page_tables', fake_extract)
+    pdf_path = _pdf(tmp_path)
+
+    filtered = extraction.extract_tables_from_pdf(pdf_path, method='template')
+    unfiltered = extraction.extract_tables_from_pdf(pdf_path, method='template', prefilter=False)
+    again = extraction.extract_tables_from_pdf(pdf_path, method='template')
+
+    assert calls == [True, False]
+    assert unfiltered[0].values.tolist() == [['capa']]
+    assert again[0].values.tolist() == filtered[0].values.tolist() == [['202200000000001']]
@@ -0,0 +1,65 @@
+import pandas as pd
+import pytest
+
+pytest.importorskip('pyarrow')
+
+from src import extraction
+
+
+def test_resume_reuses_completed_page_ranges(tmp_path, monkeypatch):
+    pdf_path = tmp_path / 'livro.pdf'
+    pdf_path.write_bytes(b'%PDF-1.4 livro')
+    checkpoint_dir = str(tmp_path / 'checkpoints')
+    calls = []
+
+    def fake_extractor(pdf_path, page_range, fail_at=None):
+        calls.append(page_range)
+        if page_range == fail_at:
+            raise RuntimeError('página corrompida')
+        first = int(page_range.split('-')[0])
+        return [(first, 1, [pd.DataFrame({'N° Nota': [f'2022000000{first}']})])]
+
+    monkeypatch.setattr(extraction, 'count_pages', lambda pdf_path: 25)
+    monkeypatch.setitem(extraction.EXTRACTORS, 'camelot', lambda p, r: fake_extractor(p, r, fail_at='11-20'))
+    with pytest.raises(Exception):
+        extraction.extract_tables_from_pdf(str(pdf_path), method='camelot', use_cache=False, prefilter=False,
+                                           checkpoint_dir=checkpoint_dir)
+    assert calls == ['1-10', '11-20']
+
+    calls.clear()
+    monkeypatch.setitem(extraction.EXTRACTORS, 'camelot', fake_extractor)
+    tables = extraction.extract_tables_from_pdf(str(pdf_path), method='camelot', use_cache=False, prefilter=False,
+                                                checkpoint_dir=checkpoint_dir, resume=True)
+
+    assert calls == ['11-20', '21-25']
+    assert [df.iloc[0, 0] for df in tables] == ['20220000001', '202200000011', '202200000021']
+    # Extração concluída: os pontos de controle são descartados
+    assert not any((tmp_path / 'checkpoints').iterdir())
+
+
+def test_streaming_extraction_resumes_sequential_checkpoint(tmp_path, monkeypatch):
+    pdf_path = tmp_path / 'livro.pdf'
+    pdf_path.write_bytes(b'%PDF-1.4 livro')
+    checkpoint_dir = str(tmp_path / 'checkpoints')
+    calls = []
+
+    def fake_extractor(pdf_path, page_range, fail_at=None):
+        calls.append(page_range)
+        if page_range == fail_at:
+            raise RuntimeError('página corrompida')
+        first = int(page_range.split('-')[0])
+        return [(first, 1, [pd.DataFrame({'N° Nota': [f'2022000000{first}']})])]
+
+    monkeypatch.setattr(extraction, 'count_pages', lambda pdf_path: 25)
+    monkeypatch.setitem(extraction.EXTRACTORS, 'camelot', lambda p, r: fake_extractor(p, r, fail_at='21-25'))
+    with pytest.raises(Exception):
+        extraction.extract_tables_from_pdf(str(pdf_path), method='camelot', use_cache=False, prefilter=False,
+                                           checkpoint_dir=checkpoint_dir)
+
+    calls.clear()
+    monkeypatch.setitem(extraction.EXTRACTORS, 'camelot', fake_extractor)
+    tables = list(extraction.iter_tables_from_pdf(str(pdf_path), method='camelot', chunk_size=3, use_cache=False,
+                                                  prefilter=False, checkpoint_dir=checkpoint_dir, resume=True))
+
+    assert calls == ['21-25']
+    assert [df.iloc[0, 0] for df in tables] == ['20220000001', '202200000011', '202200000021']
@@ -0,0 +1,243 @@
+import gzip
+import sqlite3
+
+import pandas as pd
+import pytest
+from openpyxl import load_workbook
+from src.loading import (ExcelStreamWriter, SummaryAccumulator, append_to_excel, compute_column_widths,
+                         load_to_excel, summarize_by_competencia)
+from src.loading_csv import load_to_csv, CSVStreamWriter
+
+def test_csv_stream_writer_matches_load_to_csv(tmp_path):
+    df = pd.DataFrame({'n° nota': ['202200000000001', '202200000000002', '202200000000003'],
+                       'iss próprio': [1323.37, 0.6, 10.5]})
+    expected = load_to_csv(df, str(tmp_path / 'completo.csv'), include_header=False)
+
+    with CSVStreamWriter(str(tmp_path / 'streaming.csv'), include_header=False) as writer:
+        writer.write(df.iloc[:2])
+        writer.write(df.iloc[2:])
+
+    assert writer.rows_written == 3
+    assert (tmp_path / 'streaming.csv').read_bytes() == open(expected, 'rb').read()
+
+def test_load_to_csv_compresses_by_extension(tmp_path):
+    df = pd.DataFrame({'n° nota': ['202200000000001', '202200000000002'], 'iss próprio': [132337, 60]})
+    load_to_csv(df, str(tmp_path / 'dados.csv'), include_header=False)
+    load_to_csv(df, str(tmp_path / 'dados.csv.gz'), include_header=False)
+
+    assert gzip.open(tmp_path / 'dados.csv.gz').read() == (tmp_path / 'dados.csv').read_bytes()
+    assert sorted(path.name for path in tmp_path.iterdir()) == ['dados.csv', 'dados.csv.gz']
+
+def test_csv_stream_writer_keeps_destination_on_error(tmp_path):
+    csv_path = tmp_path / 'dados.csv'
+    csv_path.write_text('anterior')
+
+    with pytest.raises(RuntimeError):
+        with CSVStreamWriter(str(csv_path), include_header=False) as writer:
+            writer.write(pd.DataFrame({'n° nota': ['1']}))
+            raise RuntimeError('falha na extração')
+
+    assert csv_path.read_text() == 'anterior'
+    assert [path.name for path in tmp_path.iterdir()] == ['dados.csv']
+
+def test_summarize_by_competencia_counts_and_sums_valid_notes():
+    df = pd.DataFrame({
+        'n° nota': ['1', '2', '2', '3', '4', '5', '6'],
+        'competência': ['02/2022', '01/2022', '01/2022', '01/2022', '01/2022', '03/2022', ''],
+        'situação': ['CANCELADA', 'QUITADA', 'QUITADA', 'ESCRITURADA', 'CANCELADA', 'ESCRITURADA', 'ESCRITURADA'],
+        'base de cálculo': [1000, 150000, 150000, 2000, 5000, 99, 7],
+        'iss próprio': [30, 4500, 4500, 60, 150, 3, 1],
+    })
+
+    summary = summarize_by_competencia(df)
+
+    # A nota 2 repetida é contada uma vez e a competência vazia é ignorada
+    assert summary.values.tolist() == [
+        ['01/2022', 'QUITADA', 3, 1, 2, 152000, 4560, 0],
+        ['02/2022', 'CANCELADA', 1, 1, 0, 0, 0, 0],
+        ['03/2022', 'ESCRITURADA', 1, 0, 1, 99, 3, 0],
+    ]
+
+def test_summary_accumulator_matches_summary_of_all_rows():
+    df = pd.DataFrame({
+        'competência': ['01/2022', '01/2022', '01/2022', '02/2022', '01/2022'],
+        'situação': ['ESCRITURADA', 'QUITADA', 'QUITADA', 'CANCELADA', 'ESCRITURADA'],
+        'base de cálculo': [100, 200, 200, 300, 400],
+    })
+    summary = SummaryAccumulator()
+    # A linha repetida fica em blocos diferentes
+    summary.add(df.iloc[:2])
+    summary.add(df.iloc[2:])
+
+    assert summary.result().values.tolist() == summarize_by_competencia(df).values.tolist()
+
+def test_summary_accumulator_counts_duplicates_across_reduced_blocks_once(monkeypatch):
+    df = pd.DataFrame({
+        'competência': ['01/2022', '01/2022', '01/2022', '01/2022', '02/2022', '02/2022', '01/2022', '02/2022'],
+        'situação': ['ESCRITURADA', 'QUITADA', 'QUITADA', 'ESCRITURADA', 'ESCRITURADA', 'ESCRITURADA',
+                     'ESCRITURADA', 'CANCELADA'],
+        'base de cálculo': [100, 200, 200, 300, 400, 400, 100, 500],
+    })
+    # Blocos de duas linhas reduzidos um a um: a primeira linha se repete três blocos depois
+    monkeypatch.setattr(SummaryAccumulator, 'BUFFER_ROWS', 2)
+    monkeypatch.setattr(SummaryAccumulator, 'COMBINE_EVERY', 3)
+    summary = SummaryAccumulator()
+    for start in range(0, len(df), 2):
+        summary.add(df.iloc[start:start + 2])
+
+    assert summary.result()['nfs_emitidas'].tolist() == [3, 2]
+    assert summary.result().values.tolist() == summarize_by_competencia(df).values.tolist()
+
+def test_excel_stream_writer_matches_load_to_excel(tmp_path):
+    df = pd.DataFrame({
+        'n° nota': ['202200000000001', '202200000000002', '202200000000003'],
+        'dt,. emissão': ['03/01/2022', '15/01/2022', '02/02/2022'],
+        'competência': ['01/2022', '01/2022', '02/2022'],
+        'incidência': ['ESTAB. DO PRESTADOR', None, 'ESTAB. DO TOMADOR'],
+        'base de cálculo': [150000, 2000, 99],
+        'situação': ['ESCRITURADA', 'CANCELADA', 'ESCRITURADA'],
+    })
+    load_to_excel(df, str(tmp_path / 'completo.xlsx'))
+
+    with ExcelStreamWriter(str(tmp_path / 'streaming.xlsx')) as writer:
+        writer.write(df.iloc[:2])
+        writer.write(df.iloc[2:])
+
+    expected = load_workbook(tmp_path / 'completo.xlsx')
+    obtained = load_workbook(tmp_path / 'streaming.xlsx')
+    assert obtained.sheetnames == expected.sheetnames == ['Resumo', 'Dados']
+    for name in expected.sheetnames:
+        for expected_row, obtained_row in zip(expected[name].iter_rows(), obtained[name].iter_rows()):
+            for expected_cell, obtained_cell in zip(expected_row, obtained_row):
+                assert obtained_cell.value == expected_cell.value
+                assert obtained_cell.number_format == expected_cell.number_format
+                assert obtained_cell.alignment.horizontal == expected_cell.alignment.horizontal
+
+def test_excel_stream_writer_keeps_previous_workbook_on_error(tmp_path):
+    df = pd.DataFrame({'n° nota': ['202200000000001'], 'competência': ['01/2022'], 'base de cálculo': [150000],
+                       'situação': ['ESCRITURADA']})
+    excel_path = str(tmp_path / 'dados.xlsx')
+    load_to_excel(df, excel_path)
+    previous = (tmp_path / 'dados.xlsx').read_bytes()
+
+    with pytest.raises(RuntimeError):
+        with ExcelStreamWriter(excel_path) as writer:
+            writer.write(df)
+            raise RuntimeError('falha no meio da gravação')
+
+    assert (tmp_path / 'dados.xlsx').read_bytes() == previous
+    assert [path.name for path in tmp_path.iterdir()] == ['dados.xlsx']
+
+def test_compute_column_widths_uses_content_and_minimums():
+    df = pd.DataFrame({
+        'n° nota': ['202200000000001', None],
+        'incidência': ['ESTAB.', 'ESTAB.'],
+        'tomador do serviço': ['A', 'B'],
+        'nat. da operação': ['EXIGÍVEL', None],
+        'base de cálculo': [1500.0, 20.0],
+        'serviço': ['x' * 80, 'y'],
+    })
+
+    assert compute_column_widths(df) == {
+        'n° nota': 17, 'incidência': 35, 'tomador do serviço': 30,
+        'nat. da operação': 20, 'base de cálculo': 17, 'serviço': 50,
+    }
+
+def test_compute_column_widths_estimates_from_sample():
+    df = pd.DataFrame({'serviço': ['abc'] * 1000 + ['x' * 30]})
+
+    assert compute_column_widths(df, sample_size=10) == {'serviço': 10}
+    assert compute_column_widths(df, sample_size=2000) == {'serviço': 32}
+
+def test_append_to_excel_adds_only_new_notes_and_updates_summary(tmp_path):
+    df = pd.DataFrame({
+        'n° nota': ['202200000000001', '202200000000002', '202200000000003', '202200000000004'],
+        'competência': ['01/2022', '01/2022', '02/2022', '03/2022'],
+        'situação': ['ESCRITURADA', 'CANCELADA', 'ESCRITURADA', 'ESCRITURADA'],
+        'base de cálculo': [150000, 2000, 99, 500],
+    })
+    load_to_excel(df.iloc[:3], str(tmp_path / 'incremental.xlsx'))
+    load_to_excel(df, str(tmp_path / 'completo.xlsx'))
+
+    # A nota 3 já está na planilha; só a nota 4 é acrescentada
+    assert append_to_excel(df.iloc[2:], str(tmp_path / 'incremental.xlsx')) == 1
+
+    expected = load_workbook(tmp_path / 'completo.xlsx')
+    obtained = load_workbook(tmp_path / 'incremental.xlsx')
+    for name in ['Dados', 'Resumo']:
+        assert list(obtained[name].values) == list(expected[name].values)
+
+def test_append_to_excel_writes_repeated_notes_once_in_a_new_workbook(tmp_path):
+    df = pd.DataFrame({
+        'n° nota': ['202200000000001', '202200000000002', '202200000000001'],
+        'competência': ['01/2022', '01/2022', '01/2022'],
+        'situação': ['ESCRITURADA', 'ESCRITURADA', 'ESCRITURADA'],
+        'base de cálculo': [150000, 2000, 150000],
+    })
+
+    # Sem planilha, as notas repetidas são filtradas como no acréscimo
+    assert append_to_excel(df, str(tmp_path / 'nova.xlsx')) == 2
+    assert append_to_excel(df, str(tmp_path / 'nova.xlsx')) == 0
+    dados = list(load_workbook(tmp_path / 'nova.xlsx')['Dados'].values)
+    assert [row[0] for row in dados[1:]] == ['202200000000001', '202200000000002']
+
+def test_excel_stream_writer_shards_data_sheets(tmp_path):
+    df = pd.DataFrame({
+        'n° nota': [f"20220000000000{i}" for i in range(5)],
+        'competência': ['01/2022', '01/2022', '02/2022', '02/2022', '03/2022'],
+        'situação': ['ESCRITURADA'] * 5,
+        'base de cálculo': [100, 200, 300, 400, 500],
+    })
+    with ExcelStreamWriter(str(tmp_path / 'dados.xlsx'), max_rows=2) as writer:
+        writer.write(df.iloc[:3])
+        writer.write(df.iloc[3:])
+
+    wb = load_workbook(tmp_path / 'dados.xlsx')
+    assert wb.sheetnames == ['Resumo', 'Dados', 'Dados_2', 'Dados_3']
+    assert [wb[name].max_row for name in wb.sheetnames[1:]] == [3, 3, 2]
+    assert wb['Dados_3']['A1'].value == 'n° nota'
+    # O resumo considera as notas de todas as abas
+    assert [row[2] for row in wb['Resumo'].iter_rows(min_row=3, max_row=5, values_only=True)] == [2, 2, 1]
+
+    # A atualização incremental continua na última aba e cria as seguintes
+    novas = df.assign(**{'n° nota': df['n° nota'] + '9'})
+    assert append_to_excel(novas, str(tmp_path / 'dados.xlsx'), max_rows=2) == 5
+    wb = load_workbook(tmp_path / 'dados.xlsx')
+    assert wb.sheetnames == ['Resumo', 'Dados', 'Dados_2', 'Dados_3', 'Dados_4', 'Dados_5']
+    assert [row[2] for row in wb['Resumo'].iter_rows(min_row=3, max_row=5, values_only=True)] == [4, 4, 2]
+
+def test_writers_keep_centavos_when_tables_with_different_columns_are_combined(tmp_path):
+    from src.loading_parquet import load_to_parquet
+    from src.loading_sqlite import load_to_sqlite
+    from src.transformation import clean_dataframe
+
+    # Só a primeira tabela tem ISS Retido: na concatenação, a segunda fica sem valor nessa coluna
+    first = clean_dataframe(pd.DataFrame({'N° Nota': ['202200000000001'], 'Dt,. Emissão': ['03/01/2022'],
+                                          'Base de Cálculo': ['100,00'], 'ISS Retido': ['10,00'],
+                                          'Situação': ['ESCRITURADA']}))
+    second = clean_dataframe(pd.DataFrame({'N° Nota': ['202200000000002'], 'Dt,. Emissão': ['04/01/2022'],
+                                           'Base de Cálculo': ['50,00'], 'Situação': ['ESCRITURADA']}))
+    df = pd.concat([first, second], ignore_index=True)
+    assert pd.api.types.is_integer_dtype(df['iss retido'])
+
+    load_to_excel(df, str(tmp_path / 'dados.xlsx'))
+    with ExcelStreamWriter(str(tmp_path / 'streaming.xlsx')) as writer:
+        writer.write(first)
+        writer.write(second)
+    for name in ['dados.xlsx', 'streaming.xlsx']:
+        wb = load_workbook(tmp_path / name)
+        assert [row[4] for row in wb['Dados'].iter_rows(min_row=2, values_only=True)] == [10, None]
+        # Resumo de 01/2022: BC tributável 150,00, ISS retido 10,00
+        assert [cell.value for cell in wb['Resumo'][3]][5:8] == [150, 0, 10]
+
+    load_to_csv(df, str(tmp_path / 'dados.csv'), include_header=False)
+    csv = pd.read_csv(tmp_path / 'dados.csv', sep=';', encoding='utf-8-sig')
+    assert csv['iss retido'].fillna(0).tolist() == [10.0, 0.0]
+
+    load_to_parquet(df, str(tmp_path / 'dados.parquet'))
+    parquet = pd.read_parquet(tmp_path / 'dados.parquet')['iss retido']
+    assert parquet[0] == 1000 and pd.isna(parquet[1])
+
+    load_to_sqlite(df, str(tmp_path / 'notas.db'))
+    with sqlite3.connect(tmp_path / 'notas.db') as conn:
+        assert conn.execute('SELECT iss_retido FROM notas ORDER BY numero_nota').fetchall() == [(1000,), (None,)]
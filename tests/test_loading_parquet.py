@@ -0,0 +1,70 @@
+import datetime
+
+import pandas as pd
+import pytest
+from src.loading_parquet import ParquetStreamWriter, load_to_parquet
+
+def sample_df():
+    return pd.DataFrame({
+        'n° nota': ['202200000000001', '202200000000002', '202200000000003'],
+        'dt,. emissão': ['03/01/2022', '15/01/2022', '02/02/2022'],
+        'competência': ['01/2022', '01/2022', '02/2022'],
+        'base de cálculo': [150000, 2000, 99],
+        'situação': ['ESCRITURADA', 'CANCELADA', 'ESCRITURADA'],
+    })
+
+def test_load_to_parquet_writes_typed_dataset_by_competencia(tmp_path):
+    path = tmp_path / 'dados.parquet'
+    load_to_parquet(sample_df(), str(path))
+
+    assert sorted(p.name for p in path.iterdir()) == ['competencia=2022-01', 'competencia=2022-02']
+    df = pd.read_parquet(path)
+    assert df['n° nota'].tolist() == ['202200000000001', '202200000000002', '202200000000003']
+    assert df['dt,. emissão'].tolist()[0] == datetime.date(2022, 1, 3)
+    assert df['base de cálculo'].dtype == 'int64'
+    assert df['base de cálculo'].tolist() == [150000, 2000, 99]
+    assert isinstance(df['situação'].dtype, pd.CategoricalDtype)
+
+    janeiro = pd.read_parquet(path, filters=[('competencia', '=', '2022-01')])
+    assert len(janeiro) == 2
+
+def test_parquet_stream_writer_matches_load_to_parquet(tmp_path):
+    df = sample_df()
+    load_to_parquet(df, str(tmp_path / 'completo.parquet'))
+    with ParquetStreamWriter(str(tmp_path / 'streaming.parquet')) as writer:
+        writer.write(df.iloc[:1])
+        writer.write(df.iloc[1:])
+
+    assert writer.rows_written == 3
+    assert pd.read_parquet(tmp_path / 'streaming.parquet').equals(pd.read_parquet(tmp_path / 'completo.parquet'))
+
+def test_parquet_stream_writer_converts_later_money_blocks_and_counts_invalid_dates(tmp_path):
+    df = sample_df()
+    later = df.iloc[2:].assign(**{'base de cálculo': ['1.500,00'], 'dt,. emissão': ['31/02/2022']})
+    with ParquetStreamWriter(str(tmp_path / 'dados.parquet')) as writer:
+        writer.write(df.iloc[:2])
+        writer.write(later)
+
+    obtained = pd.read_parquet(tmp_path / 'dados.parquet')
+    assert obtained['base de cálculo'].tolist() == [150000, 2000, 150000]
+    assert obtained['dt,. emissão'].isna().tolist() == [False, False, True]
+    assert writer.invalid_dates == {'dt,. emissão': 1}
+
+def test_parquet_stream_writer_names_the_column_that_cannot_be_converted(tmp_path):
+    df = sample_df()
+    with pytest.raises(Exception, match="coluna 'base de cálculo'"):
+        with ParquetStreamWriter(str(tmp_path / 'dados.parquet')) as writer:
+            writer.write(df.iloc[:2])
+            writer.write(df.iloc[2:].assign(**{'base de cálculo': ['1,500,00']}))
+    assert list(tmp_path.iterdir()) == []
+
+def test_parquet_stream_writer_replaces_an_existing_dataset_or_file(tmp_path):
+    path = tmp_path / 'dados.parquet'
+    path.write_text('arquivo antigo')
+    for df in (sample_df(), sample_df().iloc[:1]):
+        with ParquetStreamWriter(str(path)) as writer:
+            writer.write(df)
+        assert len(pd.read_parquet(path)) == len(df)
+
+    assert sorted(p.name for p in path.iterdir()) == ['competencia=2022-01']
+    assert [p.name for p in tmp_path.iterdir()] == ['dados.parquet']
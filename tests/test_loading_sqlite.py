@@ -0,0 +1,34 @@
+import pandas as pd
+from src.loading_sqlite import load_to_sqlite, query_notas
+
+def sample_df():
+    return pd.DataFrame({
+        'n° nota': ['202200000000001', '202200000000002', '202200000000003'],
+        'dt,. emissão': ['03/12/2021', '15/01/2022', '02/02/2023'],
+        'competência': ['12/2021', '01/2022', '02/2023'],
+        'cpf/cnpj tomador': ['60.961.422/0001-55', '018.583.443-44', '60.961.422/0001-55'],
+        'base de cálculo': [150000, 2000, 99],
+        'situação': ['ESCRITURADA', 'ESCRITURADA', 'ESCRITURADA'],
+    })
+
+def test_load_to_sqlite_upserts_on_note_number(tmp_path):
+    db_path = str(tmp_path / 'notas.db')
+    df = sample_df()
+    load_to_sqlite(df, db_path, source='2022.pdf')
+    # Reprocessar o mesmo livro atualiza as notas em vez de duplicá-las
+    df.loc[1, 'situação'] = 'CANCELADA'
+    load_to_sqlite(df, db_path, source='2022.pdf')
+
+    notas = query_notas(db_path)
+    assert notas['numero_nota'].tolist() == ['202200000000001', '202200000000002', '202200000000003']
+    assert notas['situacao'].tolist() == ['ESCRITURADA', 'CANCELADA', 'ESCRITURADA']
+    assert notas['data_emissao'].tolist() == ['2021-12-03', '2022-01-15', '2023-02-02']
+    assert notas['base_calculo'].tolist() == [150000, 2000, 99]
+
+def test_query_notas_filters_by_documento_and_competencia(tmp_path):
+    db_path = str(tmp_path / 'notas.db')
+    load_to_sqlite(sample_df(), db_path)
+
+    notas = query_notas(db_path, documento='60961422000155', de='2022', ate='2023')
+    assert notas['numero_nota'].tolist() == ['202200000000003']
+    assert query_notas(db_path, de='12/2021', ate='01/2022')['competencia'].tolist() == ['2021-12', '2022-01']
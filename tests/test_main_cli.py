@@ -0,0 +1,54 @@
+import sys
+
+import pandas as pd
+import pytest
+from src import main_cli
+
+
+class FakePipeline:
+    instances = []
+
+    def __init__(self, pdf_path, **kwargs):
+        self.kwargs = kwargs
+        self.stats = {'extracao': type('Stats', (), {'rows': 0})()}
+        FakePipeline.instances.append(self)
+
+    def run(self, output_path, **kwargs):
+        pass
+
+
+def test_checkpoints_are_only_written_when_requested(tmp_path, monkeypatch):
+    pdf_path = tmp_path / 'livro.pdf'
+    pdf_path.write_bytes(b'%PDF-1.4 livro')
+    monkeypatch.setattr(main_cli, 'Pipeline', FakePipeline)
+    FakePipeline.instances = []
+
+    for argv in ([], ['--resume'], ['--checkpoint-dir', str(tmp_path / 'pontos')]):
+        main_cli.main([str(pdf_path), str(tmp_path / 'saida.xlsx')] + argv)
+
+    assert [p.kwargs['checkpoint_dir'] for p in FakePipeline.instances] == [
+        None, main_cli.DEFAULT_CHECKPOINT_DIR, str(tmp_path / 'pontos')]
+
+
+def _page_tables(pdf_path, **kwargs):
+    for page in (2, 3):
+        yield page, pd.DataFrame({'N° Nota': [f'2022000000{page:05d}'], 'Base de Cálculo': ['1.500,00'],
+                                  'Situação': ['ESCRITURADA']})
+
+
+@pytest.mark.parametrize('argv', [['--workers', '2'], ['--streaming']])
+def test_cli_writes_every_table_of_a_multi_table_pdf(tmp_path, monkeypatch, argv):
+    pdf_path = tmp_path / 'livro.pdf'
+    pdf_path.write_bytes(b'%PDF-1.4 livro')
+    # main_cli importa pipeline e streaming pelo nome do módulo (src/ no caminho de busca)
+    pipeline = sys.modules[main_cli.Pipeline.__module__]
+    streaming = sys.modules[pipeline.run_streaming_etl.__module__]
+    monkeypatch.setattr(pipeline, 'extract_tables_from_pdf',
+                        lambda pdf_path, with_pages=False, **kwargs: list(_page_tables(pdf_path)))
+    monkeypatch.setattr(streaming, 'iter_page_tables', _page_tables)
+
+    excel_path = tmp_path / 'saida.xlsx'
+    main_cli.main([str(pdf_path), str(excel_path), '--metricas', str(tmp_path / 'metricas.json')] + argv)
+
+    # Antes só a primeira tabela era gravada
+    assert pd.read_excel(excel_path, dtype=str)['n° nota'].tolist() == ['202200000000002', '202200000000003']
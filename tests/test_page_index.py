@@ -0,0 +1,22 @@
+from src import page_index
+
+
+def test_page_index_maps_pages_to_emission_months(tmp_path, monkeypatch):
+    pdf_path = tmp_path / 'livro.pdf'
+    pdf_path.write_bytes(b'%PDF-1.4 livro')
+    texts = [
+        (1, 'TERMO DE ABERTURA'),
+        (2, '202200000000001 03/01/2022 60.961.422/0001-55\n202200000000002 31/01/2022 018.583.443-44'),
+        (3, '202200000000003 01/02/2022 344.705.303-87\n202200000000004 02/03/2022 508.141.093-49'),
+    ]
+    calls = []
+    monkeypatch.setattr(page_index, 'iter_page_texts', lambda pdf_path: calls.append(pdf_path) or iter(texts))
+
+    index = page_index.load_page_index(str(pdf_path), str(tmp_path / 'index'))
+    assert index == {2: ['01/2022'], 3: ['02/2022', '03/2022']}
+    assert page_index.pages_for_competencias(index, ['03/2022', '01/2022']) == [2, 3]
+    assert page_index.pages_for_competencias(index, ['12/2022']) == []
+
+    # O índice gravado é reaproveitado sem ler o PDF de novo
+    assert page_index.load_page_index(str(pdf_path), str(tmp_path / 'index')) == index
+    assert len(calls) == 1
@@ -0,0 +1,127 @@
+import json
+import multiprocessing
+import sys
+
+import pandas as pd
+import pytest
+from src import pipeline
+from src.pipeline import Pipeline
+from src.stages import ProfileHook, StageTimer
+
+
+def _page_tables(pdf_path, **kwargs):
+    for page in (2, 3, 3):
+        yield page, pd.DataFrame({'N° Nota': [f'2022000000{page:05d}'] * 2, 'Base de Cálculo': ['1.500,00'] * 2,
+                                  'Situação': ['ESCRITURADA'] * 2})
+
+
+class RecordingHook:
+    def __init__(self):
+        self.events = []
+
+    def stage_started(self, name):
+        self.events.append(('inicio', name))
+
+    def stage_finished(self, name, stats):
+        self.events.append(('fim', name))
+
+
+def test_pipeline_streaming_run_records_each_stage(tmp_path, monkeypatch):
+    # pipeline importa streaming pelo nome do módulo (src/ no caminho de busca)
+    streaming = sys.modules[pipeline.run_streaming_etl.__module__]
+    monkeypatch.setattr(streaming, 'iter_page_tables', _page_tables)
+    hook = RecordingHook()
+
+    etl = Pipeline('livro.pdf', hooks=[hook], metrics_path=str(tmp_path / 'metricas.json'))
+    rows = etl.run(str(tmp_path / 'dados.csv'), format_type='csv', include_header=False, streaming=True)
+
+    assert rows == 6
+    assert [(name, stats.rows, stats.pages) for name, stats in etl.stats.items() if stats.calls] == [
+        ('extracao', 6, 2), ('transformacao', 6, 2), ('carregamento', 6, 2)]
+    assert hook.events[:6] == [('inicio', 'extracao'), ('fim', 'extracao'), ('inicio', 'transformacao'),
+                               ('fim', 'transformacao'), ('inicio', 'carregamento'), ('fim', 'carregamento')]
+    assert etl.wall_time >= sum(stats.wall_time for stats in etl.stats.values())
+    assert 'Transformação' in etl.report()
+
+
+def test_pipeline_process_combines_cleaned_tables(monkeypatch):
+    monkeypatch.setattr(pipeline, 'extract_tables_from_pdf',
+                        lambda pdf_path, with_pages=False, **kwargs: list(_page_tables(pdf_path)))
+
+    etl = Pipeline('livro.pdf')
+    df = etl.process()
+
+    assert len(df) == 6
+    assert etl.stats['combinacao'].rows == 6
+    assert etl.stats['combinacao'].pages == 2
+    assert etl.stats['carregamento'].calls == 0
+
+
+def test_profile_hook_writes_one_profile_per_stage(tmp_path):
+    timer = StageTimer(hooks=[ProfileHook(str(tmp_path), prefix='livro')])
+    for _ in range(2):
+        with timer.stage('transformacao'):
+            sum(range(1000))
+    timer.close()
+
+    assert timer.stats['transformacao'].calls == 2
+    assert sorted(path.name for path in tmp_path.iterdir()) == ['livro.transformacao.prof', 'livro.transformacao.txt']
+
+
+def test_pipeline_profile_runs_extraction_in_a_single_process(tmp_path, monkeypatch):
+    streaming = sys.modules[pipeline.run_streaming_etl.__module__]
+    monkeypatch.setattr(streaming, 'iter_page_tables', _page_tables)
+
+    etl = Pipeline('livro.pdf', workers=4, profile_dir=str(tmp_path / 'perfis'), metrics=False)
+    etl.run(str(tmp_path / 'dados.csv'), format_type='csv', include_header=False)
+
+    # Com vários processos, o perfil da extração ficaria vazio
+    assert etl.workers == 1
+    assert (tmp_path / 'perfis' / 'livro.extracao.prof').exists()
+
+def _prefiltered_page_tables(pdf_path, on_prefilter=None, **kwargs):
+    # 5 páginas: 2 descartadas pelo pré-filtro, 1 sem tabelas e 2 com tabelas
+    on_prefilter(5, 2)
+    yield from _page_tables(pdf_path)
+
+def test_pipeline_run_writes_metrics(tmp_path, monkeypatch):
+    streaming = sys.modules[pipeline.run_streaming_etl.__module__]
+    monkeypatch.setattr(streaming, 'iter_page_tables', _prefiltered_page_tables)
+    metrics = sys.modules[pipeline.collect_metrics.__module__]
+    monkeypatch.setattr(metrics, 'count_pages', lambda pdf_path: 5)
+
+    # Streaming: no modo sobreposto, o processo de extração só veria o monkeypatch com fork
+    etl = Pipeline('livro.pdf', metrics_path=str(tmp_path / 'metricas.json'))
+    etl.run(str(tmp_path / 'dados.csv'), format_type='csv', include_header=False, streaming=True)
+
+    report = json.loads((tmp_path / 'metricas.json').read_text(encoding='utf-8'))
+    assert report['sucesso'] and report['modo'] == 'streaming'
+    assert report['paginas'] == {'total': 5, 'processadas': 2, 'ignoradas': 2, 'sem_tabelas': 1}
+    assert report['tabelas']['total'] == 3
+    assert report['linhas'] == {'extraidas': 6, 'transformadas': 6, 'gravadas': 6}
+    assert [stage['etapa'] for stage in report['etapas']] == ['extracao', 'transformacao', 'carregamento']
+    assert report['vazao']['linhas_por_s'] > 0
+    assert report['memoria']['pico_rss_mb'] > 0
+
+
+@pytest.mark.parametrize('function', ['run_streaming_etl', 'run_pipelined_etl'])
+def test_output_is_discarded_when_the_writer_fails_to_close(tmp_path, monkeypatch, function):
+    if function == 'run_pipelined_etl' and multiprocessing.get_start_method() != 'fork':
+        pytest.skip('o processo de extração só vê o monkeypatch com fork')
+    streaming = sys.modules[pipeline.run_streaming_etl.__module__]
+    monkeypatch.setattr(streaming, 'iter_page_tables', _page_tables)
+    open_writer = streaming.open_stream_writer
+
+    def failing_writer(*args, **kwargs):
+        writer = open_writer(*args, **kwargs)
+
+        def close():
+            raise OSError('disco cheio')
+        writer.close = close
+        return writer
+    monkeypatch.setattr(streaming, 'open_stream_writer', failing_writer)
+
+    with pytest.raises(OSError, match='disco cheio'):
+        getattr(streaming, function)('livro.pdf', str(tmp_path / 'dados.csv'), format_type='csv')
+    assert list(tmp_path.iterdir()) == []
+
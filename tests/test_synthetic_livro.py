@@ -0,0 +1,49 @@
+import pandas as pd
+
+from src.benchmark_scaling import benchmark_size
+from src.extraction import extract_tables_from_pdf
+from src.synthetic_livro import generate_livro
+
+def test_synthetic_livro_is_deterministic(tmp_path):
+    first = generate_livro(tmp_path / 'a.pdf', pages=6, seed=3)
+    second = generate_livro(tmp_path / 'b.pdf', pages=6, seed=3)
+    assert (tmp_path / 'a.pdf').read_bytes() == (tmp_path / 'b.pdf').read_bytes()
+    assert first.equals(second)
+    assert not generate_livro(tmp_path / 'c.pdf', pages=6, seed=4).equals(first)
+
+def test_template_extracts_every_synthetic_note(tmp_path):
+    pdf_path = str(tmp_path / 'livro.pdf')
+    expected = generate_livro(pdf_path, pages=6)
+
+    tables = extract_tables_from_pdf(pdf_path, method='template', use_cache=False)
+    # Capa e termos de abertura e encerramento não têm notas
+    assert len(tables) == 3
+    obtained = pd.concat(tables, ignore_index=True)
+    assert obtained.equals(expected)
+
+def test_benchmark_size_reports_stages_rows_and_summary(tmp_path):
+    pdf_path = str(tmp_path / 'livro.pdf')
+    expected = generate_livro(pdf_path, pages=5)
+
+    result = benchmark_size(pdf_path, methods=['template'], output_dir=str(tmp_path))
+    assert set(result['etapas']) == {'extracao_template', 'clean_dataframe', 'load_to_excel', 'load_to_csv',
+                                     'create_summary_sheet'}
+    assert result['paginas'] == 5
+    assert result['linhas'] == len(expected)
+    assert result['resumo']['nfs_emitidas'] == len(expected)
+    assert result['resumo']['nfs_canceladas'] == (expected['Situação'] == 'CANCELADA').sum()
+
+def test_template_relearns_columns_when_pdf_is_replaced(tmp_path, monkeypatch):
+    from src import synthetic_livro
+
+    pdf_path = str(tmp_path / 'livro.pdf')
+    generate_livro(pdf_path, pages=4)
+    extract_tables_from_pdf(pdf_path, method='template', use_cache=False)
+
+    # Mesmo caminho, colunas deslocadas: os limites do PDF anterior não servem mais
+    monkeypatch.setattr(synthetic_livro, 'HEADER_X', [x + 25 for x in synthetic_livro.HEADER_X])
+    monkeypatch.setattr(synthetic_livro, 'VALUE_X', [x + 25 for x in synthetic_livro.VALUE_X])
+    expected = generate_livro(pdf_path, pages=4, seed=1)
+
+    tables = extract_tables_from_pdf(pdf_path, method='template', use_cache=False)
+    assert pd.concat(tables, ignore_index=True).equals(expected)
@@ -0,0 +1,29 @@
+from src.template_extraction import SERVICE_HEADERS, learn_column_boundaries, _build_table
+
+def _line(y, cells):
+    """Monta uma linha de trechos (x0, base, x1, topo, texto) a partir de (x0, x1, texto)"""
+    return [(x0, y, x1, y + 5, text) for x0, x1, text in cells]
+
+HEADER = _line(540, [(26.6, 47.8, 'N° Nota'), (80.6, 116.0, 'Dt,. Emissão'), (138.3, 194.9, 'CPF/CNPJ Tomador'),
+                     (207.0, 264.7, 'Tomador do Serviço'), (331.8, 353.0, 'Serviço'), (385.5, 418.2, 'Vrl. Serviço'),
+                     (443.1, 488.8, 'Base de Cálculo'), (504.6, 517.1, 'Aliq.'), (545.9, 578.0, 'ISS Próprio'),
+                     (607.1, 636.5, 'ISS Retido'), (646.3, 695.0, 'Nat. da Operação'), (723.2, 752.0, 'Incidência'),
+                     (787.4, 812.0, 'Situação')])
+NOTE = _line(531, [(14.3, 63.0, '202200000000001'), (85.3, 114.8, '03/01/2022'), (140.2, 193.4, '60.961.422/0001-55'),
+                   (207.2, 311.1, 'SERVIÇO SOCIAL DA INDÚSTRIA DE'), (335.5, 348.4, '0403'), (391.9, 418.2, '44.112,20'),
+                   (462.4, 488.7, '44.112,20'), (505.0, 523.2, '3,00 %'), (555.5, 578.0, '1.323,37'),
+                   (625.3, 636.5, '0,00'), (658.4, 685.1, 'EXIGÍVEL'), (722.4, 753.7, 'ESTAB. DO'),
+                   (781.1, 823.5, 'ESCRITURADA')])
+
+def test_template_bins_note_line_into_learned_columns():
+    boundaries = learn_column_boundaries([HEADER, NOTE])
+    assert len(boundaries) == len(SERVICE_HEADERS) - 1
+    # O nome do tomador passa do centro do cabeçalho "Serviço" e não pode ser cortado
+    assert 311.1 < boundaries[3] < 335.5
+
+    df = _build_table([NOTE], boundaries)
+    assert list(df.columns) == SERVICE_HEADERS
+    assert df.iloc[0].tolist() == [text for _, _, _, _, text in NOTE]
+
+def test_template_requires_book_header():
+    assert learn_column_boundaries([NOTE]) is None
@@ -0,0 +1,50 @@
+import pandas as pd
+
+from src.transformation import centavos_to_reais, clean_dataframe, format_emission_dates, parse_money
+
+
+def test_format_emission_dates_accepts_each_layout():
+    dates = pd.Series(['03/01/2022', 'x 15022022 y', '3012022', 'sem data', '1234567 01/02/2022'], index=[5, 6, 7, 8, 9])
+
+    formatted, competencias = format_emission_dates(dates)
+
+    assert formatted.tolist() == ['03/01/2022', '15/02/2022', '03/01/2022', 'sem data', '01/02/2022']
+    assert competencias.tolist() == ['01/2022', '02/2022', '01/2022', '', '02/2022']
+    assert list(formatted.index) == [5, 6, 7, 8, 9]
+
+
+def test_clean_dataframe_inserts_competencia_after_emission_date():
+    df = pd.DataFrame({'N° Nota': ['202200000000001', '202200000000002'],
+                       'Dt,. Emissão': ['03/01/2022', '15/10/2022'],
+                       'Base de Cálculo': ['1.500,00', '20,00']})
+
+    cleaned = clean_dataframe(df)
+
+    assert list(cleaned.columns) == ['n° nota', 'dt,. emissão', 'competência', 'base de cálculo']
+    assert cleaned['dt,. emissão'].tolist() == ['03/01/2022', '15/10/2022']
+    assert cleaned['competência'].tolist() == ['01/2022', '10/2022']
+    # Valores monetários em centavos
+    assert cleaned['base de cálculo'].tolist() == [150000, 2000]
+
+
+def test_clean_dataframe_keeps_empty_emission_dates_as_zero():
+    df = pd.DataFrame({'N° Nota': ['202200000000001', '202200000000002'],
+                       'Dt,. Emissão': ['10/01/2022', ''],
+                       'Base de Cálculo': ['1.500,00', '20,00']})
+
+    cleaned = clean_dataframe(df)
+
+    # Como no código original: a data vazia passa pela conversão monetária e fica 0.0
+    assert cleaned['dt,. emissão'].tolist() == ['10/01/2022', 0.0]
+    assert cleaned['competência'].tolist() == ['01/2022', '']
+
+
+def test_parse_money_returns_exact_centavos():
+    values = pd.Series(['R$ 1.978.430,48', '0,60', '20', '', None, '3,005', ',5'])
+
+    centavos = parse_money(values)
+
+    assert centavos.dtype == 'int64'
+    assert centavos.tolist() == [197843048, 60, 2000, 0, 0, 301, 50]
+    df = pd.DataFrame({'iss próprio': centavos, 'dt,. emissão': ['03/01/2022'] * len(values)})
+    assert centavos_to_reais(df)['iss próprio'].tolist() == [1978430.48, 0.6, 20.0, 0.0, 0.0, 3.01, 0.5]